@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+################################################################################
+# Author:  Davide Aliprandi, STMicroelectronics                                #
+################################################################################
+
+
+# DESCRIPTION
+#
+# This application measures the time needed to sweep many nodes, i.e. to
+# connect to each of them, read its features, and disconnect, both serially and
+# through the connection pool of the manager, on simulated nodes with realistic
+# connection and response times and an adapter with limited links.
+
+
+# IMPORT
+
+from __future__ import print_function
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from blue_st_sdk.manager import Manager
+from blue_st_sdk.connection_pool import ConnectionPool
+from blue_st_sdk.simulated_transport import SimulatedDevice
+from blue_st_sdk.simulated_transport import SimulatedTransport
+
+
+# PRECONDITIONS
+#
+# Please remember to add to the "PYTHONPATH" environment variable the location
+# of the "BlueSTSDK_Python" SDK.
+#
+# On Linux:
+#   export PYTHONPATH=/home/<user>/BlueSTSDK_Python
+#
+# Usage:
+#   python benchmark_connection_pool.py [nodes]
+
+
+# CONSTANTS
+
+# Presentation message.
+INTRO = """####################################
+# BlueST Connection Pool Benchmark #
+####################################"""
+
+# Feature mask of the simulated nodes (accelerometer, gyroscope, magnetometer).
+FEATURE_MASK = 0x00E00000
+
+# Number of simulated nodes.
+NODES = 200
+
+# Time in seconds needed to establish a link.
+CONNECTION_TIME_s = 0.02
+
+# Time in seconds a simulated node takes to answer a GATT request.
+RESPONSE_TIME_s = 0.015
+
+# Maximum number of simultaneous connection attempts of the adapter.
+MAX_CONNECTING = 1
+
+# Maximum number of simultaneous links of the adapter.
+MAX_LINKS = 7
+
+# Scanning time in seconds of the simulated nodes.
+SCANNING_TIME_s = 0.1
+
+
+# FUNCTIONS
+
+#
+# Printing intro.
+#
+def print_intro():
+    print('\n' + INTRO + '\n')
+
+#
+# Creating the simulated nodes.
+#
+def create_nodes(nodes):
+    transport = SimulatedTransport(
+        max_connecting=MAX_CONNECTING, max_links=MAX_LINKS)
+    for i in range(0, nodes):
+        device = SimulatedDevice('c0:de:00:00:%02x:%02x' % (i >> 8, i & 0xFF),
+            'SWEEP%d' % i, 0x02, FEATURE_MASK)
+        device.connection_time_s = CONNECTION_TIME_s
+        device.response_time_s = RESPONSE_TIME_s
+        transport.add_device(device)
+    manager = Manager.instance()
+    manager.set_transport(transport)
+    manager.discover(timeout_s=SCANNING_TIME_s)
+    return manager.get_nodes()
+
+#
+# Reading all the features of a node.
+#
+def read_features(node):
+    for feature in node.get_features():
+        node.read_feature(feature)
+
+#
+# Sweeping the nodes serially.
+#
+def sweep_serially(nodes):
+    for node in nodes:
+        node.connect()
+        read_features(node)
+        node.disconnect()
+
+#
+# Sweeping the nodes through the connection pool.
+#
+def sweep_with_pool(nodes, pool):
+    def visit(node):
+        pool.connect(node).result()
+        try:
+            read_features(node)
+        finally:
+            pool.release(node)
+    executor = ThreadPoolExecutor(MAX_LINKS)
+    for future in [executor.submit(visit, node) for node in nodes]:
+        future.result()
+    executor.shutdown()
+
+
+# MAIN APPLICATION
+
+#
+# Main application.
+#
+def main(argv):
+
+    # Printing intro.
+    print_intro()
+
+    try:
+        nodes = create_nodes(int(argv[0]) if len(argv) > 0 else NODES)
+        print('%d nodes, at most %d link(s) and %d connection attempt(s).\n' \
+            % (len(nodes), MAX_LINKS, MAX_CONNECTING))
+
+        # Sweeping serially.
+        start = time.time()
+        sweep_serially(nodes)
+        print('Serial sweep:          %6.2f s' % (time.time() - start))
+
+        # Sweeping through the connection pool.
+        pool = ConnectionPool(MAX_CONNECTING, MAX_LINKS)
+        Manager.instance().set_connection_pool(pool)
+        start = time.time()
+        sweep_with_pool(nodes, pool)
+        elapsed = time.time() - start
+        statistics = pool.get_statistics()
+        pool.close()
+        print('Connection pool sweep: %6.2f s (%d connections, %d evictions, ' \
+            '%d failures)' % (elapsed, statistics['connections'],
+            statistics['evictions'], statistics['failures']))
+
+        # Exiting.
+        print('\nExiting...\n')
+        sys.exit(0)
+    except KeyboardInterrupt:
+        try:
+            # Exiting.
+            print('\nExiting...\n')
+            sys.exit(0)
+        except SystemExit:
+            os._exit(0)
+
+
+if __name__ == "__main__":
+
+    main(sys.argv[1:])
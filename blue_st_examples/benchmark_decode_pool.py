@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+################################################################################
+# Author:  Davide Aliprandi, STMicroelectronics                                #
+################################################################################
+
+
+# DESCRIPTION
+#
+# This application measures the throughput of the decoding of notifications,
+# both on the receiving thread and through a pool of worker processes with an
+# increasing number of processes, on traffic generated by simulated nodes
+# exporting inertial features on a single characteristic.
+
+
+# IMPORT
+
+from __future__ import print_function
+import sys
+import os
+import time
+import struct
+import threading
+import multiprocessing
+
+from blue_st_sdk.decode_pool import DecodePool
+from blue_st_sdk.feature import FeatureListener
+from blue_st_sdk.simulated_transport import SimulatedDevice
+from blue_st_sdk.simulated_transport import SimulatedTransport
+from blue_st_sdk.simulated_transport import get_feature_characteristic_uuid
+
+
+# PRECONDITIONS
+#
+# Please remember to add to the "PYTHONPATH" environment variable the location
+# of the "BlueSTSDK_Python" SDK.
+#
+# On Linux:
+#   export PYTHONPATH=/home/<user>/BlueSTSDK_Python
+#
+# Usage:
+#   python benchmark_decode_pool.py [nodes] [notifications per node]
+
+
+# CONSTANTS
+
+# Presentation message.
+INTRO = """################################
+# BlueST Decode Pool Benchmark #
+################################"""
+
+# Feature mask of the simulated nodes (accelerometer, gyroscope, magnetometer).
+FEATURE_MASK = 0x00E00000
+
+# Scanning time in seconds of the simulated nodes.
+SCANNING_TIME_s = 0.1
+
+# Number of simulated nodes.
+NODES = 32
+
+# Number of notifications per node.
+NOTIFICATIONS = 2000
+
+# Time in seconds to wait for the decoded samples.
+TIMEOUT_s = 60
+
+
+# FUNCTIONS
+
+#
+# Printing intro.
+#
+def print_intro():
+    print('\n' + INTRO + '\n')
+
+#
+# Creating and connecting the simulated nodes.
+#
+def create_nodes(nodes):
+    transport = SimulatedTransport()
+    for i in range(0, nodes):
+        device = SimulatedDevice('c0:de:00:00:%02x:%02x' % (i >> 8, i & 0xFF),
+            'BENCH%d' % i, 0x02, FEATURE_MASK, notification_period_s=3600)
+        device.add_characteristic(
+            get_feature_characteristic_uuid(FEATURE_MASK),
+            lambda counter: b'\x00' * 18)
+        transport.add_device(device)
+    result = []
+    for scan_entry in transport.create_scanner().scan(SCANNING_TIME_s):
+        node = transport.create_node(scan_entry)
+        node.connect()
+        result.append(node)
+    return result
+
+#
+# Getting the handle of the characteristic exporting all the features.
+#
+def get_handle(node):
+    for (handle, features) in \
+        node._update_char_handle_to_features_dict.items():
+        if len(features) == 3:
+            return (handle, features)
+    raise ValueError('Inertial characteristic not found.')
+
+#
+# Generating the raw notifications of a node.
+#
+def create_payloads(count):
+    return [struct.pack('<H9h', i & 0xFFFF,
+        *[(i * (j + 1)) % 2000 - 1000 for j in range(0, 9)])
+        for i in range(0, count)]
+
+#
+# Feeding the notifications to the nodes and waiting for the decoded samples.
+#
+def run(nodes, payloads, pool):
+    counter = Counter(len(nodes) * len(payloads) * 3)
+    for node in nodes:
+        (handle, features) = get_handle(node)
+        node._bench_handle = handle
+        for feature in features:
+            feature.add_listener(counter)
+        if pool is not None:
+            pool.add_node(node)
+    start = time.time()
+    for data in payloads:
+        for node in nodes:
+            node._update_features(node._bench_handle, data, True)
+    if pool is not None:
+        pool.flush()
+    completed = counter.wait(TIMEOUT_s)
+    elapsed = time.time() - start
+    for node in nodes:
+        for feature in get_handle(node)[1]:
+            feature.remove_listener(counter)
+        if pool is not None:
+            pool.remove_node(node)
+    return (elapsed, completed)
+
+
+# INTERFACES
+
+#
+# Implementation of the interface used by the Feature class to notify that a
+# feature has updated its data, counting the updates.
+#
+class Counter(FeatureListener):
+
+    def __init__(self, expected):
+        self._expected = expected
+        self._updates = 0
+        self._done = threading.Event()
+
+    #
+    # To be called whenever the feature updates its data.
+    #
+    # @param feature Feature that has updated.
+    # @param sample  Data extracted from the feature.
+    #
+    def on_update(self, feature, sample):
+        self._updates += 1
+        if self._updates == self._expected:
+            self._done.set()
+
+    def wait(self, timeout):
+        self._done.wait(timeout)
+        return self._updates
+
+
+# MAIN APPLICATION
+
+#
+# Main application.
+#
+def main(argv):
+
+    # Printing intro.
+    print_intro()
+
+    try:
+        nodes_count = int(argv[0]) if len(argv) > 0 else NODES
+        notifications = int(argv[1]) if len(argv) > 1 else NOTIFICATIONS
+        nodes = create_nodes(nodes_count)
+        payloads = create_payloads(notifications)
+        total = nodes_count * notifications
+        print('%d nodes, %d notifications, %d cores.\n' \
+            % (nodes_count, total, multiprocessing.cpu_count()))
+
+        # Decoding on the receiving thread.
+        (elapsed, updates) = run(nodes, payloads, None)
+        print('Receiving thread: %8.0f notifications/s' % (total / elapsed))
+
+        # Decoding through pools of increasing size.
+        processes = 1
+        while processes <= multiprocessing.cpu_count():
+            pool = DecodePool(processes)
+            (elapsed, updates) = run(nodes, payloads, pool)
+            statistics = pool.get_statistics()
+            pool.close()
+            print('%2d process(es):   %8.0f notifications/s ' \
+                '(%d batches, %d dropped)' % (processes, total / elapsed,
+                statistics['batches'], statistics['dropped']))
+            processes *= 2
+
+        for node in nodes:
+            node.disconnect()
+
+        # Exiting.
+        print('\nExiting...\n')
+        sys.exit(0)
+    except KeyboardInterrupt:
+        try:
+            # Exiting.
+            print('\nExiting...\n')
+            sys.exit(0)
+        except SystemExit:
+            os._exit(0)
+
+
+if __name__ == "__main__":
+
+    main(sys.argv[1:])
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+################################################################################
+# Author:  Davide Aliprandi, STMicroelectronics                                #
+################################################################################
+
+
+# DESCRIPTION
+#
+# This application measures the cost of dispatching notifications to their
+# handlers, comparing the handle-indexed table built by the nodes when
+# connecting with the former per-notification lookups, on high-rate traffic
+# generated by a simulated node exporting inertial features, with and without a
+# debug console.
+
+
+# IMPORT
+
+from __future__ import print_function
+import sys
+import os
+import time
+import struct
+
+from bluepy.btle import Characteristic
+
+from blue_st_sdk.debug_console import DebugConsole
+from blue_st_sdk.simulated_transport import SimulatedDevice
+from blue_st_sdk.simulated_transport import SimulatedTransport
+from blue_st_sdk.simulated_transport import get_feature_characteristic_uuid
+from blue_st_sdk.utils.ble_node_definitions import Debug
+from blue_st_sdk.utils.blue_st_exceptions import InvalidDataException
+
+
+# PRECONDITIONS
+#
+# Please remember to add to the "PYTHONPATH" environment variable the location
+# of the "BlueSTSDK_Python" SDK.
+#
+# On Linux:
+#   export PYTHONPATH=/home/<user>/BlueSTSDK_Python
+#
+# Usage:
+#   python benchmark_dispatch.py [notifications]
+
+
+# CONSTANTS
+
+# Presentation message.
+INTRO = """#############################
+# BlueST Dispatch Benchmark #
+#############################"""
+
+# Feature mask of the simulated node (accelerometer, gyroscope, magnetometer).
+FEATURE_MASK = 0x00E00000
+
+# Scanning time in seconds of the simulated node.
+SCANNING_TIME_s = 0.1
+
+# Number of notifications.
+NOTIFICATIONS = 100000
+
+# Number of runs of each measurement, the best one being reported.
+RUNS = 5
+
+# Handles of the debug characteristics added to the node.
+DEBUG_HANDLES = (0xF001, 0xF004)
+
+
+# FUNCTIONS
+
+#
+# Printing intro.
+#
+def print_intro():
+    print('\n' + INTRO + '\n')
+
+#
+# Creating and connecting the simulated node.
+#
+def create_node():
+    transport = SimulatedTransport()
+    device = SimulatedDevice('c0:de:00:00:00:00', 'BENCH', 0x02, FEATURE_MASK,
+        notification_period_s=3600)
+    device.add_characteristic(
+        get_feature_characteristic_uuid(FEATURE_MASK),
+        lambda counter: b'\x00' * 18)
+    transport.add_device(device)
+    scan_entry = transport.create_scanner().scan(SCANNING_TIME_s)[0]
+    node = transport.create_node(scan_entry)
+    node.connect()
+    return node
+
+#
+# Adding a debug console to the node, as if it exported the debug service.
+#
+def add_debug_console(node):
+    characteristics = []
+    for (uuid, handle) in zip((Debug.DEBUG_STDINOUT_BLUESTSDK_SERVICE_UUID,
+        Debug.DEBUG_STDERR_BLUESTSDK_SERVICE_UUID), DEBUG_HANDLES):
+        characteristic = Characteristic(node, str(uuid), handle - 1, 0x12,
+            handle)
+        node._char_handle_to_characteristic_dict[handle] = characteristic
+        characteristics.append(characteristic)
+    node._debug_console = DebugConsole(node, *characteristics)
+    node._build_notification_handlers()
+
+#
+# Generating the notifications of the node, spread over its characteristics.
+#
+def create_notifications(node, count):
+    handles = sorted(node._update_char_handle_to_features_dict.keys())
+    notifications = []
+    for i in range(0, count):
+        handle = handles[i % len(handles)]
+        features = len(node._update_char_handle_to_features_dict[handle])
+        notifications.append((handle, struct.pack('<H%dh' % (3 * features),
+            i & 0xFFFF, *[i % 1000] * (3 * features))))
+    return notifications
+
+#
+# Dispatching a notification as the node did before building the table of the
+# notification handlers.
+#
+def legacy_dispatch(node, char_handle, data):
+    node._last_notification_time = time.time()
+    try:
+        if node._debug_console:
+            characteristic = \
+                node._char_handle_to_characteristic_dict[char_handle]
+            if Debug.is_debug_characteristic(str(characteristic.uuid)):
+                node._debug_console.on_update_characteristic(
+                    characteristic, data)
+                return
+        node._update_features(char_handle, data, True)
+    except InvalidDataException as e:
+        pass
+
+#
+# Dispatching the notifications and measuring the best throughput.
+#
+def run(dispatch, notifications):
+    best = 0
+    for i in range(0, RUNS):
+        start = time.time()
+        for (handle, data) in notifications:
+            dispatch(handle, data)
+        best = max(best, len(notifications) / (time.time() - start))
+    return best
+
+
+# MAIN APPLICATION
+
+#
+# Main application.
+#
+def main(argv):
+
+    # Printing intro.
+    print_intro()
+
+    try:
+        count = int(argv[0]) if len(argv) > 0 else NOTIFICATIONS
+        node = create_node()
+        notifications = create_notifications(node, count)
+        print('%d notifications.\n' % (count))
+
+        for debug_console in (False, True):
+            if debug_console:
+                add_debug_console(node)
+            legacy = run(lambda handle, data: legacy_dispatch(
+                node, handle, data), notifications)
+            table = run(node.delegate.handleNotification, notifications)
+            print('%-19s legacy: %8.0f notifications/s, table: %8.0f ' \
+                'notifications/s' % ('With debug console:' if debug_console \
+                else 'No debug console:', legacy, table))
+
+        node.disconnect()
+
+        # Exiting.
+        print('\nExiting...\n')
+        sys.exit(0)
+    except KeyboardInterrupt:
+        try:
+            # Exiting.
+            print('\nExiting...\n')
+            sys.exit(0)
+        except SystemExit:
+            os._exit(0)
+
+
+if __name__ == "__main__":
+
+    main(sys.argv[1:])
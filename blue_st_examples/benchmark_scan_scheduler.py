@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+################################################################################
+# Author:  Davide Aliprandi, STMicroelectronics                                #
+################################################################################
+
+
+# DESCRIPTION
+#
+# This application measures how the adaptive scan scheduler trades scanning
+# time for discovery latency, driving it with a scripted scanner over a virtual
+# time in which the churn of the devices around changes from phase to phase,
+# and comparing it with scanning continuously.
+
+
+# IMPORT
+
+from __future__ import print_function
+import sys
+import os
+
+from blue_st_sdk.scan_scheduler import AdaptiveScanScheduler
+
+
+# PRECONDITIONS
+#
+# Please remember to add to the "PYTHONPATH" environment variable the location
+# of the "BlueSTSDK_Python" SDK.
+#
+# On Linux:
+#   export PYTHONPATH=/home/<user>/BlueSTSDK_Python
+#
+# Usage:
+#   python benchmark_scan_scheduler.py
+
+
+# CONSTANTS
+
+# Presentation message.
+INTRO = """###################################
+# BlueST Scan Scheduler Benchmark #
+###################################"""
+
+# Phases of the script: name, duration in seconds, new devices per second, and
+# changes of the advertising data per second.
+PHASES = [
+    ('Start-up', 60, 1.0, 0.0),
+    ('Stable', 600, 0.0, 0.0),
+    ('Arrivals', 120, 0.25, 0.05),
+    ('Sleeping', 300, 0.0, 0.01),
+    ('Stable', 1800, 0.0, 0.0)
+]
+
+
+# CLASSES
+
+#
+# Scanner following a script of events over a virtual time: an event is seen
+# as soon as it happens while scanning, or at the start of the next scanning
+# window otherwise.
+#
+class ScriptedScanner(object):
+
+    def __init__(self, phases):
+        self._events = []
+        start_s = 0.0
+        for (name, duration_s, discovery_rate, change_rate) in phases:
+            for (rate, is_discovery) in ((discovery_rate, True),
+                (change_rate, False)):
+                for i in range(0, int(duration_s * rate)):
+                    self._events.append((start_s + (i + 0.5) / rate,
+                        is_discovery))
+            start_s += duration_s
+        self._events.sort()
+        self._next = 0
+
+    #
+    # Scanning from "start_s" for "window_s" seconds, reporting the events seen
+    # to the scheduler; returns the latencies of the events seen.
+    #
+    def process(self, scheduler, start_s, window_s):
+        latencies = []
+        while self._next < len(self._events) \
+            and self._events[self._next][0] <= start_s + window_s:
+            (time_s, is_discovery) = self._events[self._next]
+            if is_discovery:
+                scheduler.on_discovery()
+            else:
+                scheduler.on_advertisement_change()
+            latencies.append(max(start_s - time_s, 0.0))
+            self._next += 1
+        return latencies
+
+
+# FUNCTIONS
+
+#
+# Printing intro.
+#
+def print_intro():
+    print('\n' + INTRO + '\n')
+
+#
+# Running the script, and reporting for each phase the fraction of time spent
+# scanning, the final duty cycle, and the mean and maximum latency of the
+# events.
+#
+def run(scheduler):
+    scanner = ScriptedScanner(PHASES)
+    time_s = 0.0
+    end_s = 0.0
+    results = []
+    for (name, duration_s, discovery_rate, change_rate) in PHASES:
+        end_s += duration_s
+        scanning_s = 0.0
+        elapsed_s = 0.0
+        latencies = []
+        while time_s < end_s:
+            window_s = scheduler.get_window_s()
+            idle_s = scheduler.get_idle_s()
+            latencies.extend(scanner.process(scheduler, time_s, window_s))
+            scheduler.end_cycle(window_s, idle_s)
+            scanning_s += window_s
+            elapsed_s += window_s + idle_s
+            time_s += window_s + idle_s
+        results.append((name, scanning_s / elapsed_s,
+            scheduler.get_duty_cycle(),
+            sum(latencies) / len(latencies) if latencies else 0.0,
+            max(latencies) if latencies else 0.0))
+    return results
+
+
+# MAIN APPLICATION
+
+#
+# Main application.
+#
+def main(argv):
+
+    # Printing intro.
+    print_intro()
+
+    try:
+        scheduler = AdaptiveScanScheduler()
+        overall_s = sum(phase[1] for phase in PHASES)
+        print('%-10s %8s %9s %8s %12s %11s' % ('Phase', 'Length', 'Scanning',
+            'Duty', 'Latency', 'Max latency'))
+        for (phase, (name, scanning, duty_cycle, latency, max_latency)) in \
+            zip(PHASES, run(scheduler)):
+            print('%-10s %7ds %8.0f%% %7.0f%% %11.1fs %10.1fs' % (name,
+                phase[1], scanning * 100, duty_cycle * 100, latency,
+                max_latency))
+        statistics = scheduler.get_statistics()
+        print('\nScanning time over %ds: %.0f%% adaptive, 100%% continuous.' \
+            % (overall_s, statistics['mean_duty_cycle'] * 100))
+
+        # Exiting.
+        print('\nExiting...\n')
+        sys.exit(0)
+    except KeyboardInterrupt:
+        try:
+            # Exiting.
+            print('\nExiting...\n')
+            sys.exit(0)
+        except SystemExit:
+            os._exit(0)
+
+
+if __name__ == "__main__":
+
+    main(sys.argv[1:])
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+################################################################################
+# Author:  Davide Aliprandi, STMicroelectronics                                #
+################################################################################
+
+
+# DESCRIPTION
+#
+# This application measures the time to the first sample of a known node after
+# a restart, with and without the persistent node registry: without it, the
+# node has to be discovered again before connecting; with it, the node is
+# restored from the registry and connected to at once. The restart is emulated
+# by forgetting the nodes discovered, on a simulated node.
+
+
+# IMPORT
+
+from __future__ import print_function
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from blue_st_sdk.feature import FeatureListener
+from blue_st_sdk.manager import Manager
+from blue_st_sdk.node_registry import NodeRegistry
+from blue_st_sdk.simulated_transport import SimulatedDevice
+from blue_st_sdk.simulated_transport import SimulatedTransport
+
+
+# PRECONDITIONS
+#
+# Please remember to add to the "PYTHONPATH" environment variable the location
+# of the "BlueSTSDK_Python" SDK.
+#
+# On Linux:
+#   export PYTHONPATH=/home/<user>/BlueSTSDK_Python
+#
+# Usage:
+#   python benchmark_warm_start.py
+
+
+# CONSTANTS
+
+# Presentation message.
+INTRO = """###############################
+# BlueST Warm Start Benchmark #
+###############################"""
+
+# MAC address of the simulated node.
+ADDRESS = 'c0:de:00:00:00:00'
+
+# Feature mask of the simulated node (temperature).
+FEATURE_MASK = 0x00040000
+
+# Scanning time in seconds of the discovery process.
+SCANNING_TIME_s = 10
+
+# Factor applied to the scanning time of the simulated transport.
+TIME_SCALE = 0.1
+
+# Time in seconds needed to establish a link to the simulated node.
+CONNECTION_TIME_s = 0.2
+
+# Time in seconds between two notifications of the simulated node.
+NOTIFICATION_PERIOD_s = 0.05
+
+# Timeout in seconds of a single wait for notifications.
+NOTIFICATIONS_TIME_s = 0.05
+
+
+# INTERFACES
+
+#
+# Implementation of the interface used by the Feature class to notify that a
+# feature has updated its data.
+#
+class MyFeatureListener(FeatureListener):
+
+    def __init__(self):
+        self.updated = threading.Event()
+
+    #
+    # To be called whenever the feature updates its data.
+    #
+    def on_update(self, feature, sample):
+        self.updated.set()
+
+
+# FUNCTIONS
+
+#
+# Printing intro.
+#
+def print_intro():
+    print('\n' + INTRO + '\n')
+
+#
+# Connecting to the node and waiting for its first sample.
+#
+def get_first_sample(node):
+    node.connect()
+    feature = node.get_features()[0]
+    listener = MyFeatureListener()
+    feature.add_listener(listener)
+    node.enable_notifications(feature)
+    while not listener.updated.is_set():
+        node.waitForNotifications(NOTIFICATIONS_TIME_s)
+    node.disable_notifications(feature)
+    feature.remove_listener(listener)
+    node.disconnect()
+
+#
+# Emulating a restart: forgetting the nodes discovered, and restoring those of
+# the registry, if any.
+#
+def restart(manager, path):
+    manager.set_node_registry(None)
+    manager.remove_nodes()
+    if path is not None:
+        manager.set_node_registry(NodeRegistry(path))
+
+#
+# Measuring the time to the first sample after a restart.
+#
+def run(manager, path):
+    restart(manager, path)
+    start = time.time()
+    node = manager.get_node_with_tag(ADDRESS)
+    if node is None:
+        manager.discover(False, SCANNING_TIME_s)
+        node = manager.get_node_with_tag(ADDRESS)
+    get_first_sample(node)
+    return time.time() - start
+
+
+# MAIN APPLICATION
+
+#
+# Main application.
+#
+def main(argv):
+
+    # Printing intro.
+    print_intro()
+
+    folder = tempfile.mkdtemp()
+    try:
+        device = SimulatedDevice(ADDRESS, 'BENCH', 0x02, FEATURE_MASK,
+            notification_period_s=NOTIFICATION_PERIOD_s)
+        device.connection_time_s = CONNECTION_TIME_s
+        transport = SimulatedTransport([device], time_scale=TIME_SCALE)
+        manager = Manager.instance()
+        manager.set_transport(transport)
+        path = os.path.join(folder, 'registry.json')
+
+        # Discovering the node once, to fill the registry.
+        manager.set_node_registry(NodeRegistry(path))
+        manager.discover(False, SCANNING_TIME_s)
+
+        cold = run(manager, None)
+        warm = run(manager, path)
+        print('Time to the first sample after a restart:')
+        print('  without registry: %.2f s' % (cold))
+        print('  with registry:    %.2f s' % (warm))
+        print('  registry file:    %d bytes' % (os.path.getsize(path)))
+
+        # Exiting.
+        shutil.rmtree(folder)
+        print('\nExiting...\n')
+        sys.exit(0)
+    except KeyboardInterrupt:
+        try:
+            # Exiting.
+            shutil.rmtree(folder)
+            print('\nExiting...\n')
+            sys.exit(0)
+        except SystemExit:
+            os._exit(0)
+
+
+if __name__ == "__main__":
+
+    main(sys.argv[1:])
@@ -1,7 +1,18 @@
 __all__ = [
+    'connection_pool', \
     'debug_console', \
+    'decode_pool', \
     'feature', \
+    'gatt_cache', \
     'manager', \
     'node', \
-    'python_utils'
+    'node_registry', \
+    'notification_poller', \
+    'python_utils', \
+    'receive_pipeline', \
+    'reconnection_supervisor', \
+    'scan_filter', \
+    'scan_scheduler', \
+    'simulated_transport', \
+    'transport'
 ]
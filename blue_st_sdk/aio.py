@@ -0,0 +1,590 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""aio
+
+The aio module contains an asyncio facade of the BlueSTSDK, so that a single
+event loop can serve many nodes:
+
+    manager = AsyncManager()
+    nodes = await manager.discover(timeout_s=5)
+    await nodes[0].connect()
+    feature = nodes[0].get_feature(FeatureAccelerometer)
+    async for sample in feature.stream():
+        print(sample)
+
+Blocking operations (discovery, connection, reads and writes) run on a bounded
+pool of threads, while the notifications of all the streaming nodes are received
+by a single :class:`blue_st_sdk.notification_poller.NotificationPoller` thread,
+whatever the number of nodes.
+
+This module requires Python 3.6 or later.
+"""
+
+
+# IMPORT
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import logging
+import threading
+from bluepy.btle import BTLEException
+
+from blue_st_sdk.feature import FeatureListener
+from blue_st_sdk.manager import Manager
+from blue_st_sdk.notification_poller import NotificationPoller
+from blue_st_sdk.utils.blue_st_exceptions import InvalidOperationException
+
+
+# DEFINITIONS
+
+MAX_WORKERS_DEFAULT = 4
+"""Default number of threads running the blocking operations."""
+
+STREAM_QUEUE_SIZE_DEFAULT = 1024
+"""Default maximum number of samples buffered by a stream."""
+
+
+# CLASSES
+
+class AsyncManager(object):
+    """asyncio facade of the :class:`blue_st_sdk.manager.Manager` class."""
+
+    def __init__(self, manager=None, max_workers=MAX_WORKERS_DEFAULT):
+        """Constructor.
+
+        Args:
+            manager (:class:`blue_st_sdk.manager.Manager`, optional): The
+                manager to wrap, the singleton instance if not given.
+            max_workers (int, optional): Number of threads running the
+                blocking operations.
+        """
+        self._manager = manager if manager is not None else Manager.instance()
+        """Wrapped manager."""
+
+        self._executor = ThreadPoolExecutor(max_workers)
+        """Pool of threads running the blocking operations."""
+
+        self._poller = NotificationPoller()
+        """Poller receiving the notifications of the streaming nodes."""
+
+        self._nodes = {}
+        """Dictionary that maps nodes to their facades."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the dictionary of facades."""
+
+    async def __aenter__(self):
+        """Enter the runtime context of the manager.
+
+        Returns:
+            :class:`blue_st_sdk.aio.AsyncManager`: This manager.
+        """
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Exit the runtime context of the manager, closing it."""
+        await self.close()
+
+    async def _run(self, function, *args):
+        """Run a blocking function on the pool of threads.
+
+        Args:
+            function (function): The function.
+            *args: Arguments of the function.
+
+        Returns:
+            The value returned by the function.
+        """
+        return await asyncio.get_event_loop().run_in_executor(
+            self._executor, functools.partial(function, *args))
+
+    def _wrap(self, node):
+        """Get the facade of a node, creating it if needed.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            :class:`blue_st_sdk.aio.AsyncNode`: The facade of the node.
+        """
+        with self._lock:
+            async_node = self._nodes.get(node)
+            if async_node is None:
+                async_node = AsyncNode(self, node)
+                self._nodes[node] = async_node
+            return async_node
+
+    def get_manager(self):
+        """Get the wrapped manager.
+
+        Returns:
+            :class:`blue_st_sdk.manager.Manager`: The wrapped manager.
+        """
+        return self._manager
+
+    async def discover(self, timeout_s=0, show_warnings=False,
+        scan_filter=None):
+        """Perform the discovery process.
+
+        Args:
+            timeout_s (int, optional): Time in seconds to wait before stopping
+                the discovery process, a default timeout if not given.
+            show_warnings (bool, optional): If True shows warnings, if any, when
+                discovering devices not respecting the BlueSTSDK's advertising
+                data format, nothing otherwise.
+            scan_filter (:class:`blue_st_sdk.scan_filter.ScanFilter`, optional):
+                Filter the devices discovered have to pass, all the BlueST
+                devices if not given.
+
+        Returns:
+            list: The discovered nodes (list of
+            :class:`blue_st_sdk.aio.AsyncNode` objects).
+
+        Raises:
+            'BTLEException' is raised if the discovery can not be performed.
+        """
+        await self._run(self._manager.discover, show_warnings, timeout_s,
+            scan_filter)
+        return self.get_nodes()
+
+    def get_nodes(self):
+        """Get the discovered nodes.
+
+        Returns:
+            list: The discovered nodes (list of
+            :class:`blue_st_sdk.aio.AsyncNode` objects).
+        """
+        return [self._wrap(node) for node in self._manager.get_nodes()[:]]
+
+    def get_node_with_tag(self, tag):
+        """Get the node with the given tag.
+
+        Args:
+            tag (str): Unique string identifier that identifies a node.
+
+        Returns:
+            :class:`blue_st_sdk.aio.AsyncNode`: The node with the given tag,
+            None if not found.
+        """
+        node = self._manager.get_node_with_tag(tag)
+        return self._wrap(node) if node is not None else None
+
+    async def close(self):
+        """Stop receiving notifications and release the threads."""
+        self._poller.close()
+        await asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(self._executor.shutdown, True))
+
+
+class AsyncNode(object):
+    """asyncio facade of the :class:`blue_st_sdk.node.Node` class."""
+
+    def __init__(self, async_manager, node):
+        """Constructor.
+
+        Args:
+            async_manager (:class:`blue_st_sdk.aio.AsyncManager`): Manager the
+                node belongs to.
+            node (:class:`blue_st_sdk.node.Node`): The node to wrap.
+        """
+        self._async_manager = async_manager
+        """Manager the node belongs to."""
+
+        self._node = node
+        """Wrapped node."""
+
+        self._io_lock = threading.RLock()
+        """Lock serializing the blocking operations on the node, as bluepy's
+        peripherals are not thread safe."""
+
+        self._features = {}
+        """Dictionary that maps features to their facades."""
+
+        self._stream_counts = {}
+        """Dictionary that maps features to the number of their streams."""
+
+        self._streams = []
+        """Listeners of the active streams."""
+
+        self._logger = logging.getLogger('BlueSTSDK')
+
+    def _locked(self, function, *args):
+        """Call a function while holding the lock of the node.
+
+        Args:
+            function (function): The function.
+            *args: Arguments of the function.
+
+        Returns:
+            The value returned by the function.
+        """
+        with self._io_lock:
+            return function(*args)
+
+    async def _run(self, function, *args):
+        """Run a blocking function on the pool of threads, while holding the
+        lock of the node.
+
+        Args:
+            function (function): The function.
+            *args: Arguments of the function.
+
+        Returns:
+            The value returned by the function.
+        """
+        return await self._async_manager._run(self._locked, function, *args)
+
+    def get_node(self):
+        """Get the wrapped node.
+
+        Returns:
+            :class:`blue_st_sdk.node.Node`: The wrapped node.
+        """
+        return self._node
+
+    def get_tag(self):
+        """Get the tag of the node.
+
+        Returns:
+            str: The MAC address of the node.
+        """
+        return self._node.get_tag()
+
+    def get_name(self):
+        """Get the name of the node.
+
+        Returns:
+            str: The name of the node.
+        """
+        return self._node.get_name()
+
+    def is_connected(self):
+        """Check whether the node is connected.
+
+        Returns:
+            bool: True if the node is connected, False otherwise.
+        """
+        return self._node.is_connected()
+
+    async def connect(self, user_defined_features=None):
+        """Open a connection to the node.
+
+        Args:
+            user_defined_features (dict, optional): User-defined feature to be
+                added.
+
+        Returns:
+            bool: True if the node is connected, False otherwise.
+
+        Raises:
+            'BTLEException' is raised if the connection fails.
+        """
+        await self._run(self._node.connect, user_defined_features)
+        return self._node.is_connected()
+
+    async def disconnect(self):
+        """Close the connection to the node."""
+        self._async_manager._poller.remove_node(self)
+        await self._run(self._node.disconnect)
+
+    def _wrap(self, feature):
+        """Get the facade of a feature, creating it if needed.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): The feature.
+
+        Returns:
+            :class:`blue_st_sdk.aio.AsyncFeature`: The facade of the feature.
+        """
+        async_feature = self._features.get(feature)
+        if async_feature is None:
+            async_feature = AsyncFeature(self, feature)
+            self._features[feature] = async_feature
+        return async_feature
+
+    def get_features(self, feature_class=None):
+        """Get the list of features.
+
+        Args:
+            feature_class (class, optional): Type (class name) of the feature to
+                search for.
+
+        Returns:
+            list: A list of :class:`blue_st_sdk.aio.AsyncFeature` objects.
+        """
+        return [self._wrap(feature)
+            for feature in self._node.get_features(feature_class)]
+
+    def get_feature(self, feature_class):
+        """Get a feature of the given type (class name).
+
+        Args:
+            feature_class (class): Type (class name) of the feature to search
+                for.
+
+        Returns:
+            :class:`blue_st_sdk.aio.AsyncFeature`: The feature of the given type
+            if exported by this node, "None" otherwise.
+        """
+        feature = self._node.get_feature(feature_class)
+        return self._wrap(feature) if feature is not None else None
+
+    async def _start_stream(self, feature, listener):
+        """Start streaming a feature.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): The feature.
+            listener (:class:`blue_st_sdk.aio._StreamListener`): Listener of
+                the stream.
+
+        Returns:
+            bool: True if the notifications of the feature are enabled, False
+            otherwise.
+        """
+        count = self._stream_counts.get(feature, 0)
+        self._stream_counts[feature] = count + 1
+        self._streams.append(listener)
+        feature.add_listener(listener)
+        if count == 0 and not \
+            await self._run(self._node.enable_notifications, feature):
+            return False
+        self._async_manager._poller.add_node(self)
+        self._async_manager._poller.start()
+        return True
+
+    async def _stop_stream(self, feature, listener):
+        """Stop streaming a feature.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): The feature.
+            listener (:class:`blue_st_sdk.aio._StreamListener`): Listener of
+                the stream.
+        """
+        feature.remove_listener(listener)
+        if listener in self._streams:
+            self._streams.remove(listener)
+        count = self._stream_counts.get(feature, 1) - 1
+        if count > 0:
+            self._stream_counts[feature] = count
+            return
+        self._stream_counts.pop(feature, None)
+        if not self._stream_counts:
+            self._async_manager._poller.remove_node(self)
+        if self._node.is_connected():
+            try:
+                await self._run(self._node.disable_notifications, feature)
+            except BTLEException as e:
+                self._logger.warning(str(e))
+
+    def fileno(self):
+        """Get the file descriptor through which the notifications of the node
+        are received.
+
+        Returns:
+            int: The file descriptor, "None" if the node is not connected.
+        """
+        return self._node.fileno()
+
+    def wait_for_notifications(self, timeout_s):
+        """Wait for the notifications of the node, delivering them to the
+        streams.
+
+        To be called by the poller's thread.
+
+        Args:
+            timeout_s (float): Time in seconds to wait.
+
+        Returns:
+            bool: True if a notification is received before the timeout elapses,
+            False otherwise.
+
+        Raises:
+            'BTLEException' is raised if the connection is lost; the streams of
+            the node are terminated with the same exception.
+        """
+        try:
+            with self._io_lock:
+                return self._node.wait_for_notifications(timeout_s)
+        except BTLEException as e:
+            for listener in list(self._streams):
+                listener.fail(e)
+            raise e
+
+
+class AsyncFeature(object):
+    """asyncio facade of the :class:`blue_st_sdk.feature.Feature` class."""
+
+    def __init__(self, async_node, feature):
+        """Constructor.
+
+        Args:
+            async_node (:class:`blue_st_sdk.aio.AsyncNode`): Node the feature
+                belongs to.
+            feature (:class:`blue_st_sdk.feature.Feature`): The feature to wrap.
+        """
+        self._async_node = async_node
+        """Node the feature belongs to."""
+
+        self._feature = feature
+        """Wrapped feature."""
+
+    def get_feature(self):
+        """Get the wrapped feature.
+
+        Returns:
+            :class:`blue_st_sdk.feature.Feature`: The wrapped feature.
+        """
+        return self._feature
+
+    def get_name(self):
+        """Get the name of the feature.
+
+        Returns:
+            str: The name of the feature.
+        """
+        return self._feature.get_name()
+
+    def _read(self):
+        """Read the feature synchronously.
+
+        Returns:
+            :class:`blue_st_sdk.feature.Sample`: The sample read.
+        """
+        self._feature._read_data()
+        return self._feature._get_sample()
+
+    async def read(self):
+        """Read the feature.
+
+        Returns:
+            :class:`blue_st_sdk.feature.Sample`: The sample read.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidOperationException`
+                is raised if the feature is not enabled or not readable.
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidDataException`
+                if the data read are not valid.
+        """
+        return await self._async_node._run(self._read)
+
+    async def stream(self, queue_size=STREAM_QUEUE_SIZE_DEFAULT):
+        """Stream the samples notified by the feature.
+
+        Notifications are enabled when the iteration starts and disabled when
+        it ends, unless other streams of the same feature are active.
+
+        Args:
+            queue_size (int, optional): Maximum number of samples buffered;
+                when the consumer is slower than the feature, the oldest samples
+                are dropped.
+
+        Yields:
+            :class:`blue_st_sdk.feature.Sample`: The samples notified.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidOperationException`
+                is raised if notifications can not be enabled for the feature.
+            'BTLEException' is raised if the connection is lost.
+        """
+        listener = _StreamListener(asyncio.get_event_loop(), queue_size)
+        try:
+            if not await self._async_node._start_stream(
+                self._feature, listener):
+                raise InvalidOperationException(
+                    ' The "' + self._feature.get_name()
+                    + '" feature can not be notified.')
+            while True:
+                item = await listener.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            await self._async_node._stop_stream(self._feature, listener)
+
+
+class _StreamListener(FeatureListener):
+    """Feature listener that hands the samples over to an event loop."""
+
+    def __init__(self, loop, queue_size):
+        """Constructor.
+
+        Args:
+            loop (AbstractEventLoop): Event loop of the consumer.
+            queue_size (int): Maximum number of samples buffered.
+        """
+        self._loop = loop
+        """Event loop of the consumer."""
+
+        self._queue = asyncio.Queue(queue_size)
+        """Queue of the samples."""
+
+        self.dropped = 0
+        """Number of samples dropped because the queue was full."""
+
+    def _put(self, item):
+        """Put an item in the queue, dropping the oldest one if full.
+
+        To be called on the event loop.
+
+        Args:
+            item: A sample or an exception.
+        """
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    def on_update(self, feature, sample):
+        """To be called whenever the feature updates its data.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature that has
+                updated.
+            sample (:class:`blue_st_sdk.feature.Sample`): Data extracted from
+                the feature.
+        """
+        self._loop.call_soon_threadsafe(self._put, sample)
+
+    def fail(self, exception):
+        """Terminate the stream with an exception.
+
+        Args:
+            exception (Exception): The exception.
+        """
+        self._loop.call_soon_threadsafe(self._put, exception)
+
+    async def get(self):
+        """Get the next item.
+
+        Returns:
+            A sample or an exception.
+        """
+        return await self._queue.get()
@@ -0,0 +1,468 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""connection_pool
+
+The connection_pool module contains a pool that schedules the connections to
+the nodes within the limits of the Bluetooth adapters.
+
+Adapters support a limited number of simultaneous connection attempts and of
+simultaneous links: the pool queues the connection requests by priority, runs
+as many of them in parallel as each adapter allows, keeps the links open once
+released so that they can be reused, and closes the least recently used idle
+links when an adapter runs out of links. New links are placed on the least
+loaded of the adapters configured through
+:meth:`blue_st_sdk.manager.Manager.set_adapters()` with room for them.
+"""
+
+
+# IMPORT
+
+import bisect
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from blue_st_sdk.utils.blue_st_exceptions import InvalidOperationException
+
+
+# DEFINITIONS
+
+MAX_CONNECTING_DEFAULT = 1
+"""Default maximum number of simultaneous connection attempts per adapter."""
+
+MAX_LINKS_DEFAULT = 7
+"""Default maximum number of simultaneous links per adapter."""
+
+WORKERS_DEFAULT = 4
+"""Default number of threads performing the connections."""
+
+
+# CLASSES
+
+class ConnectionPool(object):
+    """Pool scheduling the connections to the nodes.
+
+    Nodes are connected through :meth:`connect()`, which returns a future, and
+    given back through :meth:`release()` once the application is done with
+    them: their links stay open, to be reused by later requests, until the
+    adapter needs room for other links or until :meth:`disconnect()` is called.
+    """
+
+    def __init__(self, max_connecting=MAX_CONNECTING_DEFAULT,
+        max_links=MAX_LINKS_DEFAULT, workers=WORKERS_DEFAULT):
+        """Constructor.
+
+        Args:
+            max_connecting (int, optional): Maximum number of simultaneous
+                connection attempts per adapter.
+            max_links (int, optional): Maximum number of simultaneous links per
+                adapter.
+            workers (int, optional): Number of threads performing the
+                connections, i.e. the maximum number of simultaneous connection
+                attempts over all the adapters.
+        """
+        self._max_connecting = max_connecting
+        """Maximum number of simultaneous connection attempts per adapter."""
+
+        self._max_links = max_links
+        """Maximum number of simultaneous links per adapter."""
+
+        self._requests = []
+        """Pending connection requests, sorted by priority."""
+
+        self._pending = {}
+        """Dictionary that maps nodes to their pending connection request."""
+
+        self._adapters = {}
+        """Dictionary that maps adapters to their
+        :class:`blue_st_sdk.connection_pool._Adapter` object."""
+
+        self._sequence = itertools.count()
+        """Sequence numbers, to keep requests of equal priority in order."""
+
+        self._condition = threading.Condition()
+        """Condition protecting the state of the pool and signalling its
+        changes."""
+
+        self._closed = False
+        """Whether the pool has been closed."""
+
+        self._connections = 0
+        """Number of connections established."""
+
+        self._reuses = 0
+        """Number of requests served by links already open."""
+
+        self._evictions = 0
+        """Number of idle links closed to make room for others."""
+
+        self._failures = 0
+        """Number of failed connection attempts."""
+
+        self._workers = []
+        """Threads performing the connections."""
+        for i in range(0, workers):
+            worker = threading.Thread(target=self._run)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+        self._logger = logging.getLogger('BlueSTSDK')
+
+    @classmethod
+    def _get_iface(self, node):
+        """Get the adapter of a node.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            int: The index of the adapter.
+        """
+        return node.get_iface()
+
+    @classmethod
+    def _get_manager(self):
+        """Get the manager placing the links on the adapters.
+
+        Returns:
+            :class:`blue_st_sdk.manager.Manager`: The manager.
+        """
+        # Imported here as the manager module depends on this one.
+        from blue_st_sdk.manager import Manager
+        return Manager.instance()
+
+    def _get_adapter(self, iface):
+        """Get the state of an adapter. To be called while holding the lock.
+
+        Args:
+            iface (int): The index of the adapter.
+
+        Returns:
+            :class:`blue_st_sdk.connection_pool._Adapter`: The state of the
+            adapter.
+        """
+        adapter = self._adapters.get(iface)
+        if adapter is None:
+            adapter = _Adapter()
+            self._adapters[iface] = adapter
+        return adapter
+
+    def connect(self, node, priority=0, user_defined_features=None):
+        """Request the connection to a node.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+            priority (int, optional): Priority of the request; requests with
+                higher priority are served first.
+            user_defined_features (dict, optional): User-defined feature to be
+                added, as for :meth:`blue_st_sdk.node.Node.connect()`.
+
+        Returns:
+            :class:`concurrent.futures.Future`: A future whose result is the
+            node once connected, or whose exception is the reason of the
+            failure. The node must be given back through :meth:`release()` once
+            done with it.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidOperationException`
+                is raised if the pool has been closed.
+        """
+        with self._condition:
+            if self._closed:
+                raise InvalidOperationException(
+                    ' The connection pool has been closed.')
+            request = self._pending.get(node)
+            if request is not None:
+                return request.future
+            adapter = self._get_adapter(self._get_iface(node))
+            if node in adapter.links and node.is_connected():
+                # Reusing the open link.
+                adapter.links[node] = True
+                self._touch(adapter, node)
+                self._reuses += 1
+                future = Future()
+                future.set_result(node)
+                return future
+            request = _ConnectionRequest(node, priority, next(self._sequence),
+                user_defined_features)
+            bisect.insort(self._requests, request)
+            self._pending[node] = request
+            self._condition.notify_all()
+            return request.future
+
+    @classmethod
+    def _touch(self, adapter, node):
+        """Make a link the most recently used of its adapter.
+
+        Args:
+            adapter (:class:`blue_st_sdk.connection_pool._Adapter`): The
+                adapter.
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        in_use = adapter.links.pop(node)
+        adapter.links[node] = in_use
+
+    def release(self, node):
+        """Give back a node obtained through :meth:`connect()`.
+
+        Its link stays open, to be reused or closed when the adapter needs room.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with self._condition:
+            adapter = self._get_adapter(self._get_iface(node))
+            if node in adapter.links:
+                adapter.links[node] = False
+                self._touch(adapter, node)
+                self._condition.notify_all()
+
+    def disconnect(self, node):
+        """Close the link to a node, removing it from the pool.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with self._condition:
+            adapter = self._get_adapter(self._get_iface(node))
+            adapter.links.pop(node, None)
+            self._condition.notify_all()
+        node.disconnect()
+
+    def _next_request(self):
+        """Get the first request that can be served within the limits of its
+        adapter, together with the idle link to close to make room for it, if
+        any. To be called while holding the lock.
+
+        Returns:
+            tuple: The request and the node whose link has to be closed, if
+            any; "(None, None)" if no request can be served.
+        """
+        manager = self._get_manager()
+        for (i, request) in enumerate(self._requests):
+            for iface in manager._get_adapters_by_load(request.node):
+                evicted = self._reserve(self._get_adapter(iface))
+                if evicted is not False:
+                    break
+            else:
+                continue
+            del self._requests[i]
+            del self._pending[request.node]
+            request.iface = manager._acquire_adapter(request.node, iface)
+            return (request, evicted)
+        return (None, None)
+
+    def _reserve(self, adapter):
+        """Reserve a connection attempt on an adapter, within its limits. To be
+        called while holding the lock.
+
+        Args:
+            adapter (:class:`blue_st_sdk.connection_pool._Adapter`): The
+                adapter.
+
+        Returns:
+            :class:`blue_st_sdk.node.Node`: The node whose link has to be closed
+            to make room, "None" if none, "False" if the adapter has no room.
+        """
+        # Forgetting the links lost meanwhile.
+        for node in [node for node in adapter.links
+            if not node.is_connected()]:
+            del adapter.links[node]
+        if adapter.connecting >= self._max_connecting:
+            return False
+        evicted = None
+        if adapter.connecting + len(adapter.links) >= self._max_links:
+            # Closing the least recently used idle link.
+            idle = [node for (node, in_use) in adapter.links.items()
+                if not in_use]
+            if not idle:
+                return False
+            evicted = idle[0]
+            del adapter.links[evicted]
+            self._evictions += 1
+        adapter.connecting += 1
+        return evicted
+
+    def _run(self):
+        """Body of the threads performing the connections."""
+        while True:
+            with self._condition:
+                (request, evicted) = self._next_request()
+                while request is None:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                    (request, evicted) = self._next_request()
+            self._serve(request, evicted)
+
+    def _serve(self, request, evicted):
+        """Serve a connection request.
+
+        Args:
+            request (:class:`blue_st_sdk.connection_pool._ConnectionRequest`):
+                The request.
+            evicted (:class:`blue_st_sdk.node.Node`): The node whose link has to
+                be closed first, if any.
+        """
+        node = request.node
+        adapter = None
+        error = None
+        try:
+            if evicted is not None:
+                evicted.disconnect()
+            if not request.future.set_running_or_notify_cancel():
+                self._get_manager()._release_adapter(node)
+                return
+            node.connect(request.user_defined_features)
+            if not node.is_connected():
+                raise InvalidOperationException(
+                    ' The connection to the node has failed.')
+        except Exception as e:
+            error = e
+        finally:
+            with self._condition:
+                adapter = self._get_adapter(request.iface)
+                adapter.connecting -= 1
+                if error is None and request.future.running():
+                    adapter.links[node] = True
+                    self._connections += 1
+                elif error is not None:
+                    self._failures += 1
+                self._condition.notify_all()
+        if error is not None:
+            self._logger.warning('Connection to node %s failed: %s'
+                % (node.get_tag(), str(error)))
+            request.future.set_exception(error)
+        elif request.future.running():
+            request.future.set_result(node)
+
+    def get_statistics(self):
+        """Get the statistics of the pool.
+
+        Returns:
+            dict: A dictionary with the number of pending requests ("pending"),
+            of connection attempts in progress ("connecting"), of open links
+            ("links") and of idle ones ("idle"), of connections established
+            ("connections"), of requests served by links already open
+            ("reuses"), of idle links closed to make room for others
+            ("evictions"), and of failed connection attempts ("failures").
+        """
+        with self._condition:
+            adapters = list(self._adapters.values())
+            return {
+                'pending': len(self._requests),
+                'connecting': sum(adapter.connecting for adapter in adapters),
+                'links': sum(len(adapter.links) for adapter in adapters),
+                'idle': sum(len([in_use for in_use in adapter.links.values()
+                    if not in_use]) for adapter in adapters),
+                'connections': self._connections,
+                'reuses': self._reuses,
+                'evictions': self._evictions,
+                'failures': self._failures
+            }
+
+    def close(self):
+        """Cancel the pending requests and close all the links of the pool."""
+        with self._condition:
+            self._closed = True
+            requests = self._requests
+            self._requests = []
+            self._pending = {}
+            self._condition.notify_all()
+        for request in requests:
+            request.future.cancel()
+        for worker in self._workers:
+            if worker is not threading.current_thread():
+                worker.join()
+        with self._condition:
+            nodes = [node for adapter in self._adapters.values()
+                for node in adapter.links]
+            self._adapters = {}
+        for node in nodes:
+            node.disconnect()
+
+
+class _Adapter(object):
+    """State of an adapter within a
+    :class:`blue_st_sdk.connection_pool.ConnectionPool`."""
+
+    def __init__(self):
+        """Constructor."""
+        self.connecting = 0
+        """Number of connection attempts in progress."""
+
+        self.links = OrderedDict()
+        """Dictionary that maps the nodes with an open link to whether they are
+        in use, from the least to the most recently used."""
+
+
+class _ConnectionRequest(object):
+    """Pending connection request of a
+    :class:`blue_st_sdk.connection_pool.ConnectionPool`."""
+
+    def __init__(self, node, priority, sequence, user_defined_features):
+        """Constructor.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+            priority (int): Priority of the request.
+            sequence (int): Sequence number of the request.
+            user_defined_features (dict): User-defined feature to be added.
+        """
+        self.node = node
+        """The node."""
+
+        self.user_defined_features = user_defined_features
+        """User-defined feature to be added."""
+
+        self.future = Future()
+        """Future completed once the request is served."""
+
+        self.iface = None
+        """Index of the adapter the request is served through, once
+        scheduled."""
+
+        self._key = (-priority, sequence)
+        """Sort key: higher priorities first, then older requests first."""
+
+    def __lt__(self, other):
+        """Compare two requests by priority and age.
+
+        Args:
+            other (:class:`blue_st_sdk.connection_pool._ConnectionRequest`):
+                The other request.
+
+        Returns:
+            bool: True if this request has to be served before the other one.
+        """
+        return self._key < other._key
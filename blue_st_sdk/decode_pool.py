@@ -0,0 +1,683 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""decode_pool
+
+The decode_pool module contains a pool of worker processes that decode the
+notifications of the nodes on behalf of the receiving process, so that decoding
+many nodes is not bound to a single core by the Global Interpreter Lock.
+
+The raw notifications of each node are shipped in batches to the worker the node
+is assigned to (by hashing its tag) through a
+:class:`blue_st_sdk.utils.shared_ring_buffer.SharedRingBuffer`; the worker runs
+the decoders of the features and sends the decoded samples back in batches
+through another ring buffer, and the receiving process dispatches them to the
+listeners of the features. Since all the notifications of a node are decoded by
+the same worker and delivered by a single thread, their order is preserved.
+
+Workers build the decoders from the feature classes alone, as
+"feature_class(None)": the characteristics with a feature whose class cannot be
+built that way (e.g. a user-defined feature taking other arguments) are decoded
+by the receiving process. Features whose decoding depends on state set by the
+application (e.g. the synchronization parameters of the ADPCM audio) are decoded
+with the state of the worker process; they should rather be left to the
+receiving process.
+"""
+
+
+# IMPORT
+
+from datetime import datetime
+import importlib
+import marshal
+import multiprocessing
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+from blue_st_sdk.feature import Sample
+from blue_st_sdk.utils.ble_node_definitions import TIMESTAMP_OFFSET_BYTES
+from blue_st_sdk.utils.blue_st_exceptions import InvalidDataException
+from blue_st_sdk.utils.shared_ring_buffer import SharedRingBuffer
+
+
+# DEFINITIONS
+
+BATCH_SIZE_DEFAULT = 64
+"""Default maximum number of notifications of a batch."""
+
+MAX_DELAY_ms_DEFAULT = 5
+"""Default maximum time in milliseconds a notification waits before being
+shipped to a worker."""
+
+SLOT_SIZE_DEFAULT = 65536
+"""Default size in bytes of the slots of the ring buffers."""
+
+SLOT_COUNT_DEFAULT = 64
+"""Default number of slots of the ring buffers."""
+
+_WAIT_TIMEOUT_s = 0.1
+"""Time in seconds workers and collector wait before checking whether they have
+to stop."""
+
+_RECORD = struct.Struct('<BIHqdH')
+"""Header of a record sent to a worker: type, node identifier, characteristic's
+handle, timestamp, reception time in seconds since the epoch (zero if unknown),
+length of the payload."""
+
+_RECORD_DATA = 0
+"""Record carrying a notification."""
+
+_RECORD_REGISTER = 1
+"""Record carrying the feature classes of a characteristic."""
+
+_RECORD_UNREGISTER = 2
+"""Record removing a node."""
+
+_MARSHAL = b'm'
+"""Prefix of the messages serialized with "marshal"."""
+
+_PICKLE = b'p'
+"""Prefix of the messages serialized with "pickle"."""
+
+
+# FUNCTIONS
+
+def _dumps(results):
+    """Serialize a list of results, with "marshal" if possible.
+
+    Args:
+        results (list): The results.
+
+    Returns:
+        bytes: The serialized results.
+    """
+    try:
+        return _MARSHAL + marshal.dumps(results)
+    except ValueError:
+        return _PICKLE + pickle.dumps(results, pickle.HIGHEST_PROTOCOL)
+
+def _loads(message):
+    """Deserialize a list of results.
+
+    Args:
+        message (bytes): The serialized results.
+
+    Returns:
+        list: The results.
+    """
+    if message[:1] == _MARSHAL:
+        return marshal.loads(message[1:])
+    return pickle.loads(message[1:])
+
+def _load_class(path):
+    """Load a class given its path.
+
+    Args:
+        path (str): Path of the class, in the "module:class" form.
+
+    Returns:
+        class: The class.
+    """
+    (module, name) = path.split(':')
+    return getattr(importlib.import_module(module), name)
+
+def _get_class_path(feature_class):
+    """Get the path a worker process loads a feature class from.
+
+    Args:
+        feature_class (class): The feature class.
+
+    Returns:
+        str: The path of the class, in the "module:class" form, None if the
+        class cannot be loaded back from its path or built with a "None" node,
+        as workers do.
+    """
+    path = feature_class.__module__ + ':' + feature_class.__name__
+    try:
+        if _load_class(path) is not feature_class:
+            return None
+        feature_class(None)
+    except Exception:
+        return None
+    return path
+
+def _put(ring, message, stop_event):
+    """Write a message to a ring buffer, waiting for room if needed.
+
+    Args:
+        ring (:class:`blue_st_sdk.utils.shared_ring_buffer.SharedRingBuffer`):
+            The ring buffer.
+        message (bytes): The message.
+        stop_event (Event): Event interrupting the wait.
+    """
+    while not ring.put(message):
+        if stop_event.is_set():
+            return
+        time.sleep(0.0005)
+
+def _send_results(ring, results, ready, stop_event):
+    """Send decoded results, split in as many messages as needed.
+
+    Args:
+        ring (:class:`blue_st_sdk.utils.shared_ring_buffer.SharedRingBuffer`):
+            The output ring buffer.
+        results (list): The results.
+        ready (Semaphore): Semaphore signalling the results.
+        stop_event (Event): Event interrupting the wait for room.
+    """
+    if not results:
+        return
+    message = _dumps(results)
+    if len(message) > ring.get_max_message_size() and len(results) > 1:
+        half = len(results) // 2
+        _send_results(ring, results[:half], ready, stop_event)
+        _send_results(ring, results[half:], ready, stop_event)
+        return
+    _put(ring, message, stop_event)
+    ready.release()
+
+def _worker_main(input_name, output_name, input_ready, output_ready,
+    stop_event):
+    """Body of a worker process.
+
+    Args:
+        input_name (str): Name of the ring buffer of the notifications.
+        output_name (str): Name of the ring buffer of the results.
+        input_ready (Semaphore): Semaphore signalling new notifications.
+        output_ready (Semaphore): Semaphore signalling new results.
+        stop_event (Event): Event stopping the worker.
+    """
+    input_ring = SharedRingBuffer(input_name, create=False)
+    output_ring = SharedRingBuffer(output_name, create=False)
+    decoders = {}
+    try:
+        while not stop_event.is_set():
+            input_ready.acquire(True, _WAIT_TIMEOUT_s)
+            for batch in input_ring.get_all():
+                results = []
+                offset = 0
+                while offset < len(batch):
+                    (record_type, node_id, handle, timestamp, receive_time,
+                        length) = _RECORD.unpack_from(batch, offset)
+                    offset += _RECORD.size
+                    payload = batch[offset:offset + length]
+                    offset += length
+                    if record_type == _RECORD_DATA:
+                        results.append(_decode(decoders.get((node_id, handle)),
+                            node_id, handle, timestamp, receive_time, payload))
+                    elif record_type == _RECORD_REGISTER:
+                        decoders[(node_id, handle)] = \
+                            [_load_class(path)(None)
+                            for path in marshal.loads(payload)]
+                    elif record_type == _RECORD_UNREGISTER:
+                        for key in [key for key in decoders
+                            if key[0] == node_id]:
+                            del decoders[key]
+                _send_results(output_ring, results, output_ready, stop_event)
+    finally:
+        input_ring.close()
+        output_ring.close()
+
+def _decode(features, node_id, handle, timestamp, receive_time, payload):
+    """Decode a notification, as
+    :meth:`blue_st_sdk.node.Node._update_features()` does.
+
+    Args:
+        features (list): Decoders of the characteristic.
+        node_id (int): Identifier of the node.
+        handle (int): Characteristic's handle.
+        timestamp (int): Unwrapped timestamp.
+        receive_time (float): Reception time in seconds since the epoch, zero
+            if unknown.
+        payload (bytes): Raw data of the notification.
+
+    Returns:
+        tuple: The identifier of the node, the characteristic's handle, the raw
+        data, the reception time, and the list of (data, timestamp, read bytes)
+        tuples of the features, or the error message.
+    """
+    if features is None:
+        return (node_id, handle, payload, receive_time,
+            'Unknown characteristic.')
+    decoded = []
+    offset = TIMESTAMP_OFFSET_BYTES
+    try:
+        for feature in features:
+            extracted_data = feature.extract_data(timestamp, payload, offset)
+            sample = extracted_data.get_sample()
+            read_bytes = extracted_data.get_read_bytes()
+            decoded.append((sample._data, sample._timestamp, read_bytes))
+            offset += read_bytes
+    except InvalidDataException as e:
+        return (node_id, handle, payload, receive_time, str(e))
+    return (node_id, handle, payload, receive_time, decoded)
+
+
+# CLASSES
+
+class DecodePool(object):
+    """Pool of worker processes decoding the notifications of the nodes.
+
+    Nodes are added to the pool once connected; from then on, their
+    notifications are decoded by the workers, while reads requested by the
+    application are still decoded synchronously.
+    """
+
+    def __init__(self, processes=None, batch_size=BATCH_SIZE_DEFAULT,
+        max_delay_ms=MAX_DELAY_ms_DEFAULT, slot_size=SLOT_SIZE_DEFAULT,
+        slot_count=SLOT_COUNT_DEFAULT, drop_when_full=False):
+        """Constructor.
+
+        Args:
+            processes (int, optional): Number of worker processes, the number of
+                cores if not given.
+            batch_size (int, optional): Maximum number of notifications of a
+                batch.
+            max_delay_ms (int, optional): Maximum time in milliseconds a
+                notification waits before being shipped to a worker.
+            slot_size (int, optional): Size in bytes of the slots of the ring
+                buffers.
+            slot_count (int, optional): Number of slots of the ring buffers.
+            drop_when_full (bool, optional): If True the notifications are
+                dropped when a worker is not keeping up, otherwise the receiving
+                thread waits for the worker.
+        """
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        self._batch_size = batch_size
+        """Maximum number of notifications of a batch."""
+
+        self._max_delay_s = max_delay_ms / 1000.0
+        """Maximum time in seconds a notification waits before being shipped."""
+
+        self._stop_event = multiprocessing.Event()
+        """Event stopping the workers."""
+
+        self._output_ready = multiprocessing.Semaphore(0)
+        """Semaphore signalling new results from any worker."""
+
+        self._shards = []
+        """Shards, one for each worker."""
+
+        for i in range(0, processes):
+            self._shards.append(_Shard(slot_size, slot_count, drop_when_full,
+                self._output_ready, self._stop_event))
+
+        self._nodes = {}
+        """Dictionary that maps node identifiers to nodes."""
+
+        self._node_ids = {}
+        """Dictionary that maps nodes to their identifiers."""
+
+        self._node_handles = {}
+        """Dictionary that maps node identifiers to the handles of the
+        characteristics decoded by the workers."""
+
+        self._next_node_id = 0
+        """Identifier of the next node added."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the dictionaries of nodes."""
+
+        self._submitted = 0
+        """Number of notifications submitted."""
+
+        self._decoded = 0
+        """Number of notifications decoded and dispatched."""
+
+        self._errors = 0
+        """Number of notifications whose decoding failed."""
+
+        self._stopped = threading.Event()
+        """Event stopping the threads of the pool."""
+
+        self._collector = threading.Thread(target=self._collect)
+        """Thread dispatching the decoded samples."""
+        self._collector.daemon = True
+        self._collector.start()
+
+        self._flusher = threading.Thread(target=self._flush_periodically)
+        """Thread shipping the incomplete batches."""
+        self._flusher.daemon = True
+        self._flusher.start()
+
+    def _get_shard(self, node):
+        """Get the shard a node is assigned to.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            :class:`blue_st_sdk.decode_pool._Shard`: The shard of the node.
+        """
+        key = zlib.crc32(node.get_tag().encode('utf-8')) & 0xFFFFFFFF
+        return self._shards[key % len(self._shards)]
+
+    def add_node(self, node):
+        """Decode the notifications of a node through the pool.
+
+        To be called once the node is connected. The characteristics with a
+        feature that workers cannot build are still decoded by the receiving
+        thread.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with self._lock:
+            if node in self._node_ids:
+                return
+            node_id = self._next_node_id
+            self._next_node_id += 1
+            self._nodes[node_id] = node
+            self._node_ids[node] = node_id
+        shard = self._get_shard(node)
+        handles = set()
+        for (handle, features) in \
+            node._update_char_handle_to_features_dict.items():
+            paths = [_get_class_path(feature.__class__)
+                for feature in features]
+            if None in paths:
+                continue
+            shard.add(_RECORD_REGISTER, node_id, handle, 0,
+                marshal.dumps(paths))
+            handles.add(handle)
+        shard.flush()
+        with self._lock:
+            self._node_handles[node_id] = frozenset(handles)
+        node._decode_pool = self
+
+    def remove_node(self, node):
+        """Decode the notifications of a node on the receiving thread again.
+
+        The notifications of the node still being decoded are dropped.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with self._lock:
+            node_id = self._node_ids.pop(node, None)
+            self._node_handles.pop(node_id, None)
+            self._nodes.pop(node_id, None)
+        if node_id is None:
+            return
+        node._decode_pool = None
+        shard = self._get_shard(node)
+        shard.add(_RECORD_UNREGISTER, node_id, 0, 0, b'')
+        shard.flush()
+
+    def submit(self, node, char_handle, timestamp, data, receive_time=None):
+        """Submit a notification to be decoded.
+
+        To be called by the node receiving the notification.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+            char_handle (int): The characteristic's handle.
+            timestamp (int): The unwrapped timestamp.
+            data (str): The raw data.
+            receive_time (float, optional): Reception time of the data in
+                seconds since the epoch, if known; it becomes the notification
+                time of the decoded samples.
+
+        Returns:
+            bool: True if the notification has been submitted, False if it has
+            to be decoded by the caller.
+        """
+        node_id = self._node_ids.get(node)
+        if node_id is None \
+            or char_handle not in self._node_handles.get(node_id, ()):
+            return False
+        self._submitted += 1
+        shard = self._get_shard(node)
+        if shard.add(_RECORD_DATA, node_id, char_handle, timestamp, data,
+            receive_time) >= self._batch_size:
+            shard.flush()
+        return True
+
+    def flush(self):
+        """Ship the incomplete batches to the workers."""
+        for shard in self._shards:
+            shard.flush()
+
+    def _flush_periodically(self):
+        """Body of the thread shipping the incomplete batches."""
+        while not self._stopped.wait(self._max_delay_s):
+            self.flush()
+
+    def _collect(self):
+        """Body of the thread dispatching the decoded samples."""
+        while True:
+            self._output_ready.acquire(True, _WAIT_TIMEOUT_s)
+            pending = False
+            for shard in self._shards:
+                for message in shard.get_results():
+                    pending = True
+                    for result in _loads(message):
+                        self._dispatch(*result)
+            if self._stopped.is_set() and not pending:
+                return
+
+    def _dispatch(self, node_id, handle, payload, receive_time, decoded):
+        """Update the features of a node with a decoded notification.
+
+        Args:
+            node_id (int): Identifier of the node.
+            handle (int): Characteristic's handle.
+            payload (bytes): Raw data of the notification.
+            receive_time (float): Reception time in seconds since the epoch,
+                zero if unknown.
+            decoded (list or str): List of (data, timestamp, read bytes)
+                tuples of the features, or the error message.
+        """
+        node = self._nodes.get(node_id)
+        if node is None:
+            return
+        if not isinstance(decoded, list):
+            self._errors += 1
+            return
+        features = node._get_corresponding_features(handle)
+        if features is None:
+            return
+        offset = TIMESTAMP_OFFSET_BYTES
+        notification_time = datetime.fromtimestamp(receive_time) \
+            if receive_time else None
+        for (feature, (data, timestamp, read_bytes)) in zip(features, decoded):
+            sample = Sample(data, feature.get_fields_description(), timestamp)
+            if notification_time is not None:
+                sample._notification_time = notification_time
+            feature.update_from_sample(sample,
+                payload[offset:offset + read_bytes], True)
+            offset += read_bytes
+        self._decoded += 1
+
+    def get_statistics(self):
+        """Get the statistics of the pool.
+
+        Returns:
+            dict: A dictionary with the number of notifications submitted
+            ("submitted"), dropped because a worker was not keeping up and the
+            pool has been configured to do so ("dropped"), decoded and
+            dispatched ("decoded"), whose decoding failed ("errors"), and the
+            number of batches shipped ("batches").
+        """
+        return {
+            'submitted': self._submitted,
+            'dropped': sum(shard._dropped for shard in self._shards),
+            'decoded': self._decoded,
+            'errors': self._errors,
+            'batches': sum(shard._batches for shard in self._shards)
+        }
+
+    def close(self):
+        """Dispatch the pending notifications and stop the workers."""
+        self.flush()
+        self._stopped.set()
+        self._flusher.join()
+        self._collector.join()
+        for node in list(self._node_ids.keys()):
+            self.remove_node(node)
+        self._stop_event.set()
+        for shard in self._shards:
+            shard.close()
+
+
+class _Shard(object):
+    """Worker process of a :class:`blue_st_sdk.decode_pool.DecodePool`, with
+    its ring buffers."""
+
+    def __init__(self, slot_size, slot_count, drop_when_full, output_ready,
+        stop_event):
+        """Constructor.
+
+        Args:
+            slot_size (int): Size in bytes of the slots of the ring buffers.
+            slot_count (int): Number of slots of the ring buffers.
+            drop_when_full (bool): Whether to drop the notifications when the
+                worker is not keeping up.
+            output_ready (Semaphore): Semaphore signalling new results.
+            stop_event (Event): Event stopping the worker.
+        """
+        self._input_ring = SharedRingBuffer(
+            slot_size=slot_size, slot_count=slot_count)
+        """Ring buffer of the notifications."""
+
+        self._output_ring = SharedRingBuffer(
+            slot_size=slot_size, slot_count=slot_count)
+        """Ring buffer of the results."""
+
+        self._input_ready = multiprocessing.Semaphore(0)
+        """Semaphore signalling new notifications."""
+
+        self._drop_when_full = drop_when_full
+        """Whether to drop the notifications when the worker is not keeping
+        up."""
+
+        self._records = []
+        """Records of the batch being built."""
+
+        self._size = 0
+        """Size in bytes of the batch being built."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the batch being built and the input ring buffer."""
+
+        self._dropped = 0
+        """Number of notifications dropped because the worker was not keeping
+        up."""
+
+        self._batches = 0
+        """Number of batches shipped."""
+
+        self._process = multiprocessing.Process(target=_worker_main, args=(
+            self._input_ring.get_name(), self._output_ring.get_name(),
+            self._input_ready, output_ready, stop_event))
+        """Worker process."""
+        self._process.daemon = True
+        self._process.start()
+
+    def add(self, record_type, node_id, handle, timestamp, payload,
+        receive_time=None):
+        """Add a record to the batch being built.
+
+        Args:
+            record_type (int): Type of the record.
+            node_id (int): Identifier of the node.
+            handle (int): Characteristic's handle.
+            timestamp (int): Timestamp.
+            payload (bytes): Payload of the record.
+            receive_time (float, optional): Reception time in seconds since the
+                epoch, if known.
+
+        Returns:
+            int: The number of records of the batch being built.
+        """
+        record = _RECORD.pack(record_type, node_id, handle, timestamp,
+            receive_time or 0.0, len(payload)) + payload
+        with self._lock:
+            if self._size + len(record) > \
+                self._input_ring.get_max_message_size():
+                self._flush()
+            self._records.append(record)
+            self._size += len(record)
+            return len(self._records)
+
+    def flush(self):
+        """Ship the batch being built to the worker."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        """Ship the batch being built to the worker.
+
+        To be called while holding the lock. Control records are always waited
+        for, while notifications are dropped if the worker is not keeping up and
+        the shard has been configured to do so.
+        """
+        if not self._records:
+            return
+        batch = b''.join(self._records)
+        if not self._drop_when_full:
+            while not self._input_ring.put(batch):
+                time.sleep(0.0005)
+        elif not self._input_ring.put(batch):
+            data_records = [record for record in self._records
+                if bytearray(record[0:1])[0] == _RECORD_DATA]
+            self._dropped += len(data_records)
+            control = b''.join(record for record in self._records
+                if bytearray(record[0:1])[0] != _RECORD_DATA)
+            if not control:
+                self._records = []
+                self._size = 0
+                return
+            batch = control
+            while not self._input_ring.put(batch):
+                time.sleep(0.0005)
+        self._records = []
+        self._size = 0
+        self._batches += 1
+        self._input_ready.release()
+
+    def get_results(self):
+        """Get the results sent by the worker.
+
+        Returns:
+            list: The messages sent by the worker.
+        """
+        return self._output_ring.get_all()
+
+    def close(self):
+        """Stop the worker and release the ring buffers."""
+        self._input_ready.release()
+        self._process.join()
+        self._input_ring.close()
+        self._output_ring.close()
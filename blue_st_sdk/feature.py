@@ -38,11 +38,15 @@ device.
 from abc import ABCMeta
 from abc import abstractmethod
 from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from datetime import datetime
+import threading
 
 from blue_st_sdk.python_utils import lock
 from blue_st_sdk.utils.blue_st_exceptions import InvalidOperationException
 from blue_st_sdk.utils.blue_st_exceptions import InvalidDataException
+from blue_st_sdk.utils.sample_history import SampleHistory
+from blue_st_sdk.utils.sample_history import SampleBlock
 
 
 # CLASSES
@@ -60,6 +64,21 @@ class Feature(object):
     _NUMBER_OF_THREADS = 5
     """Number of threads to be used to notify the listeners."""
 
+    BATCH_SIZE_DEFAULT = 50
+    """Default number of samples delivered to a batch listener at a time."""
+
+    BATCH_MAX_DELAY_ms_DEFAULT = 500
+    """Default maximum time in milliseconds a sample waits before being
+    delivered to a batch listener."""
+
+    _STATELESS_DECODING = True
+    """Tells whether decoding the data of the feature does not depend on the
+    previous data, so that they can be decoded on demand or memoized."""
+
+    _DECODE_CACHE_SIZE = 16
+    """Number of decoded payloads memoized when the decode cache is enabled
+    without giving its size. The decode cache is disabled by default."""
+
     def __init__(self, name, node, description):
         """Constructor.
 
@@ -100,12 +119,57 @@ class Feature(object):
         It is a thread safe list, so a listener can subscribe itself through a
         callback."""
 
+        self._batchers = []
+        """List of objects that collect samples into blocks for the batch
+        listeners. It is replaced rather than changed, so that notifying the
+        samples can iterate over it without locking."""
+
+        self._batchers_lock = threading.Lock()
+        """Lock serializing the changes of the list of batch listeners."""
+
         self._last_update = None
         """Local time of the last update."""
 
         self._last_sample = None
         """Last data received from the node."""
 
+        self._history = None
+        """History of the samples received from the node, None if disabled."""
+
+        self._lazy_decoding = False
+        """Tells whether the data are decoded on demand while the feature has no
+        consumers."""
+
+        self._raw_update = None
+        """(timestamp, data, offset, notification time) tuple of the last data
+        received and not decoded yet, None if the last sample is up to date."""
+
+        self._update_lock = threading.Lock()
+        """Lock protecting the handoff of the last sample and of the data not
+        decoded yet between the notifying thread and the readers."""
+
+        self._length_to_read_bytes_dic = {}
+        """Dictionary that maps the lengths of the data available to the number
+        of bytes read by the feature, learnt by decoding."""
+
+        self._decode_cache = None
+        """Least recently used cache that maps payloads (without timestamp) to
+        (data, description) tuples of the decoded samples, None if disabled.
+        Data are stored as tuples, so that changing the data of a sample does
+        not change the cache."""
+
+        self._decode_cache_lock = threading.Lock()
+        """Lock protecting the decode cache."""
+
+        self._decode_cache_size = 0
+        """Maximum number of payloads memoized."""
+
+        self._decode_cache_hits = 0
+        """Number of payloads found in the decode cache."""
+
+        self._decode_cache_misses = 0
+        """Number of payloads decoded while the decode cache was enabled."""
+
         self._characteristic = None
         """Reference to the characteristic that offers the feature.
         Note: By design, it is the characteristic that offers more features
@@ -135,6 +199,57 @@ class Feature(object):
                 if listener in self._listeners:
                     self._listeners.remove(listener)
 
+    def add_batch_listener(self, listener, batch_size=BATCH_SIZE_DEFAULT,
+        max_delay_ms=BATCH_MAX_DELAY_ms_DEFAULT):
+        """Add a batch listener.
+
+        The listener receives the notified samples in blocks, every
+        *batch_size* samples or every *max_delay_ms* milliseconds after the
+        first sample of a block, whichever comes first. Blocks are delivered in
+        order by a dedicated thread, and can be used alongside the
+        :class:`blue_st_sdk.feature.FeatureListener` objects.
+
+        Args:
+            listener (:class:`blue_st_sdk.feature.FeatureBatchListener`):
+                Listener to be added.
+            batch_size (int, optional): Maximum number of samples of a block.
+            max_delay_ms (int, optional): Maximum time in milliseconds a sample
+                waits before being delivered. Zero or None to deliver blocks
+                only when they are full.
+
+        Raises:
+            :exc:`ValueError` if the batch size is not positive.
+        """
+        if listener is not None:
+            if batch_size <= 0:
+                raise ValueError('The batch size must be positive.')
+            with self._batchers_lock:
+                for batcher in self._batchers:
+                    if batcher.get_listener() == listener:
+                        return
+                self._batchers = self._batchers + [_SampleBatcher(
+                    self, listener, batch_size, max_delay_ms)]
+
+    def remove_batch_listener(self, listener):
+        """Remove a batch listener.
+
+        The samples collected so far are delivered to the listener before
+        removing it.
+
+        Args:
+            listener (:class:`blue_st_sdk.feature.FeatureBatchListener`):
+                Listener to be removed.
+        """
+        if listener is not None:
+            with self._batchers_lock:
+                batchers = [batcher for batcher in self._batchers
+                    if batcher.get_listener() != listener]
+                removed = [batcher for batcher in self._batchers
+                    if batcher.get_listener() == listener]
+                self._batchers = batchers
+            for batcher in removed:
+                batcher.close()
+
     def add_logger(self, logger):
         """Add a logger.
         
@@ -159,6 +274,44 @@ class Feature(object):
                 if logger in self._loggers:
                     self._loggers.remove(logger)
 
+    def enable_history(self, capacity, use_numpy=None):
+        """Keep a fixed-capacity, columnar history of the samples received.
+
+        Features that do not enable the history do not pay any cost for it.
+
+        Args:
+            capacity (int): Maximum number of samples kept.
+            use_numpy (bool, optional): True to store the history in NumPy
+                arrays, False to use the "array" module. By default NumPy is
+                used if available.
+
+        Returns:
+            :class:`blue_st_sdk.utils.sample_history.SampleHistory`: The
+            history of the feature.
+
+        Raises:
+            :exc:`ValueError` if the capacity is not positive.
+            :exc:`ImportError` if NumPy is required but not available.
+        """
+        history = SampleHistory(self._description, capacity, use_numpy)
+        with lock(self):
+            self._history = history
+        return history
+
+    def disable_history(self):
+        """Stop keeping the history of the samples received, and release it."""
+        with lock(self):
+            self._history = None
+
+    def get_history(self):
+        """Get the history of the samples received.
+
+        Returns:
+            :class:`blue_st_sdk.utils.sample_history.SampleHistory`: The
+            history of the feature, None if not enabled.
+        """
+        return self._history
+
     def get_last_update(self):
         """Get the time of the last update.
 
@@ -216,10 +369,165 @@ class Feature(object):
             :class:`blue_st_sdk.feature.Sample`: The last sample received, None
             if missing.
         """
-        if self._last_sample is not None:
-            return Sample.from_sample(self._last_sample)
+        sample = self._get_last_sample()
+        if sample is not None:
+            return Sample.from_sample(sample)
         return None
 
+    def _get_last_sample(self):
+        """Get the last sample received from the device, decoding it if needed.
+
+        Returns:
+            :class:`blue_st_sdk.feature.Sample`: The last sample received, None
+            if missing.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidDataException`
+                if the data array has not enough data to read.
+        """
+        with self._update_lock:
+            raw_update = self._raw_update
+            if raw_update is not None:
+                (timestamp, data, offset, notification_time) = raw_update
+                self._raw_update = None
+                sample = self.extract_data(timestamp, data, offset) \
+                    .get_sample()
+                sample._notification_time = notification_time
+                self._last_sample = sample
+            return self._last_sample
+
+    def set_lazy_decoding(self, flag):
+        """Set the lazy decoding status of the feature.
+
+        While lazy decoding is enabled and the feature has no listeners, batch
+        listeners, loggers, nor history, the data received are stored raw and
+        decoded only when the application asks for the last sample (e.g.
+        through a "read_*()" method or :meth:`__str__()`).
+
+        Features whose decoding depends on the previous data (e.g. ADPCM audio)
+        are always decoded.
+
+        Args:
+            flag (bool): New lazy decoding status: True to enable, False
+                otherwise.
+        """
+        self._lazy_decoding = flag and self._STATELESS_DECODING
+        if not self._lazy_decoding:
+            self._get_last_sample()
+
+    def is_lazy_decoding(self):
+        """Checking whether lazy decoding is enabled.
+
+        Returns:
+            bool: True if lazy decoding is enabled, False otherwise.
+        """
+        return self._lazy_decoding
+
+    def _has_consumers(self):
+        """Checking whether the samples of the feature are consumed as soon as
+        received.
+
+        Returns:
+            bool: True if the feature has listeners, batch listeners, loggers,
+            or history, False otherwise.
+        """
+        return bool(self._listeners or self._batchers or self._loggers) \
+            or self._history is not None
+
+    def set_decode_cache_size(self, size=None):
+        """Set the size of the decode cache of the feature.
+
+        Features sending the same payloads over and over (e.g. switches, or
+        slow environmental sensors) can memoize the values decoded from the
+        most recent payloads: a payload found in the cache is not decoded again,
+        and the new sample gets a copy of the values of the cached one with the
+        new timestamp. The cache is disabled until this method is called.
+
+        Features whose decoding depends on the previous data (e.g. ADPCM audio)
+        are never memoized.
+
+        Args:
+            size (int, optional): Maximum number of payloads memoized, 0 to
+                disable the cache. If not given, the size suited to the feature
+                is used.
+        """
+        if size is None:
+            size = self._DECODE_CACHE_SIZE
+        with self._decode_cache_lock:
+            if size > 0 and self._STATELESS_DECODING:
+                cache = OrderedDict()
+                if self._decode_cache is not None:
+                    for key in list(self._decode_cache.keys())[-size:]:
+                        cache[key] = self._decode_cache[key]
+                self._decode_cache = cache
+                self._decode_cache_size = size
+            else:
+                self._decode_cache = None
+                self._decode_cache_size = 0
+
+    def get_decode_cache_statistics(self):
+        """Get the statistics of the decode cache of the feature.
+
+        Returns:
+            dict: A dictionary with the maximum number of payloads memoized
+            ("size"), the number of payloads currently memoized ("entries"), the
+            number of payloads found in the cache ("hits") and decoded ("misses")
+            while the cache was enabled, and the ratio of hits ("hit_rate").
+        """
+        cache = self._decode_cache
+        lookups = self._decode_cache_hits + self._decode_cache_misses
+        return {
+            'size': self._decode_cache_size,
+            'entries': len(cache) if cache is not None else 0,
+            'hits': self._decode_cache_hits,
+            'misses': self._decode_cache_misses,
+            'hit_rate': float(self._decode_cache_hits) / lookups \
+                if lookups > 0 else 0.0
+        }
+
+    def _lookup_decode_cache(self, timestamp, data, offset):
+        """Look up the decode cache for the payload of the feature.
+
+        Args:
+            timestamp (int): Package's timestamp.
+            data (list): Feature's data.
+            offset (int): Offset position to start reading data.
+
+        Returns:
+            tuple: A (sample, read bytes) tuple if the payload is memoized,
+            "None" otherwise.
+        """
+        read_bytes = self._length_to_read_bytes_dic.get(len(data) - offset)
+        with self._decode_cache_lock:
+            cache = self._decode_cache
+            if cache is None:
+                return None
+            if read_bytes is not None:
+                entry = cache.pop(data[offset:offset + read_bytes], None)
+                if entry is not None:
+                    cache[data[offset:offset + read_bytes]] = entry
+                    self._decode_cache_hits += 1
+                    return (Sample(list(entry[0]), entry[1], timestamp),
+                        read_bytes)
+            self._decode_cache_misses += 1
+            return None
+
+    def _store_decode_cache(self, payload, sample):
+        """Memoize the sample decoded from a payload.
+
+        Args:
+            payload (str): The payload of the feature, without timestamp.
+            sample (:class:`blue_st_sdk.feature.Sample`): The decoded sample.
+        """
+        entry = (tuple(sample._data), sample._description)
+        with self._decode_cache_lock:
+            cache = self._decode_cache
+            if cache is None:
+                return
+            cache[payload] = entry
+            while len(cache) > self._decode_cache_size:
+                cache.popitem(False)
+
     def set_enable(self, flag):
         """Set the enable status of the feature.
 
@@ -272,6 +580,10 @@ class Feature(object):
         for listener in self._listeners:
             # Calling user-defined callback.
             self._thread_pool.submit(listener.on_update(self, sample))
+        for batcher in self._batchers:
+            # Collecting the sample for the batch listeners; batchers removed
+            # meanwhile ignore it.
+            batcher.add(sample)
 
     def _log_update(self, raw_data, sample):
         """Notify each :class:`blue_st_sdk.feature.FeatureLogger` that the
@@ -291,7 +603,8 @@ class Feature(object):
             # Calling user-defined callback.
             self._thread_pool.submit(logger.log_update(self, raw_data, sample))
 
-    def update(self, timestamp, data, offset, notify_update=False):
+    def update(self, timestamp, data, offset, notify_update=False,
+        receive_time=None):
         """Update feature's internal data through an atomic operation, and
         notify the registered listeners about the update, if needed.
 
@@ -307,6 +620,9 @@ class Feature(object):
             offset (int): Offset position to start reading data.
             notify_update (bool, optional): If True all the registered listeners
                 are notified about the new data.
+            receive_time (float, optional): Reception time of the data in
+                seconds since the epoch, if known; it becomes the notification
+                time of the sample.
 
         Returns:
             int: The number of bytes read.
@@ -315,24 +631,74 @@ class Feature(object):
             :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidDataException`
                 if the data array has not enough data to read.
         """
+        # Storing the raw data without decoding them if nobody consumes them
+        # and the number of bytes to read is known.
+        if self._lazy_decoding and not self._has_consumers():
+            read_bytes = self._length_to_read_bytes_dic.get(len(data) - offset)
+            if read_bytes is not None:
+                now = datetime.now()
+                with self._update_lock:
+                    self._raw_update = (timestamp, data, offset,
+                        datetime.fromtimestamp(receive_time) \
+                        if receive_time is not None else now)
+                    self._last_update = now
+                return read_bytes
+
+        # Reusing the values decoded from the same payload, if memoized.
+        if self._decode_cache is not None:
+            memoized = self._lookup_decode_cache(timestamp, data, offset)
+            if memoized is not None:
+                (sample, read_bytes) = memoized
+                if receive_time is not None:
+                    sample._notification_time = \
+                        datetime.fromtimestamp(receive_time)
+                self.update_from_sample(sample,
+                    data[offset:offset + read_bytes], notify_update)
+                return read_bytes
+
         # Update the feature's internal data
-        sample = None
         with lock(self):
             try:
                 extracted_data = self.extract_data(timestamp, data, offset)
             except InvalidDataException as e:
                 raise e
-            sample = self._last_sample = extracted_data.get_sample()
-            read_bytes = extracted_data.get_read_bytes()
+        read_bytes = extracted_data.get_read_bytes()
+        sample = extracted_data.get_sample()
+        if receive_time is not None:
+            sample._notification_time = datetime.fromtimestamp(receive_time)
+        if self._lazy_decoding or self._decode_cache is not None:
+            self._length_to_read_bytes_dic[len(data) - offset] = read_bytes
+            self._store_decode_cache(data[offset:offset + read_bytes], sample)
+        self.update_from_sample(sample, data[offset:offset + read_bytes],
+            notify_update)
+        return read_bytes
+
+    def update_from_sample(self, sample, raw_data=None, notify_update=False):
+        """Update feature's internal data with a sample already extracted from
+        the raw data, e.g. by a worker process, and notify the registered
+        listeners about the update, if needed.
+
+        This method has to be called by the SDK, not by the application.
+
+        Args:
+            sample (:class:`blue_st_sdk.feature.Sample`): Sample data.
+            raw_data (str, optional): Raw data the sample has been extracted
+                from, passed on to the loggers.
+            notify_update (bool, optional): If True all the registered listeners
+                are notified about the new data.
+        """
+        with self._update_lock:
+            self._last_sample = sample
+            self._raw_update = None
             self._last_update = datetime.now()
+            if self._history is not None:
+                self._history.append(sample._timestamp, sample._data)
         if notify_update:
             # Notify all the registered listeners about the new data.
             self._notify_update(sample)
 
         # Log the new data through all the registered loggers.
-        self._log_update(data[offset:offset + read_bytes], sample)
-
-        return read_bytes
+        self._log_update(raw_data, sample)
 
     @classmethod
     def has_valid_index(self, sample, index):
@@ -419,7 +785,7 @@ class Feature(object):
             str: A string representing the last sample.
         """
         with lock(self):
-            sample = self._last_sample
+            sample = self._get_last_sample()
 
         if sample is None:
             return self._name + ': Unknown'
@@ -479,6 +845,29 @@ class FeatureListener(object):
             'You must implement "on_update()" to use the "FeatureListener" class.')
 
 
+class FeatureBatchListener(object):
+    """Interface used by the :class:`blue_st_sdk.feature.Feature` class to
+    notify blocks of samples of a feature.
+    """
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def on_batch_update(self, feature, block):
+        """To be called whenever a block of samples is ready.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature that has
+                updated.
+            block (:class:`blue_st_sdk.utils.sample_history.SampleBlock`):
+                Block of samples, oldest first. Columns are lists.
+
+        Raises:
+            :exc:`NotImplementedError` if the method has not been implemented.
+        """
+        raise NotImplementedError('You must implement "on_batch_update()" to '
+            'use the "FeatureBatchListener" class.')
+
+
 class FeatureLogger(object):
     """Interface used by the :class:`blue_st_sdk.feature.Feature` class to
     log changes of a feature's data.
@@ -503,6 +892,128 @@ class FeatureLogger(object):
             'You must implement "log_update()" to use the "FeatureLogger" class.')
 
 
+class _SampleBatcher(object):
+    """Class that collects the samples of a feature into columnar blocks and
+    delivers them to a batch listener.
+
+    Blocks are delivered in order by a single-thread pool.
+    """
+
+    def __init__(self, feature, listener, batch_size, max_delay_ms):
+        """Constructor.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature whose
+                samples are collected.
+            listener (:class:`blue_st_sdk.feature.FeatureBatchListener`):
+                Listener to be notified.
+            batch_size (int): Maximum number of samples of a block.
+            max_delay_ms (int): Maximum time in milliseconds a sample waits
+                before being delivered, zero or None to wait indefinitely.
+        """
+        self._feature = feature
+        """Feature whose samples are collected."""
+
+        self._listener = listener
+        """Listener to be notified."""
+
+        self._batch_size = batch_size
+        """Maximum number of samples of a block."""
+
+        self._max_delay_s = max_delay_ms / 1000.0 if max_delay_ms else None
+        """Maximum time in seconds a sample waits before being delivered."""
+
+        self._thread_pool = ThreadPoolExecutor(1)
+        """Single-thread pool used to deliver the blocks in order."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the block under construction."""
+
+        self._timer = None
+        """Timer that delivers an incomplete block."""
+
+        self._closed = False
+        """Tells whether the batcher has been closed."""
+
+        self._reset()
+
+    def _reset(self):
+        """Start a new block."""
+        self._timestamps = []
+        self._columns = [[] for field in self._feature.get_fields_description()]
+
+    def _deliver(self):
+        """Deliver the current block, if not empty, and start a new one.
+
+        To be called while holding the lock, so that blocks are submitted in
+        order.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._timestamps:
+            return
+        block = SampleBlock(
+            self._feature.get_fields_description(),
+            self._timestamps,
+            self._columns)
+        self._reset()
+        self._thread_pool.submit(
+            self._listener.on_batch_update, self._feature, block)
+
+    def _on_timeout(self):
+        """Deliver an incomplete block when the maximum delay expires."""
+        with self._lock:
+            if not self._closed:
+                self._deliver()
+
+    def get_listener(self):
+        """Get the listener to be notified.
+
+        Returns:
+            :class:`blue_st_sdk.feature.FeatureBatchListener`: The listener to
+            be notified.
+        """
+        return self._listener
+
+    def add(self, sample):
+        """Add a sample to the current block.
+
+        Samples added after closing the batcher are ignored.
+
+        Args:
+            sample (:class:`blue_st_sdk.feature.Sample`): Sample to add.
+        """
+        data = sample._data
+        # Samples whose data do not map one-to-one onto the fields (e.g. audio
+        # packets) are stored as a whole into the only field available.
+        if len(self._feature.get_fields_description()) == 1 and len(data) > 1:
+            data = [data]
+        with self._lock:
+            if self._closed:
+                return
+            columns = self._columns
+            self._timestamps.append(sample._timestamp)
+            for i in range(0, len(columns)):
+                columns[i].append(data[i] if i < len(data) else None)
+            if len(self._timestamps) >= self._batch_size:
+                self._deliver()
+            elif self._timer is None and self._max_delay_s is not None:
+                self._timer = threading.Timer(
+                    self._max_delay_s, self._on_timeout)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def close(self):
+        """Deliver the samples collected so far and release the resources."""
+        with self._lock:
+            if self._closed:
+                return
+            self._deliver()
+            self._closed = True
+        self._thread_pool.shutdown(wait=False)
+
+
 class ExtractedData(object):
     """Class used to return the data and the number of bytes read after
     extracting data with the :meth:`blue_st_sdk.feature.Feature.extract_data()`
@@ -42,6 +42,9 @@ class DeviceTimestampFeature(Feature):
     for more information.
     """
 
+    # Decoding depends on the clock.
+    _STATELESS_DECODING = False
+
     def __init__(self, name, node, description):
         """Constructor.
         
@@ -92,6 +92,9 @@ class FeatureActivityRecognition(Feature):
     # This can be "2" in case there is even the algorithm type, "1" otherwise.
     DATA_LENGTH_BYTES = 1
 
+    # Decoding depends on the clock.
+    _STATELESS_DECODING = False
+
     def __init__(self, node):
         """Constructor.
 
@@ -202,7 +205,7 @@ class FeatureActivityRecognition(Feature):
             str: A string representing the last sample.
         """
         with lock(self):
-            sample = self._last_sample
+            sample = self._get_last_sample()
 
         if sample is None:
             return self._name + ': Unknown'
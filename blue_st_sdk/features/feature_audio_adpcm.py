@@ -58,6 +58,9 @@ class FeatureAudioADPCM(Feature):
         DATA_MIN)
     DATA_LENGTH_BYTES = 20
     AUDIO_PACKAGE_SIZE = 40
+
+    # Decoding depends on the previous data.
+    _STATELESS_DECODING = False
     
     bvSyncManager = None
     engineADPCM = None
@@ -64,6 +64,9 @@ class FeatureAudioADPCMSync(Feature):
         DATA_MAX,
         DATA_MIN)
     DATA_LENGTH_BYTES = 6
+
+    # Decoding depends on the previous data.
+    _STATELESS_DECODING = False
     
     def __init__(self, node):
         """Constructor.
@@ -131,7 +131,7 @@ class FeatureAudioSceneClassification(Feature):
             str: A string representing the last sample.
         """
         with lock(self):
-            sample = self._last_sample
+            sample = self._get_last_sample()
 
         if sample is None:
             return self._name + ': Unknown'
@@ -60,6 +60,9 @@ class FeaturePressure(Feature):
     DATA_LENGTH_BYTES = 4
     SCALE_FACTOR = 100.0
 
+    # Pressure changes slowly.
+    _DECODE_CACHE_SIZE = 32
+
     def __init__(self, node):
         """Constructor.
 
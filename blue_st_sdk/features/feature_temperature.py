@@ -60,6 +60,9 @@ class FeatureTemperature(Feature):
     DATA_LENGTH_BYTES = 2
     SCALE_FACTOR = 10.0
 
+    # Temperature changes slowly.
+    _DECODE_CACHE_SIZE = 32
+
     def __init__(self, node):
         """Constructor.
 
@@ -0,0 +1,241 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""gatt_cache
+
+The gatt_cache module contains a persistent cache of the Generic Attribute
+Profile (GATT) database of the nodes, so that reconnecting to a known node does
+not require discovering all of its services and characteristics again.
+
+Each node is stored in a JSON file named after its MAC address, together with
+the advertised device identifier, feature mask, and protocol version: a node
+advertising different values (e.g. after a firmware update) is discovered
+again.
+"""
+
+
+# IMPORT
+
+import json
+import os
+import tempfile
+
+from bluepy.btle import BTLEException
+from bluepy.btle import Characteristic
+
+
+# DEFINITIONS
+
+_FORMAT_VERSION = 1
+"""Version of the format of the cache files."""
+
+_EXTENSION = '.json'
+"""Extension of the cache files."""
+
+
+# CLASSES
+
+class GattCache(object):
+    """Persistent cache of the GATT database of the nodes.
+
+    To be set through :meth:`blue_st_sdk.manager.Manager.set_gatt_cache()`, so
+    that :meth:`blue_st_sdk.node.Node.connect()` uses it.
+    """
+
+    def __init__(self, folder):
+        """Constructor.
+
+        Args:
+            folder (str): Folder where the cache files are stored, created if
+                it does not exist.
+        """
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        self._folder = folder
+        """Folder where the cache files are stored."""
+
+    def _get_path(self, node):
+        """Get the path of the cache file of a node.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            str: The path of the cache file of the node.
+        """
+        return os.path.join(self._folder,
+            node.get_tag().replace(':', '').lower() + _EXTENSION)
+
+    @classmethod
+    def _get_key(self, node):
+        """Get the advertised data a cache entry is valid for.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            dict: The device identifier, feature mask, and protocol version
+            advertised by the node.
+        """
+        return self.get_key(node._advertising_data)
+
+    @classmethod
+    def get_key(self, advertising_data):
+        """Get the key of the cache entries valid for the given advertising
+        data.
+
+        Args:
+            advertising_data
+                (:class:`blue_st_sdk.utils.ble_advertising_data_parser.BLEAdvertisingDataParser`):
+                The advertising data.
+
+        Returns:
+            dict: The device identifier, feature mask, and protocol version
+            advertised.
+        """
+        return {
+            'device_id': advertising_data.get_device_id(),
+            'feature_mask': advertising_data.get_feature_mask(),
+            'protocol_version': advertising_data.get_protocol_version()
+        }
+
+    def load(self, node):
+        """Get the services of a node from the cache.
+
+        The node must be connected, as the first and the last characteristics
+        are read back from it to validate the entry; an entry that does not
+        match the node is removed.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            list: A list of (service's UUID, list of characteristics) tuples,
+            where characteristics are bluepy's "Characteristic" objects, "None"
+            if the node is not in the cache or the entry is not valid.
+        """
+        path = self._get_path(node)
+        try:
+            with open(path, 'r') as cache_file:
+                entry = json.load(cache_file)
+            if entry.get('format') != _FORMAT_VERSION \
+                or entry.get('tag', '').lower() != node.get_tag().lower() \
+                or entry.get('key') != self._get_key(node):
+                return None
+            services = []
+            for service in entry['services']:
+                services.append((service['uuid'], [Characteristic(node,
+                    str(uuid), handle, properties, value_handle)
+                    for (uuid, handle, properties, value_handle)
+                    in service['characteristics']]))
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+        if not self._validate(node, services):
+            self.remove(node)
+            return None
+        return services
+
+    @classmethod
+    def _validate(self, node, services):
+        """Check the first and the last cached characteristics against the
+        node.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+            services (list): A list of (service's UUID, list of characteristics)
+                tuples.
+
+        Returns:
+            bool: True if the characteristics match, False otherwise.
+        """
+        characteristics = sorted([characteristic
+            for (uuid, service_characteristics) in services
+            for characteristic in service_characteristics],
+            key=lambda characteristic: characteristic.handle)
+        if not characteristics:
+            return False
+        for cached in set([characteristics[0], characteristics[-1]]):
+            try:
+                found = node.getCharacteristics(cached.handle, cached.handle)
+            except BTLEException:
+                return False
+            if len(found) != 1 or found[0].uuid != cached.uuid \
+                or found[0].valHandle != cached.valHandle \
+                or found[0].properties != cached.properties:
+                return False
+        return True
+
+    def store(self, node, services):
+        """Store the services of a node in the cache.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+            services (list): A list of (service's UUID, list of characteristics)
+                tuples, where characteristics are bluepy's "Characteristic"
+                objects.
+        """
+        entry = {
+            'format': _FORMAT_VERSION,
+            'tag': node.get_tag(),
+            'key': self._get_key(node),
+            'services': [{
+                'uuid': str(uuid),
+                'characteristics': [[str(characteristic.uuid),
+                    characteristic.handle, characteristic.properties,
+                    characteristic.valHandle]
+                    for characteristic in characteristics]
+            } for (uuid, characteristics) in services]
+        }
+        # Writing to a temporary file first, so that readers never see a
+        # partially written entry.
+        (fd, temporary_path) = tempfile.mkstemp(_EXTENSION, dir=self._folder)
+        with os.fdopen(fd, 'w') as cache_file:
+            json.dump(entry, cache_file)
+        os.rename(temporary_path, self._get_path(node))
+
+    def remove(self, node):
+        """Remove a node from the cache.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        try:
+            os.remove(self._get_path(node))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove all the nodes from the cache."""
+        for name in os.listdir(self._folder):
+            if name.endswith(_EXTENSION):
+                try:
+                    os.remove(os.path.join(self._folder, name))
+                except OSError:
+                    pass
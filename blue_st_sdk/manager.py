@@ -37,23 +37,260 @@ Bluetooth Low Energy (BLE) devices/nodes and allocating the needed resources.
 
 from abc import ABCMeta
 from abc import abstractmethod
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 import threading
 import logging
-from bluepy.btle import Scanner
+import time
 from bluepy.btle import DefaultDelegate
 from bluepy.btle import BTLEException
 
+from blue_st_sdk.connection_pool import ConnectionPool
+from blue_st_sdk.connection_pool import MAX_LINKS_DEFAULT
 from blue_st_sdk.node import Node
+from blue_st_sdk.node import NodeStatus
+from blue_st_sdk.transport import BluepyTransport
+from blue_st_sdk.utils.ble_advertising_data_parser import BLEAdvertisingDataParser
 from blue_st_sdk.utils.ble_node_definitions import FeatureCharacteristic
 from blue_st_sdk.utils.blue_st_exceptions import InvalidFeatureBitMaskException
 from blue_st_sdk.utils.blue_st_exceptions import InvalidBLEAdvertisingDataException
+from blue_st_sdk.utils.blue_st_exceptions import InvalidOperationException
 from blue_st_sdk.python_utils import lock
 from blue_st_sdk.python_utils import lock_for_object
 
 
 # CLASSES
 
+class DiscoveryRecord(object):
+    """Compact record of a device discovered by the
+    :class:`blue_st_sdk.manager.Manager`.
+
+    Discovering a device only parses its advertising data; the corresponding
+    :class:`blue_st_sdk.node.Node`, with its features and threads, is built on
+    first use through :meth:`get_node()`.
+    """
+
+    __slots__ = ('_tag', '_addr_type', '_advertising_data', '_rssi',
+        '_last_seen', '_scan_entry', '_ifaces', '_node')
+
+    def __init__(self, scan_entry, advertising_data=None, node=None):
+        """Constructor.
+
+        Args:
+            scan_entry (ScanEntry): BLE device. It contains device information
+                and advertising data. Refer to
+                `ScanEntry <https://ianharvey.github.io/bluepy-doc/scanentry.html>`_
+                for more information.
+            advertising_data
+                (:class:`blue_st_sdk.utils.ble_advertising_data_parser.BLEAdvertisingDataParser`,
+                optional): The advertising data already parsed, parsed from the
+                scan entry if not given.
+            node (:class:`blue_st_sdk.node.Node`, optional): The node, if
+                already built.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidBLEAdvertisingDataException`
+                is raised if the advertising data is not well formed.
+        """
+        if advertising_data is None:
+            advertising_data = BLEAdvertisingDataParser(
+                scan_entry.getScanData())
+
+        self._tag = scan_entry.addr
+        """Unique identifier of the device (MAC address)."""
+
+        self._addr_type = scan_entry.addrType
+        """Type of the address of the device."""
+
+        self._advertising_data = advertising_data
+        """Last advertising data received."""
+
+        self._rssi = scan_entry.rssi
+        """Received Signal Strength Indication of the last advertising data."""
+
+        self._last_seen = getattr(scan_entry, 'last_seen', None) or time.time()
+        """Time of the last advertising data, in seconds since the epoch."""
+
+        self._scan_entry = scan_entry
+        """Scan entry the node is built from."""
+
+        self._ifaces = frozenset([self.get_iface()])
+        """Indexes of the adapters which have received the device."""
+
+        self._node = node
+        """Node built from the record, None if not built yet."""
+
+    @classmethod
+    def from_node(self, node):
+        """Build the record of a node already built.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            :class:`blue_st_sdk.manager.DiscoveryRecord`: The record.
+        """
+        return DiscoveryRecord(node._device, node._advertising_data, node)
+
+    def get_tag(self):
+        """Get the tag of the device.
+
+        Returns:
+            str: The unique identifier of the device (MAC address).
+        """
+        return self._tag
+
+    def get_addr_type(self):
+        """Get the type of the address of the device.
+
+        Returns:
+            str: The type of the address ("public" or "random").
+        """
+        return self._addr_type
+
+    def get_advertising_data(self):
+        """Get the last advertising data received.
+
+        Returns:
+            :class:`blue_st_sdk.utils.ble_advertising_data_parser.BLEAdvertisingDataParser`:
+            The last advertising data received.
+        """
+        return self._advertising_data
+
+    def get_scan_data(self):
+        """Get the last advertising data received, not parsed.
+
+        Returns:
+            list: A list of (tag, description, value) tuples. Refer to
+            `ScanEntry <https://ianharvey.github.io/bluepy-doc/scanentry.html>`_
+            for more information.
+        """
+        return self._scan_entry.getScanData()
+
+    def get_name(self):
+        """Get the name of the device.
+
+        Returns:
+            str: The name of the device.
+        """
+        return self._advertising_data.get_name()
+
+    def get_type(self):
+        """Get the type of the device.
+
+        Returns:
+            :class:`blue_st_sdk.node.NodeType`: The type of the device.
+        """
+        return self._advertising_data.get_board_type()
+
+    def get_rssi(self):
+        """Get the RSSI of the last advertising data.
+
+        Returns:
+            int: The RSSI of the last advertising data.
+        """
+        return self._rssi
+
+    def get_iface(self):
+        """Get the adapter receiving the device best.
+
+        Returns:
+            int: The index of the adapter which has received the strongest
+            recent advertising data from the device.
+        """
+        return getattr(self._scan_entry, 'iface', 0)
+
+    def get_ifaces(self):
+        """Get the adapters receiving the device.
+
+        Returns:
+            frozenset: The indexes of the adapters which have received the
+            device.
+        """
+        return self._ifaces
+
+    def get_last_seen(self):
+        """Get the time of the last advertising data.
+
+        Returns:
+            float: The time of the last advertising data, in seconds since the
+            epoch.
+        """
+        return self._last_seen
+
+    def is_materialized(self):
+        """Check whether the node has been built.
+
+        Returns:
+            bool: True if the node has been built, False otherwise.
+        """
+        return self._node is not None
+
+    def get_node(self):
+        """Get the node of the device, building it if needed.
+
+        Returns:
+            :class:`blue_st_sdk.node.Node`: The node of the device.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidBLEAdvertisingDataException`
+                is raised if the advertising data is not well formed.
+        """
+        node = self._node
+        if node is None:
+            with lock_for_object(DiscoveryRecord):
+                node = self._node
+                if node is None:
+                    node = Manager.instance().get_transport().create_node(
+                        self._scan_entry)
+                    self._node = node
+        return node
+
+    def update(self, scan_entry, is_new_data):
+        """Update the record with a new advertising data.
+
+        When many adapters receive the device, the record follows the one
+        with the strongest signal.
+
+        Args:
+            scan_entry (ScanEntry): BLE device. Refer to
+                `ScanEntry <https://ianharvey.github.io/bluepy-doc/scanentry.html>`_
+                for more information.
+            is_new_data (bool): True if new or updated advertising data is
+                available, in which case it is parsed again.
+
+        Returns:
+            bool: True if the feature mask or the sleeping status advertised by
+            the device have changed, False otherwise.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidBLEAdvertisingDataException`
+                is raised if the advertising data is not well formed.
+        """
+        self._last_seen = time.time()
+        iface = getattr(scan_entry, 'iface', 0)
+        if iface not in self._ifaces:
+            self._ifaces = self._ifaces | frozenset([iface])
+        if iface == self.get_iface() or scan_entry.rssi > self._rssi:
+            self._rssi = scan_entry.rssi
+            self._scan_entry = scan_entry
+        is_changed = False
+        if is_new_data:
+            previous = self._advertising_data
+            self._advertising_data = BLEAdvertisingDataParser(
+                scan_entry.getScanData())
+            is_changed = self._advertising_data.get_feature_mask() \
+                != previous.get_feature_mask() \
+                or self._advertising_data.get_board_sleeping() \
+                != previous.get_board_sleeping()
+        node = self._node
+        if node is not None:
+            node.is_alive(scan_entry.rssi)
+            if is_new_data:
+                node._advertising_data = self._advertising_data
+        return is_changed
+
+
 class _ScannerDelegate(DefaultDelegate):
     """Delegate class to scan Bluetooth Low Energy devices."""
 
@@ -64,18 +301,28 @@ class _ScannerDelegate(DefaultDelegate):
     """Default Bluetooth scanning timeout in seconds for a single call to
     bluepy's process() method."""
 
-    def __init__(self, show_warnings=False):
+    def __init__(self, show_warnings=False, scan_filter=None,
+        scan_scheduler=None):
         """Constructor.
 
         Args:
             show_warnings (bool, optional): If True shows warnings, if any, when
                 discovering devices that do not respect the BlueSTSDK's
                 advertising data format, nothing otherwise.
+            scan_filter (:class:`blue_st_sdk.scan_filter.ScanFilter`, optional):
+                Filter the devices discovered have to pass, all the BlueST
+                devices if not given.
+            scan_scheduler
+                (:class:`blue_st_sdk.scan_scheduler.AdaptiveScanScheduler`,
+                optional): Scheduler to report the new devices and the changes
+                of their advertising data to, if any.
         """
         DefaultDelegate.__init__(self)
 
         self._logger = logging.getLogger('BlueSTSDK')
         self._show_warnings = show_warnings
+        self._scan_filter = scan_filter
+        self._scan_scheduler = scan_scheduler
 
 
     def handleDiscovery(self, scan_entry, is_new_device, is_new_data):
@@ -95,25 +342,34 @@ class _ScannerDelegate(DefaultDelegate):
             is_new_data (bool): True if new or updated advertising data is
                 available.
         """
+        # Discarding the devices not passing the filter, if any.
+        if self._scan_filter is not None \
+            and not self._scan_filter.matches(scan_entry):
+            return
+
         # Getting a Manager's instance.
         manager = Manager.instance()
-
-        # Getting device's address.
-        device_address = scan_entry.addr
+        manager._count_advertisement(getattr(scan_entry, 'iface', 0))
 
         try:
-            # If the node has already been added, skip adding it again, rather
-            # update it.
-            nodes = manager.get_nodes()[:]
-            for node in nodes:
-                if node.get_tag() == device_address:
-                    node.is_alive(scan_entry.rssi)
-                    node.update_advertising_data(scan_entry.getScanData())
-                    return
-
-            # Creating new node.
-            node = Node(scan_entry)
-            manager.add_node(node)
+            # If the device has already been discovered, skip adding it again,
+            # rather update it.
+            record = manager.get_discovery_record(scan_entry.addr)
+            if record is not None:
+                if record.update(scan_entry, is_new_data) \
+                    and self._scan_scheduler is not None:
+                    self._scan_scheduler.on_advertisement_change()
+                manager._store_record(record, is_new_data)
+                manager._on_record_seen(record)
+                return
+
+            # Recording the new device; the node is built on first use.
+            # Another adapter may have recorded it meanwhile.
+            if not manager._add_record(DiscoveryRecord(scan_entry)):
+                manager.get_discovery_record(scan_entry.addr).update(
+                    scan_entry, is_new_data)
+            elif self._scan_scheduler is not None:
+                self._scan_scheduler.on_discovery()
         except (BTLEException, InvalidBLEAdvertisingDataException) as e:
             if self._show_warnings:
                 self._logger.warning(str(e))
@@ -127,9 +383,13 @@ class _StoppableScanner(threading.Thread):
     It is implemented as a thread which checks regularly for the stop
     condition within the :meth:`run()` method; it can be stopped by calling the
     :meth:`stop()` method.
+
+    With a scan scheduler, the scanner pauses between the scanning windows for
+    the idle time chosen by the scheduler.
     """
 
-    def __init__(self, show_warnings=False, timeout_s=0, *args, **kwargs):
+    def __init__(self, show_warnings=False, timeout_s=0, scan_filter=None,
+        iface=0, scan_scheduler=None, drives_scheduler=True, *args, **kwargs):
         """Constructor.
 
         Args:
@@ -138,12 +398,28 @@ class _StoppableScanner(threading.Thread):
                 data format, nothing otherwise.
             timeout_s (int, optional): Time in seconds to wait before stopping
                 the discovery process.
+            scan_filter (:class:`blue_st_sdk.scan_filter.ScanFilter`, optional):
+                Filter the devices discovered have to pass, all the BlueST
+                devices if not given.
+            iface (int, optional): Index of the adapter to scan with.
+            scan_scheduler
+                (:class:`blue_st_sdk.scan_scheduler.AdaptiveScanScheduler`,
+                optional): Scheduler of the scanning windows, to scan
+                continuously if not given.
+            drives_scheduler (bool, optional): Whether this scanner reports the
+                end of the cycles to the scheduler; when many adapters share a
+                scheduler, only one of them does.
         """
         super(_StoppableScanner, self).__init__(*args, **kwargs)
         self._stop_called = threading.Event()
         self._process_done = threading.Event()
-        self._scanner = Scanner().withDelegate(_ScannerDelegate(show_warnings))
+        self._scanner = Manager.instance().get_transport().create_scanner(
+            iface).withDelegate(_ScannerDelegate(show_warnings, scan_filter,
+            scan_scheduler))
         self._timeout_s = timeout_s
+        self._scan_scheduler = scan_scheduler
+        self._drives_scheduler = drives_scheduler
+        self._paused = False
 
     def run(self):
         """Run the thread."""
@@ -155,10 +431,12 @@ class _StoppableScanner(threading.Thread):
             self._exc = None
             self._scanner.start(passive=False)
             elapsed_time_s = 0
+            window_time_s = 0
             while True:
                 #print('.')
                 self._scanner.process(_ScannerDelegate._SCANNING_TIME_PROCESS_s)
                 elapsed_time_s += _ScannerDelegate._SCANNING_TIME_PROCESS_s
+                window_time_s += _ScannerDelegate._SCANNING_TIME_PROCESS_s
                 if self._stop_called.isSet():
                     self._process_done.set()
                     break
@@ -166,6 +444,29 @@ class _StoppableScanner(threading.Thread):
                     self._process_done.set()
                     self.stop()
                     break
+                if self._scan_scheduler is None \
+                    or window_time_s < self._scan_scheduler.get_window_s():
+                    continue
+                # Pausing until the next scanning window.
+                idle_time_s = min(self._scan_scheduler.get_idle_s(),
+                    self._timeout_s - elapsed_time_s)
+                if idle_time_s > 0:
+                    self._paused = True
+                    self._scanner.stop()
+                    if self._stop_called.wait(idle_time_s):
+                        self._process_done.set()
+                        break
+                    elapsed_time_s += idle_time_s
+                    if elapsed_time_s >= self._timeout_s:
+                        self._process_done.set()
+                        self.stop()
+                        break
+                    self._scanner.start(passive=False)
+                    self._paused = False
+                if self._drives_scheduler:
+                    self._scan_scheduler.end_cycle(window_time_s,
+                        max(idle_time_s, 0))
+                window_time_s = 0
         except BTLEException as e:
             # Save details of the exception raised but don't re-raise, just
             # complete the function.
@@ -180,7 +481,8 @@ class _StoppableScanner(threading.Thread):
             pass
         try:
             self._exc = None
-            self._scanner.stop()
+            if not self._paused:
+                self._scanner.stop()
         except BTLEException as e:
             # Save details of the exception raised but don't re-raise, just
             # complete the function.
@@ -224,32 +526,83 @@ class Manager(object):
     feature-masks to feature-classes.
     """
 
+    _features_decoder_table_dic = {}
+    """Features decoder tables' cache.
+    Dictionary that maps device identifiers to tuples of 32 feature-classes
+    indexed by the position of the corresponding feature-mask's bit, "None"
+    where no feature is defined.
+    """
+
     def __init__(self):
         """Constructor."""
         # Raise an exception if an object has already been instantiated.
         if self._INSTANCE is not None:
             raise Exception('An instance of \'Manager\' class already exists.')
 
-        self._scanner = None
-        """BLE scanner."""
+        self._scanners = []
+        """BLE scanners, one for each adapter."""
 
         self._is_scanning = False
         """Scanning status."""
 
-        self._discovered_nodes = []
-        """List of discovered nodes."""
+        self._discovered_records = OrderedDict()
+        """Dictionary that maps the tags of the discovered devices to their
+        records, in order of discovery."""
 
         self._thread_pool = ThreadPoolExecutor(Manager._NUMBER_OF_THREADS)
         """Pool of thread used to notify the listeners."""
 
-        self._scanner_thread = None
-        """Stoppable-scanner object."""
+        self._scanner_threads = []
+        """Stoppable-scanner objects, one for each adapter."""
 
         self._listeners = []
         """List of listeners to the manager changes.
         It is a thread safe list, so a listener can subscribe itself through a
         callback."""
 
+        self._transport = BluepyTransport()
+        """Transport used to create scanners and nodes."""
+
+        self._gatt_cache = None
+        """Cache of the GATT database of the nodes, None if disabled."""
+
+        self._connection_pool = None
+        """Pool scheduling the connections to the nodes, created on first use.
+        """
+
+        self._adapters = [0]
+        """Indexes of the adapters to scan with and to connect through."""
+
+        self._max_links = MAX_LINKS_DEFAULT
+        """Maximum number of simultaneous links per adapter."""
+
+        self._adapter_links = {}
+        """Dictionary that maps adapters to the set of nodes connected, or
+        connecting, through them."""
+
+        self._node_adapters = {}
+        """Dictionary that maps the nodes connected, or connecting, to their
+        adapter."""
+
+        self._advertisements = {}
+        """Dictionary that maps adapters to the number of advertising data they
+        have received."""
+
+        self._scan_scheduler = None
+        """Scheduler of the scanning windows of the asynchronous discovery
+        process, None to scan continuously."""
+
+        self._node_registry = None
+        """Persistent registry of the nodes discovered, None if disabled."""
+
+        self._max_records = None
+        """Maximum number of records of discovered devices, None if
+        unbounded."""
+
+        self._idle_ttl_s = None
+        """Time in seconds after which the record of a device not seen any more
+        is evicted, None to keep it."""
+
     @classmethod
     def instance(self):
         """Getting an instance of the class.
@@ -261,11 +614,309 @@ class Manager(object):
             self._INSTANCE = Manager()
         return self._INSTANCE
 
-    def discover(self, show_warnings=False, timeout_s=0):
+    def set_transport(self, transport):
+        """Set the transport used to create scanners and nodes.
+
+        It allows to work with transports other than bluepy's, e.g. simulated
+        ones. To be called before starting the discovery process.
+
+        Args:
+            transport (:class:`blue_st_sdk.transport.Transport`): The
+                transport.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidOperationException`
+                is raised if a discovery process is running.
+        """
+        if self.is_discovering():
+            raise InvalidOperationException(
+                ' The transport can not be changed while discovering.')
+        self._transport = transport
+
+    def get_transport(self):
+        """Get the transport used to create scanners and nodes.
+
+        Returns:
+            :class:`blue_st_sdk.transport.Transport`: The transport.
+        """
+        return self._transport
+
+    def set_adapters(self, ifaces, max_links=MAX_LINKS_DEFAULT):
+        """Set the adapters to scan with and to connect through.
+
+        Each adapter scans in parallel with the others, and new connections are
+        placed on the adapter with fewest links. To be called before starting
+        the discovery process.
+
+        Args:
+            ifaces (list): Indexes of the adapters, i.e. "N" for
+                "/dev/hciN".
+            max_links (int, optional): Maximum number of simultaneous links per
+                adapter, with respect to which the utilization of the adapters
+                is computed.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidOperationException`
+                is raised if a discovery process is running or if no adapter is
+                given.
+        """
+        if self.is_discovering():
+            raise InvalidOperationException(
+                ' The adapters can not be changed while discovering.')
+        if not ifaces:
+            raise InvalidOperationException(' At least one adapter is needed.')
+        with lock_for_object(self._node_adapters):
+            self._adapters = list(ifaces)
+            self._max_links = max_links
+
+    def get_adapters(self):
+        """Get the adapters to scan with and to connect through.
+
+        Returns:
+            list: Indexes of the adapters.
+        """
+        return list(self._adapters)
+
+    def get_adapter_statistics(self):
+        """Get the utilization of the adapters.
+
+        Returns:
+            dict: A dictionary that maps the index of each adapter to a
+            dictionary with the number of links open or opening through it
+            ("links"), their ratio to the maximum number of links
+            ("utilization"), the number of advertising data received
+            ("advertisements"), and the number of discovered devices received
+            best by it ("devices").
+        """
+        devices = {}
+        for record in self.get_discovery_records():
+            iface = record.get_iface()
+            devices[iface] = devices.get(iface, 0) + 1
+        with lock_for_object(self._node_adapters):
+            statistics = {}
+            for iface in self._adapters:
+                links = len(self._adapter_links.get(iface, ()))
+                statistics[iface] = {
+                    'links': links,
+                    'utilization': float(links) / self._max_links,
+                    'advertisements': self._advertisements.get(iface, 0),
+                    'devices': devices.get(iface, 0)
+                }
+            return statistics
+
+    def _count_advertisement(self, iface):
+        """Count an advertising data received by an adapter.
+
+        Args:
+            iface (int): Index of the adapter.
+        """
+        with lock_for_object(self._node_adapters):
+            self._advertisements[iface] = self._advertisements.get(iface, 0) + 1
+
+    def _get_adapters_by_load(self, node):
+        """Get the adapters a node can be connected through, least loaded first.
+
+        Only the adapters which have received the node are considered, if any
+        of them is configured. Adapters with the same number of links are
+        sorted by preferring the one receiving the node best, then in order of
+        configuration.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            list: Indexes of the adapters; only the adapter of the node if it is
+            already connected, or connecting.
+        """
+        record = self.get_discovery_record(node.get_tag())
+        if record is not None:
+            preferred = record.get_iface()
+            ifaces = record.get_ifaces()
+        else:
+            preferred = node.get_iface()
+            ifaces = frozenset([preferred])
+        with lock_for_object(self._node_adapters):
+            iface = self._node_adapters.get(node)
+            if iface is not None:
+                return [iface]
+            adapters = [iface for iface in self._adapters if iface in ifaces] \
+                or self._adapters
+            return sorted(adapters, key=lambda iface: (
+                len(self._adapter_links.get(iface, ())),
+                iface != preferred,
+                self._adapters.index(iface)))
+
+    def _acquire_adapter(self, node, iface=None):
+        """Place the link to a node on an adapter.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+            iface (int, optional): Index of the adapter, the least loaded one if
+                not given.
+
+        Returns:
+            int: The index of the adapter; the one already holding the link of
+            the node, if any.
+        """
+        with lock_for_object(self._node_adapters):
+            if node in self._node_adapters:
+                return self._node_adapters[node]
+            if iface is None:
+                iface = self._get_adapters_by_load(node)[0]
+            self._node_adapters[node] = iface
+            self._adapter_links.setdefault(iface, set()).add(node)
+            return iface
+
+    def _release_adapter(self, node):
+        """Release the adapter holding the link to a node, if any.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with lock_for_object(self._node_adapters):
+            iface = self._node_adapters.pop(node, None)
+            if iface is not None:
+                self._adapter_links[iface].discard(node)
+
+    def set_scan_scheduler(self, scan_scheduler):
+        """Set the scheduler of the scanning windows of the asynchronous
+        discovery process.
+
+        The scheduler adapts the duty cycle of the scanning to the churn of the
+        devices around. To be called before starting the discovery process.
+
+        Args:
+            scan_scheduler
+                (:class:`blue_st_sdk.scan_scheduler.AdaptiveScanScheduler`): The
+                scheduler, "None" to scan continuously.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidOperationException`
+                is raised if a discovery process is running.
+        """
+        if self.is_discovering():
+            raise InvalidOperationException(
+                ' The scan scheduler can not be changed while discovering.')
+        self._scan_scheduler = scan_scheduler
+
+    def get_scan_scheduler(self):
+        """Get the scheduler of the scanning windows of the asynchronous
+        discovery process.
+
+        Returns:
+            :class:`blue_st_sdk.scan_scheduler.AdaptiveScanScheduler`: The
+            scheduler, "None" if scanning continuously.
+        """
+        return self._scan_scheduler
+
+    def set_node_registry(self, node_registry):
+        """Set the persistent registry of the nodes discovered.
+
+        The nodes of the registry are restored at once, as if they had been
+        just discovered, so that they can be connected to without waiting for
+        a discovery process; the following discovery processes keep them and
+        update the registry with the new nodes and with the changes of their
+        advertising data.
+
+        Args:
+            node_registry (:class:`blue_st_sdk.node_registry.NodeRegistry`):
+                The registry, "None" to disable it.
+        """
+        self._node_registry = node_registry
+        if node_registry is None:
+            return
+        records = []
+        for scan_entry in node_registry.get_scan_entries():
+            try:
+                records.append(DiscoveryRecord(scan_entry))
+            except InvalidBLEAdvertisingDataException as e:
+                node_registry.remove(scan_entry.addr)
+        added = []
+        with lock_for_object(self._discovered_records):
+            for record in records:
+                if record.get_tag() not in self._discovered_records:
+                    self._discovered_records[record.get_tag()] = record
+                    added.append(record)
+            # The restored records keep the time they were last seen.
+            self._sort_records()
+        if self._listeners:
+            for record in added:
+                self._notify_new_node_discovered(record.get_node())
+        self._evict_records()
+
+    def get_node_registry(self):
+        """Get the persistent registry of the nodes discovered.
+
+        Returns:
+            :class:`blue_st_sdk.node_registry.NodeRegistry`: The registry,
+            "None" if disabled.
+        """
+        return self._node_registry
+
+    def _store_record(self, record, is_new_data=True):
+        """Store the record of a discovered device in the registry, if any.
+
+        Args:
+            record (:class:`blue_st_sdk.manager.DiscoveryRecord`): The record.
+            is_new_data (bool, optional): False if the advertising data has not
+                changed since the record was last stored.
+        """
+        node_registry = self._node_registry
+        if node_registry is not None:
+            node_registry.store(record, is_new_data)
+
+    def set_gatt_cache(self, gatt_cache):
+        """Set the cache of the GATT database of the nodes.
+
+        Connecting to a node found in the cache does not require discovering its
+        services and characteristics again.
+
+        Args:
+            gatt_cache (:class:`blue_st_sdk.gatt_cache.GattCache`): The cache,
+                "None" to disable it.
+        """
+        self._gatt_cache = gatt_cache
+
+    def get_gatt_cache(self):
+        """Get the cache of the GATT database of the nodes.
+
+        Returns:
+            :class:`blue_st_sdk.gatt_cache.GattCache`: The cache, "None" if
+            disabled.
+        """
+        return self._gatt_cache
+
+    def set_connection_pool(self, connection_pool):
+        """Set the pool scheduling the connections to the nodes.
+
+        It allows to configure the limits of the adapters; the previous pool, if
+        any, is not closed.
+
+        Args:
+            connection_pool (:class:`blue_st_sdk.connection_pool.ConnectionPool`):
+                The pool.
+        """
+        self._connection_pool = connection_pool
+
+    def get_connection_pool(self):
+        """Get the pool scheduling the connections to the nodes.
+
+        A pool with the default limits is created on first use.
+
+        Returns:
+            :class:`blue_st_sdk.connection_pool.ConnectionPool`: The pool.
+        """
+        with lock_for_object(self):
+            if self._connection_pool is None:
+                self._connection_pool = ConnectionPool()
+            return self._connection_pool
+
+    def discover(self, show_warnings=False, timeout_s=0, scan_filter=None):
         """Perform the discovery process.
 
         The discovery process will last *timeout_s* seconds if provided, a
-        default timeout otherwise.
+        default timeout otherwise. Each adapter scans in parallel with the
+        others.
 
         Synchronous method.
 
@@ -275,6 +926,9 @@ class Manager(object):
                 data format, nothing otherwise.
             timeout_s (int, optional): Time in seconds to wait before stopping
                 the discovery process.
+            scan_filter (:class:`blue_st_sdk.scan_filter.ScanFilter`, optional):
+                Filter the devices discovered have to pass, all the BlueST
+                devices if not given.
 
         Returns:
             bool: True if the discovery has finished, False if a discovery is
@@ -288,22 +942,52 @@ class Manager(object):
                 return False
             if timeout_s == 0:
                 timeout_s = _ScannerDelegate.SCANNING_TIME_DEFAULT_s
-            self._discovered_nodes = []
+            self._clear_records()
             self._notify_discovery_change(True)
-            self._scanner = Scanner().withDelegate(_ScannerDelegate(show_warnings))
-            self._scanner.scan(timeout_s)
+            self._scanners = [self._transport.create_scanner(iface).withDelegate(
+                _ScannerDelegate(show_warnings, scan_filter))
+                for iface in self._adapters]
+            errors = []
+            threads = []
+            for scanner in self._scanners[1:]:
+                thread = threading.Thread(target=self._scan,
+                    args=(scanner, timeout_s, errors))
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+            self._scan(self._scanners[0], timeout_s, errors)
+            for thread in threads:
+                thread.join()
             self._notify_discovery_change(False)
+            if errors:
+                raise errors[0]
             return True
         except BTLEException as e:
             msg = '\nBluetooth scanning requires root privilege, ' \
                   'so please run the script with \"sudo\".'
             raise BTLEException(e.code, msg)
 
-    def start_discovery(self, show_warnings=False, timeout_s=0):
+    @classmethod
+    def _scan(self, scanner, timeout_s, errors):
+        """Scan with a single adapter.
+
+        Args:
+            scanner (Scanner): The scanner of the adapter.
+            timeout_s (int): Time in seconds to scan for.
+            errors (list): List where to append the exception raised, if any.
+        """
+        try:
+            scanner.scan(timeout_s)
+        except BTLEException as e:
+            errors.append(e)
+
+    def start_discovery(self, show_warnings=False, timeout_s=0,
+        scan_filter=None):
         """Start the discovery process.
 
         The discovery process will last *timeout_s* seconds if provided, a
-        default timeout otherwise.
+        default timeout otherwise. Scanning pauses between the windows chosen by
+        the scheduler set through :meth:`set_scan_scheduler()`, if any.
 
         Asynchronous method, to be followed by a call to
         :meth:`stop_discovery()`'
@@ -314,6 +998,9 @@ class Manager(object):
                 data format, nothing otherwise.
             timeout_s (int, optional): Time in seconds to wait before stopping
                 the discovery process.
+            scan_filter (:class:`blue_st_sdk.scan_filter.ScanFilter`, optional):
+                Filter the devices discovered have to pass, all the BlueST
+                devices if not given.
 
         Returns:
             bool: True if the discovery has started, False if a discovery is
@@ -328,10 +1015,13 @@ class Manager(object):
                 return False
             if timeout_s == 0:
                 timeout_s = _ScannerDelegate.SCANNING_TIME_DEFAULT_s
-            self._discovered_nodes = []
+            self._clear_records()
             self._notify_discovery_change(True)
-            self._scanner_thread = _StoppableScanner(show_warnings, timeout_s)
-            self._scanner_thread.start()
+            self._scanner_threads = [_StoppableScanner(show_warnings,
+                timeout_s, scan_filter, iface, self._scan_scheduler, i == 0)
+                for (i, iface) in enumerate(self._adapters)]
+            for scanner_thread in self._scanner_threads:
+                scanner_thread.start()
             return True
         except BTLEException as e:
             raise e
@@ -352,8 +1042,10 @@ class Manager(object):
         try:
             #print('stop_discovery()')
             if self.is_discovering():
-                self._scanner_thread.stop()
-                self._scanner_thread.join()
+                for scanner_thread in self._scanner_threads:
+                    scanner_thread.stop()
+                for scanner_thread in self._scanner_threads:
+                    scanner_thread.join()
                 self._notify_discovery_change(False)
                 return True
             return False
@@ -397,6 +1089,18 @@ class Manager(object):
             # Calling user-defined callback.
             self._thread_pool.submit(listener.on_discovery_change(self, status))
 
+    def _notify_node_evicted(self, record):
+        """Notify :class:`blue_st_sdk.manager.ManagerListener` objects that the
+        record of a discovered device has been evicted.
+
+        Args:
+            record (:class:`blue_st_sdk.manager.DiscoveryRecord`): Record
+                evicted.
+        """
+        for listener in self._listeners:
+            # Calling user-defined callback.
+            self._thread_pool.submit(listener.on_node_evicted, self, record)
+
     def _notify_new_node_discovered(self, node):
         """Notify :class:`blue_st_sdk.manager.ManagerListener` objects that a
         new node has been discovered.
@@ -408,6 +1112,151 @@ class Manager(object):
             # Calling user-defined callback.
             self._thread_pool.submit(listener.on_node_discovered(self, node))
 
+    def _clear_records(self):
+        """Remove the records of all the discovered devices, except those of
+        the registry, if any, which are revalidated by the discovery.
+
+        With an idle time-to-live set through :meth:`set_discovery_limits()`
+        the records are kept, and only the expired ones are evicted.
+        """
+        if self._idle_ttl_s is not None:
+            self._evict_records()
+            return
+        with lock_for_object(self._discovered_records):
+            if self._node_registry is None:
+                self._discovered_records.clear()
+                return
+            tags = set(self._node_registry.get_tags())
+            for tag in list(self._discovered_records.keys()):
+                if tag not in tags:
+                    del self._discovered_records[tag]
+
+    def _add_record(self, new_record):
+        """Insert the record of a discovered device to the Manager, and notify
+        the listeners about it.
+
+        The node of the device is built only if there are listeners to notify.
+
+        Args:
+            new_record (:class:`blue_st_sdk.manager.DiscoveryRecord`): Record
+                to add.
+
+        Returns:
+            bool: True if the record is added, False if a record with the same
+            tag is already present.
+        """
+        with lock_for_object(self._discovered_records):
+            if new_record.get_tag() in self._discovered_records:
+                return False
+            self._discovered_records[new_record.get_tag()] = new_record
+        self._store_record(new_record)
+        if self._listeners:
+            self._notify_new_node_discovered(new_record.get_node())
+        self._evict_records()
+        return True
+
+    def set_discovery_limits(self, max_nodes=None, idle_ttl_s=None):
+        """Bound the records of the discovered devices.
+
+        When there are more than *max_nodes* records, or a device has not been
+        seen for longer than *idle_ttl_s* seconds, the records of the devices
+        seen least recently are evicted, and the listeners notified through
+        :meth:`blue_st_sdk.manager.ManagerListener.on_node_evicted()`. The
+        records of the nodes connected, or connecting, are never evicted, and
+        the persistent registry, if any, keeps the records evicted.
+
+        With an idle time-to-live, starting a discovery process does not remove
+        the records of the devices discovered before.
+
+        Args:
+            max_nodes (int, optional): Maximum number of records, "None" if
+                unbounded.
+            idle_ttl_s (float, optional): Time in seconds after which the record
+                of a device not seen any more is evicted, "None" to keep it.
+        """
+        with lock_for_object(self._discovered_records):
+            self._max_records = max_nodes
+            self._idle_ttl_s = idle_ttl_s
+            self._sort_records()
+        self._evict_records()
+
+    def _sort_records(self):
+        """Sort the records by the time they were last seen, if limits are set.
+        To be called while holding the lock of the records."""
+        if self._max_records is None and self._idle_ttl_s is None:
+            return
+        records = sorted(self._discovered_records.values(),
+            key=lambda record: record.get_last_seen())
+        self._discovered_records.clear()
+        for record in records:
+            self._discovered_records[record.get_tag()] = record
+
+    def _on_record_seen(self, record):
+        """Move the record of a device just seen to the end of the records, so
+        that they stay sorted by the time they were last seen, and evict the
+        records exceeding the limits, if any.
+
+        Args:
+            record (:class:`blue_st_sdk.manager.DiscoveryRecord`): The record.
+        """
+        if self._max_records is None and self._idle_ttl_s is None:
+            return
+        with lock_for_object(self._discovered_records):
+            tag = record.get_tag()
+            if self._discovered_records.get(tag) is record:
+                self._discovered_records[tag] = \
+                    self._discovered_records.pop(tag)
+        self._evict_records()
+
+    @classmethod
+    def _is_in_use(self, record):
+        """Check whether the node of a record is connected, or connecting.
+
+        Args:
+            record (:class:`blue_st_sdk.manager.DiscoveryRecord`): The record.
+
+        Returns:
+            bool: True if the node is connected or connecting, False otherwise.
+        """
+        return record.is_materialized() and record.get_node().get_status() \
+            in (NodeStatus.CONNECTED, NodeStatus.CONNECTING)
+
+    def _evict_records(self):
+        """Evict the records exceeding the limits set through
+        :meth:`set_discovery_limits()`, the least recently seen first.
+
+        Records are evicted from memory only: the persistent registry, if any,
+        keeps them, and drops them according to its own maximum age.
+
+        The records are kept sorted by the time they were last seen, so that
+        only the oldest ones are checked. The records in use are skipped where
+        they are, keeping the order, so that they get evicted as soon as they
+        are released if expired meanwhile; skipping them costs at most the
+        number of nodes connected.
+        """
+        max_records = self._max_records
+        idle_ttl_s = self._idle_ttl_s
+        if max_records is None and idle_ttl_s is None:
+            return
+        evicted = []
+        with lock_for_object(self._discovered_records):
+            expiry = time.time() - idle_ttl_s if idle_ttl_s is not None \
+                else None
+            size = len(self._discovered_records)
+            for tag in self._discovered_records:
+                record = self._discovered_records[tag]
+                if (max_records is None or size <= max_records) \
+                    and (expiry is None or record.get_last_seen() >= expiry):
+                    break
+                if self._is_in_use(record):
+                    continue
+                evicted.append(record)
+                size -= 1
+            for record in evicted:
+                del self._discovered_records[record.get_tag()]
+        for record in evicted:
+            self._notify_node_evicted(record)
+
     def add_node(self, new_node):
         """Insert a node to the Manager, and notify the listeners about it.
 
@@ -418,24 +1267,41 @@ class Manager(object):
             bool: True if the node is added, False if a node with the same tag
             is already present.
         """
-        with lock_for_object(self._discovered_nodes):
-            new_tag = new_node.get_tag()
-            for node in self._discovered_nodes:
-                if new_tag == node.get_tag():
-                    return False
-            self._discovered_nodes.append(new_node)
-        self._notify_new_node_discovered(new_node)
-        return True
+        return self._add_record(DiscoveryRecord.from_node(new_node))
+
+    def get_discovery_records(self):
+        """Get the records of the discovered devices, without building their
+        nodes.
+
+        Returns:
+            list of :class:`blue_st_sdk.manager.DiscoveryRecord`: The records of
+            all the devices discovered until the time of invocation.
+        """
+        with lock_for_object(self._discovered_records):
+            return list(self._discovered_records.values())
+
+    def get_discovery_record(self, tag):
+        """Get the record of the device with the given tag.
+
+        Args:
+            tag (str): Unique string identifier that identifies a device.
+
+        Returns:
+            :class:`blue_st_sdk.manager.DiscoveryRecord`: The record of the
+            device with the given tag, None if not found.
+        """
+        return self._discovered_records.get(tag)
 
     def get_nodes(self):
         """Get the list of the discovered nodes.
 
+        The nodes not built yet are built.
+
         Returns:
             list of :class:`blue_st_sdk.node.Node`: The list of all discovered
             nodes until the time of invocation.
         """
-        with lock_for_object(self._discovered_nodes):
-            return self._discovered_nodes
+        return [record.get_node() for record in self.get_discovery_records()]
 
     def get_node_with_tag(self, tag):
         """Get the node with the given tag.
@@ -447,10 +1313,9 @@ class Manager(object):
             :class:`blue_st_sdk.node.Node`: The node with the given tag, None
             if not found.
         """
-        with lock_for_object(self._discovered_nodes):
-            for node in self._discovered_nodes:
-                if node.get_tag() == tag:
-                    return node
+        record = self.get_discovery_record(tag)
+        if record is not None:
+            return record.get_node()
         return None
 
     def get_node_with_name(self, name):
@@ -467,18 +1332,18 @@ class Manager(object):
             :class:`blue_st_sdk.node.Node`: The node with the given name, None
             if not found.
         """
-        with lock_for_object(self._discovered_nodes):
-            for node in self._discovered_nodes:
-                if node.get_name() == name:
-                    return node
+        for record in self.get_discovery_records():
+            if record.get_name() == name:
+                return record.get_node()
         return None
 
     def remove_nodes(self):
         """Remove all nodes not bounded with the device."""
-        with lock_for_object(self._discovered_nodes):
-            for node in self._discovered_nodes:
-                if not node.is_connected():
-                    self._discovered_nodes.remove(node)
+        with lock_for_object(self._discovered_records):
+            for record in list(self._discovered_records.values()):
+                if not record.is_materialized() \
+                    or not record.get_node().is_connected():
+                    del self._discovered_records[record.get_tag()]
 
     @classmethod
     def add_features_to_node(self, device_id, mask_to_features_dic):
@@ -534,6 +1399,9 @@ class Manager(object):
                 decoder_to_check.pop(mask)
             mask = mask << 1
 
+        # Invalidating the decoder table, which is rebuilt on demand.
+        self._features_decoder_table_dic.pop(device_id, None)
+
         if bool(decoder_to_check):
             raise InvalidFeatureBitMaskException('Not all keys of the '
                 'mask-to-features dictionary have a single bit set to "1".')
@@ -554,6 +1422,29 @@ class Manager(object):
             return self._features_decoder_dic[device_id].copy()
         return FeatureCharacteristic.BASE_MASK_TO_FEATURE_DIC.copy()
 
+    @classmethod
+    def get_node_features_table(self, device_id):
+        """Get the features table available for the given device identifier.
+
+        The table is built once per device identifier and cached, so that
+        decoding a feature mask costs one lookup per bit set.
+
+        Args:
+            device_id (int): Device identifier.
+
+        Returns:
+            tuple: A tuple of 32 feature-classes, where the i-th item is the
+            class of the feature whose mask has the i-th bit set, or "None" if
+            there is no such feature.
+        """
+        table = self._features_decoder_table_dic.get(device_id)
+        if table is None:
+            decoder = self._features_decoder_dic.get(device_id,
+                FeatureCharacteristic.BASE_MASK_TO_FEATURE_DIC)
+            table = tuple([decoder.get(1 << i) for i in range(0, 32)])
+            self._features_decoder_table_dic[device_id] = table
+        return table
+
     def add_listener(self, listener):
         """Add a listener.
         
@@ -583,8 +1474,8 @@ class Manager(object):
 
 class ManagerListener(object):
     """Interface used by the :class:`blue_st_sdk.manager.Manager` class to
-    notify that a new Node has been discovered or that the scanning has
-    started/stopped.
+    notify that a new Node has been discovered or evicted, or that the scanning
+    has started/stopped.
     """
     __metaclass__ = ABCMeta
 
@@ -618,3 +1509,18 @@ class ManagerListener(object):
         """
         raise NotImplementedError('You must implement \"on_node_discovered()\" '
             'to use the \"ManagerListener\" class.')
+
+    def on_node_evicted(self, manager, record):
+        """This method is called whenever the record of a discovered node is
+        evicted because of the limits set through
+        :meth:`blue_st_sdk.manager.Manager.set_discovery_limits()`.
+
+        Does nothing by default.
+
+        Args:
+            manager (:class:`blue_st_sdk.manager.Manager`): Manager instance
+                that evicts the record.
+            record (:class:`blue_st_sdk.manager.DiscoveryRecord`): Record
+                evicted; its node, if built, can still be used.
+        """
+        pass
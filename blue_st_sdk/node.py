@@ -41,10 +41,16 @@ from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from bluepy.btle import Peripheral
 from bluepy.btle import DefaultDelegate
+from bluepy.btle import BTLEException
+from bluepy.btle import UUID
 from enum import Enum
+import binascii
 import struct
 import itertools
 import logging
+import os
+import select
+import time
 
 import blue_st_sdk.manager
 from blue_st_sdk.python_utils import lock
@@ -76,6 +82,9 @@ class Node(Peripheral, object):
     _NOTIFICATION_OFF = struct.pack("BB", 0x00, 0x00)
     """Notifications OFF."""
 
+    _CCCD_UUID = UUID(0x2902)
+    """UUID of the client characteristic configuration descriptor."""
+
     _NUMBER_OF_THREADS = 5
     """Number of threads to be used to notify the listeners."""
 
@@ -119,6 +128,10 @@ class Node(Peripheral, object):
         self._last_rssi_update = None
         """Last update to the Received Signal Strength Indication."""
 
+        self._iface = getattr(scan_entry, 'iface', 0)
+        """Index of the adapter the node is connected through, or has been found
+        by if never connected."""
+
         self._status = NodeStatus.INIT
         """Status."""
 
@@ -157,9 +170,39 @@ class Node(Peripheral, object):
         self._char_handle_to_characteristic_dict = {}
         """Characteristic's handle to characteristic dictionary."""
 
+        self._char_handle_to_notifying_features_dict = {}
+        """Characteristic's handle to set of notifying features dictionary: the
+        notifications of a characteristic are on as long as its set is not
+        empty."""
+
+        self._char_handle_to_cccd_handle_dict = {}
+        """Characteristic's handle to client characteristic configuration
+        descriptor's handle dictionary, filled in as descriptors are
+        discovered."""
+
+        self._notification_handlers_dict = {}
+        """Characteristic's handle to notification handler dictionary, built
+        when connecting and replaced, never modified, afterwards. Each handler
+        is called with the notified data."""
+
         self._unwrap_timestamp = UnwrapTimestamp()
         """Unwrap timestamp reference."""
 
+        self._last_notification_time = None
+        """Time of the last notification received, in seconds since the epoch.
+        """
+
+        self._decode_pool = None
+        """Pool of processes decoding the notifications, None if they are
+        decoded by the receiving thread. Refer to
+        :class:`blue_st_sdk.decode_pool.DecodePool` for more information."""
+
+        self._raw_packet_ring = None
+        """Ring the raw notifications are enqueued into, None if they are
+        handled by the receiving thread. Refer to
+        :class:`blue_st_sdk.receive_pipeline.ReceivePipeline` for more
+        information."""
+
         #self._characteristic_write_queue = Queue()
         """Queue of write jobs."""
 
@@ -202,17 +245,15 @@ class Node(Peripheral, object):
             characteristic.uuid)
         # Looking for the exported features in reverse order to get them in the
         # correct order in case of characteristic that exports multiple
-        # features.
+        # features, visiting only the bits set.
         features = []
-        mask = 1 << 31
-        for i in range(0, 32):
-            if (feature_mask & mask) != 0:
-                if mask in self._mask_to_feature_dic:
-                    feature = self._mask_to_feature_dic[mask]
-                    if feature is not None:
-                        feature.set_enable(True)
-                        features.append(feature)
-            mask = mask >> 1
+        while feature_mask:
+            mask = 1 << (feature_mask.bit_length() - 1)
+            feature_mask ^= mask
+            feature = self._mask_to_feature_dic.get(mask)
+            if feature is not None:
+                feature.set_enable(True)
+                features.append(feature)
 
         # If the features are valid, add an entry for the corresponding
         # characteristic.
@@ -257,29 +298,30 @@ class Node(Peripheral, object):
         device_id = self._advertising_data.get_device_id()
         feature_mask = self._advertising_data.get_feature_mask()
 
-        # Getting the dictionary that maps feature-masks to feature-classes
+        # Getting the table that maps feature-masks' bits to feature-classes
         # related to the advertising data's device identifier.
-        decoder = blue_st_sdk.manager.Manager.get_node_features(device_id)
+        table = blue_st_sdk.manager.Manager.get_node_features_table(device_id)
 
         # Initializing list of available-features and mask-to-feature
         # dictionary.
         self._available_features = []
         self._mask_to_feature_dic = {}
 
-        # Building features as claimed by the advertising data's feature-mask.
-        mask = 1
-        for i in range(0, 32):
-            if feature_mask & mask != 0:
-                feature_class = decoder.get(mask)
-                if feature_class is not None:
-                    feature = self._build_feature_from_class(feature_class)
-                    if feature is not None:
-                        self._available_features.append(feature)
-                        self._mask_to_feature_dic[mask] = feature
-                    else:
-                        self._logger.warning('Impossible to build the feature \"'
-                            + feature_class.get_simple_name() + '\".')
-            mask = mask << 1
+        # Building features as claimed by the advertising data's feature-mask,
+        # visiting only the bits set, from the lowest one.
+        feature_mask &= 0xFFFFFFFF
+        while feature_mask:
+            mask = feature_mask & -feature_mask
+            feature_mask ^= mask
+            feature_class = table[mask.bit_length() - 1]
+            if feature_class is not None:
+                feature = self._build_feature_from_class(feature_class)
+                if feature is not None:
+                    self._available_features.append(feature)
+                    self._mask_to_feature_dic[mask] = feature
+                else:
+                    self._logger.warning('Impossible to build the feature \"'
+                        + feature_class.get_simple_name() + '\".')
 
     def _set_features_characteristics(self):
         """For each feature stores a reference to its characteristic.
@@ -327,16 +369,45 @@ class Node(Peripheral, object):
         features = self._get_corresponding_features(char_handle)
         if features is None:
             return False
+        return self._update_features_group(char_handle, features, data,
+            notify_update)
 
+    def _update_features_group(self, char_handle, features, data,
+        notify_update=False, receive_time=None):
+        """Update the given features, related to a given characteristic.
+
+        Args:
+            char_handle (int): The characteristic's handle.
+            features (list): The features exported by the characteristic.
+            data (str): The data read from the given characteristic.
+            notify_update (bool, optional): If True all the registered listeners
+                are notified about the new data.
+            receive_time (float, optional): Reception time of the data in
+                seconds since the epoch, if known.
+
+        Returns:
+            bool: True.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidDataException`
+                if the data array has not enough data to read.
+        """
         # Computing the timestamp.
         timestamp = self._unwrap_timestamp.unwrap(
             LittleEndian.bytes_to_uint16(data))
 
+        # Handing notifications over to the decode pool, if any.
+        if notify_update and self._decode_pool is not None \
+            and self._decode_pool.submit(self, char_handle, timestamp, data,
+                receive_time):
+            return True
+
         # Updating the features.
         offset = TIMESTAMP_OFFSET_BYTES  # Timestamp sixe in bytes.
         try:
             for feature in features:
-                offset += feature.update(timestamp, data, offset, notify_update)
+                offset += feature.update(timestamp, data, offset,
+                    notify_update, receive_time)
         except InvalidDataException as e:
             raise e
         return True
@@ -355,6 +426,57 @@ class Node(Peripheral, object):
             return self._update_char_handle_to_features_dict[char_handle]
         return None
 
+    def _build_notification_handlers(self):
+        """Build the table mapping the characteristics' handles to the handlers
+        of their notifications.
+
+        Debug characteristics are handed over to the debug console, if any, and
+        feature characteristics to their group of features, so that handling a
+        notification costs a single lookup; notifications of other
+        characteristics are ignored.
+        """
+        handlers = {}
+        for (char_handle, features) in \
+            self._update_char_handle_to_features_dict.items():
+            handlers[char_handle] = self._build_features_group_handler(
+                char_handle, features)
+        if self._debug_console is not None:
+            for characteristic in (
+                self._debug_console._stdinout_characteristic,
+                self._debug_console._stderr_characteristic):
+                handlers[characteristic.getHandle()] = \
+                    self._build_debug_handler(characteristic)
+        self._notification_handlers_dict = handlers
+
+    def _build_features_group_handler(self, char_handle, features):
+        """Build the handler of the notifications of a feature characteristic.
+
+        Args:
+            char_handle (int): The characteristic's handle.
+            features (list): The features exported by the characteristic.
+
+        Returns:
+            function: A function updating the features with the notified data
+            and their reception time, and notifying the listeners.
+        """
+        update_features_group = self._update_features_group
+        return lambda data, receive_time=None: update_features_group(
+            char_handle, features, data, True, receive_time)
+
+    def _build_debug_handler(self, characteristic):
+        """Build the handler of the notifications of a debug characteristic.
+
+        Args:
+            characteristic (Characteristic): The debug characteristic.
+
+        Returns:
+            function: A function handing the notified data over to the debug
+            console.
+        """
+        on_update_characteristic = self._debug_console.on_update_characteristic
+        return lambda data, receive_time=None: on_update_characteristic(
+            characteristic, data)
+
     def _update_node_status(self, new_status):
         """Update the status of the node.
 
@@ -380,13 +502,14 @@ class Node(Peripheral, object):
         if self._status == NodeStatus.LOST:
             self._update_node_status(NodeStatus.IDLE)
 
-    def _build_debug_console(self, debug_service):
+    def _build_debug_console(self, characteristics):
         """Build a debug console used to read/write debug messages from/to the
         Bluetooth device.
 
         Args:
-            debug_service (Service): The BLE service. Refer to
-                `Service <https://ianharvey.github.io/bluepy-doc/service.html>`_
+            characteristics (list): The BLE characteristics of the debug
+                service. Refer to
+                `Characteristic <https://ianharvey.github.io/bluepy-doc/characteristic.html>`_
                 for more information.
 
         Returns:
@@ -396,7 +519,7 @@ class Node(Peripheral, object):
         """
         stdinout = None
         stderr = None
-        for characteristic in debug_service.getCharacteristics():
+        for characteristic in characteristics:
             if str(characteristic.uuid) == str(Debug.DEBUG_STDINOUT_BLUESTSDK_SERVICE_UUID):
                 stdinout = characteristic
             elif str(characteristic.uuid) == str(Debug.DEBUG_STDERR_BLUESTSDK_SERVICE_UUID):
@@ -405,6 +528,125 @@ class Node(Peripheral, object):
                 return DebugConsole(self, stdinout, stderr)
         return None
 
+    def _connect_link(self):
+        """Open the link-layer connection to the node.
+
+        Transports other than bluepy's (e.g. simulated ones) override this
+        method together with the GATT methods of bluepy's "Peripheral" class.
+        """
+        super(Node, self).connect(self.get_tag(), self._device.addrType,
+            self._iface)
+
+    def _disconnect_link(self):
+        """Close the link-layer connection to the node."""
+        super(Node, self).disconnect()
+
+    def _can_pipeline(self):
+        """Check whether the GATT requests can be pipelined through bluepy's
+        helper.
+
+        Returns:
+            bool: True if the private methods driving the helper are available,
+            False otherwise.
+        """
+        return hasattr(self, '_writeCmd') and hasattr(self, '_getResp')
+
+    def _read_characteristics(self, char_handles):
+        """Read many characteristics at once.
+
+        All the read requests are handed over to bluepy's helper before waiting
+        for the responses, so that the helper sends each request as soon as the
+        previous one is answered.
+
+        Pipelining drives the helper through the private "_writeCmd()" and
+        "_getResp()" methods of bluepy's "Peripheral" class (bluepy 1.x); if
+        they are missing, the characteristics are read one after the other.
+
+        Args:
+            char_handles (list): The characteristics' handles to read.
+
+        Returns:
+            list: The data read, in the same order of the handles.
+
+        Raises:
+            'BTLEException' is raised if a read fails, once all the responses
+            have been collected.
+        """
+        if not self._can_pipeline():
+            return [self.readCharacteristic(char_handle)
+                for char_handle in char_handles]
+        for char_handle in char_handles:
+            self._writeCmd('rd %X\n' % char_handle)
+        values = []
+        error = None
+        for char_handle in char_handles:
+            try:
+                values.append(self._getResp('rd')['d'][0])
+            except BTLEException as e:
+                if e.code == BTLEException.DISCONNECTED:
+                    raise e
+                error = error or e
+                values.append(None)
+        if error is not None:
+            raise error
+        return values
+
+    def _write_characteristics(self, writes):
+        """Write many characteristics or descriptors at once, with response.
+
+        As for :meth:`_read_characteristics()`, all the requests are handed over
+        to bluepy's helper before waiting for the responses.
+
+        Args:
+            writes (list): List of (handle, data) tuples.
+
+        Raises:
+            'BTLEException' is raised if a write fails, once all the responses
+            have been collected.
+        """
+        if not self._can_pipeline():
+            for (handle, data) in writes:
+                self.writeCharacteristic(handle, data, True)
+            return
+        for (handle, data) in writes:
+            self._writeCmd('wrr %X %s\n'
+                % (handle, binascii.b2a_hex(data).decode('utf-8')))
+        error = None
+        for (handle, data) in writes:
+            try:
+                self._getResp('wr')
+            except BTLEException as e:
+                if e.code == BTLEException.DISCONNECTED:
+                    raise e
+                error = error or e
+        if error is not None:
+            raise error
+
+    def _discover_services(self):
+        """Discover the services of the node and their characteristics.
+
+        The GATT cache set through
+        :meth:`blue_st_sdk.manager.Manager.set_gatt_cache()`, if any, is looked
+        up first, and updated after a full discovery.
+
+        Returns:
+            list: A list of (service's UUID, list of characteristics) tuples.
+            Refer to
+            `Characteristic <https://ianharvey.github.io/bluepy-doc/characteristic.html>`_
+            for more information.
+        """
+        gatt_cache = blue_st_sdk.manager.Manager.instance().get_gatt_cache()
+        if gatt_cache is not None:
+            services = gatt_cache.load(self)
+            if services is not None:
+                return services
+
+        services = [(str(service.uuid), service.getCharacteristics())
+            for service in self.getServices()]
+        if services and gatt_cache is not None:
+            gatt_cache.store(self, services)
+        return services
+
     def connect(self, user_defined_features=None):
         """Open a connection to the node.
 
@@ -414,25 +656,64 @@ class Node(Peripheral, object):
         """
         self._update_node_status(NodeStatus.CONNECTING)
         self.add_external_features(user_defined_features)
-        super(Node, self).connect(self.get_tag(), self._device.addrType)
 
-        # Getting services.
-        services = self.getServices()
-        if not services:
+        # Placing the link on the least loaded adapter.
+        manager = blue_st_sdk.manager.Manager.instance()
+        self._iface = manager._acquire_adapter(self)
+        try:
+            self._connect_link()
+        except Exception:
+            manager._release_adapter(self)
+            raise
+
+        # Closing the link and releasing its adapter unless the node gets
+        # connected, e.g. when the link is lost while discovering the services.
+        try:
+            has_services = self._set_up_services()
+        except Exception:
+            self._release_link()
+            raise
+        if not has_services:
+            self._release_link()
             self._update_node_status(NodeStatus.DEAD)
             return
 
+        # Change node's status.
+        self._update_node_status(NodeStatus.CONNECTED)
+
+    def _set_up_services(self):
+        """Set up the services of the node on a new link, building its features
+        and the table of the notification handlers.
+
+        Returns:
+            bool: True if the node exports some services, False otherwise.
+        """
+        # Restoring the delegate, which bluepy drops when disconnecting.
+        if self.delegate is None:
+            self.withDelegate(NodeDelegate(self))
+        self._last_notification_time = None
+
+        # Notifications are off on a new link.
+        self._char_handle_to_notifying_features_dict = {}
+        self._char_handle_to_cccd_handle_dict = {}
+        self._notification_handlers_dict = {}
+
+        # Getting services.
+        services = self._discover_services()
+        if not services:
+            return False
+
         # Handling Debug, Config, and Feature characteristics.
-        for service in services:
-            if Debug.is_debug_service(str(service.uuid)):
+        for (service_uuid, characteristics) in services:
+            if Debug.is_debug_service(service_uuid):
                 # Handling Debug.
-                self._debug_console = self._build_debug_console(service)
-            #elif Config.is_config_service(str(service.uuid)):
+                self._debug_console = self._build_debug_console(
+                    characteristics)
+            #elif Config.is_config_service(service_uuid):
                 # Handling Config.
             #    pass
             #else:
             # Getting characteristics.
-            characteristics = service.getCharacteristics()
             for characteristic in characteristics:
 
                 # Storing characteristics' handle to characteristic mapping.
@@ -461,17 +742,48 @@ class Node(Peripheral, object):
         # itself.
         self._set_features_characteristics()
 
-        # Change node's status.
-        self._update_node_status(NodeStatus.CONNECTED)
+        # Building the table of the notification handlers.
+        self._build_notification_handlers()
+
+        return True
 
     def disconnect(self):
         """Close the connection to the node."""
         if not self.is_connected():
             return
         self._update_node_status(NodeStatus.DISCONNECTING)
-        super(Node, self).disconnect()
+        self._disconnect_link()
+        blue_st_sdk.manager.Manager.instance()._release_adapter(self)
         self._update_node_status(NodeStatus.IDLE)
 
+    def _handle_link_loss(self):
+        """Handle the unexpected loss of the link to the node.
+
+        Releases the resources of the link and moves the node to the
+        :attr:`blue_st_sdk.node.NodeStatus.UNREACHABLE` status, so that the
+        listeners (e.g. a
+        :class:`blue_st_sdk.reconnection_supervisor.ReconnectionSupervisor`)
+        can react.
+        """
+        if self._status not in (NodeStatus.CONNECTED, NodeStatus.CONNECTING):
+            return
+        self._release_link()
+        self._update_node_status(NodeStatus.UNREACHABLE)
+
+    def _release_link(self):
+        """Close the link to the node, even if already down, and release its
+        adapter."""
+        try:
+            self._disconnect_link()
+        except (BTLEException, IOError, OSError, ValueError):
+            # The link is already down.
+            try:
+                self._stopHelper()
+            except (IOError, OSError, ValueError):
+                pass
+            self._helper = None
+        blue_st_sdk.manager.Manager.instance()._release_adapter(self)
+
     def add_external_features(self, user_defined_features):
         """Add available features to an already discovered device.
 
@@ -513,6 +825,15 @@ class Node(Peripheral, object):
         """
         return self._device.addr
 
+    def get_iface(self):
+        """Get the adapter of the node.
+
+        Returns:
+            int: The index of the adapter the node is connected through, or has
+            been found by if never connected.
+        """
+        return self._iface
+
     def get_status(self):
         """Get the status of the node.
 
@@ -613,6 +934,21 @@ class Node(Peripheral, object):
             return features[0]
         return None
 
+    def set_lazy_decoding(self, flag):
+        """Set the lazy decoding status of all the features of the node.
+
+        To be called once the node is connected, so as to include the features
+        built when connecting. Refer to
+        :meth:`blue_st_sdk.feature.Feature.set_lazy_decoding()` for more
+        information.
+
+        Args:
+            flag (bool): New lazy decoding status: True to enable, False
+                otherwise.
+        """
+        for feature in self._available_features:
+            feature.set_lazy_decoding(flag)
+
     def get_tx_power_level(self):
         """Get the node transmission power in mdb.
 
@@ -781,6 +1117,56 @@ class Node(Peripheral, object):
             except InvalidDataException as e:
                 raise e
 
+    def read_features(self, features):
+        """Synchronous request to read many features at once.
+
+        Features sharing a characteristic are read with a single request, and
+        the requests of different characteristics are pipelined.
+
+        Args:
+            features (list): The features to read (list of
+                :class:`blue_st_sdk.feature.Feature` objects).
+
+        Returns:
+            list: The samples read (list of :class:`blue_st_sdk.feature.Sample`
+            objects), in the same order of the features.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidOperationException`
+                is raised if a feature is not enabled or the operation
+                required is not supported.
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidDataException`
+                if the data array has not enough data to read.
+        """
+        characteristics = {}
+        char_handles = []
+        for feature in features:
+            if not feature.is_enabled():
+                raise InvalidOperationException(
+                    ' The "' + feature.get_name() + '" feature is not enabled.')
+            characteristic = feature.get_characteristic()
+            if not self.characteristic_can_be_read(characteristic):
+                raise InvalidOperationException(
+                    ' The "' + feature.get_name() + '" feature is not readable.')
+            char_handle = characteristic.getHandle()
+            if char_handle not in characteristics:
+                characteristics[char_handle] = characteristic
+                char_handles.append(char_handle)
+
+        # Reading data.
+        values = self._read_characteristics(char_handles)
+
+        # Calling on-read callbacks, once for each characteristic.
+        for (char_handle, data) in zip(char_handles, values):
+            characteristic = characteristics[char_handle]
+            if self._debug_console and \
+                Debug.is_debug_characteristic(str(characteristic.uuid)):
+                self._debug_console.on_update_characteristic(
+                    characteristic, data)
+            else:
+                self._update_features(char_handle, data, False)
+        return [feature._get_sample() for feature in features]
+
     def write_feature(self, feature, data):
         """Synchronous request to write a feature.
 
@@ -806,6 +1192,69 @@ class Node(Peripheral, object):
         char_handle = characteristic.getHandle()
         self.writeCharacteristic(char_handle, data, True)
 
+    def _discover_cccd_handles(self, characteristics):
+        """Discover the client characteristic configuration descriptors of the
+        given characteristics, with a single request.
+
+        The descriptor of a characteristic lies between its value handle and
+        the declaration of the next characteristic; characteristics without
+        one are assumed to have it right after the value, as by the BlueST
+        protocol.
+
+        Args:
+            characteristics (list): The BLE characteristics. Refer to
+                `Characteristic <https://ianharvey.github.io/bluepy-doc/characteristic.html>`_
+                for more information.
+        """
+        characteristics = [characteristic for characteristic in characteristics
+            if characteristic.getHandle()
+            not in self._char_handle_to_cccd_handle_dict]
+        if not characteristics:
+            return
+        declarations = sorted([known.handle for known in
+            self._char_handle_to_characteristic_dict.values()])
+        start = min([characteristic.valHandle + 1
+            for characteristic in characteristics])
+        end = 0xFFFF
+        last_declaration = max([characteristic.handle
+            for characteristic in characteristics])
+        for declaration in declarations:
+            if declaration > last_declaration:
+                end = declaration - 1
+                break
+        try:
+            cccd_handles = [descriptor.handle for descriptor
+                in self.getDescriptors(start, end)
+                if descriptor.uuid == self._CCCD_UUID]
+        except BTLEException as e:
+            if e.code == BTLEException.DISCONNECTED:
+                raise e
+            cccd_handles = []
+        for characteristic in characteristics:
+            value_handle = characteristic.valHandle
+            next_declarations = [declaration for declaration in declarations
+                if declaration > value_handle]
+            limit = next_declarations[0] if next_declarations else 0x10000
+            found = [cccd_handle for cccd_handle in cccd_handles
+                if value_handle < cccd_handle < limit]
+            self._char_handle_to_cccd_handle_dict[characteristic.getHandle()] = \
+                found[0] if found else value_handle + 1
+
+    def _get_cccd_handle(self, characteristic):
+        """Get the handle of the client characteristic configuration descriptor
+        of a characteristic, discovering it if needed.
+
+        Args:
+            characteristic (Characteristic): The BLE characteristic. Refer to
+                `Characteristic <https://ianharvey.github.io/bluepy-doc/characteristic.html>`_
+                for more information.
+
+        Returns:
+            int: The handle of the descriptor.
+        """
+        self._discover_cccd_handles([characteristic])
+        return self._char_handle_to_cccd_handle_dict[characteristic.getHandle()]
+
     def set_notification_status(self, characteristic, status):
         """Ask the node to set the notification status of the given
         characteristic.
@@ -818,9 +1267,26 @@ class Node(Peripheral, object):
             status (bool): True if the notifications have to be turned on, False
                 otherwise.
         """
-        self.writeCharacteristic(characteristic.getHandle() + 1,
+        self.writeCharacteristic(self._get_cccd_handle(characteristic),
             self._NOTIFICATION_ON if status else self._NOTIFICATION_OFF, True)
 
+    def _get_notifiable_characteristic(self, feature):
+        """Get the characteristic through which a feature can be notified.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): The given feature.
+
+        Returns:
+            Characteristic: The BLE characteristic, "None" if the feature is not
+            handled by this node, or it is disabled, or it can not be notified.
+        """
+        if not feature.is_enabled() or feature.get_parent_node() != self:
+            return None
+        characteristic = feature.get_characteristic()
+        if self.characteristic_can_be_notified(characteristic):
+            return characteristic
+        return None
+
     def enable_notifications(self, feature):
         """Ask the node to notify when a feature updates its value.
 
@@ -834,14 +1300,49 @@ class Node(Peripheral, object):
             disabled, or it is not possible to turn notifications on for it,
             True otherwise.
         """
-        if not feature.is_enabled() or feature.get_parent_node() != self:
-            return False
-        characteristic = feature.get_characteristic()
-        if self.characteristic_can_be_notified(characteristic):
+        return self.enable_notifications_bulk([feature])[0]
+
+    def enable_notifications_bulk(self, features):
+        """Ask the node to notify when any of the given features updates its
+        value.
+
+        The notifications of a characteristic are turned on only if none of its
+        features is notifying yet, and all the descriptor writes needed are
+        pipelined.
+
+        Args:
+            features (list): The given features (list of
+                :class:`blue_st_sdk.feature.Feature` objects).
+
+        Returns:
+            list: For each feature, False if the feature is not handled by this
+            node, or it is disabled, or it is not possible to turn notifications
+            on for it, True otherwise.
+
+        Raises:
+            'BTLEException' is raised if a descriptor write fails, in which case
+            none of the given features is set as notifying.
+        """
+        results = []
+        characteristics = []
+        enabled = []
+        for feature in features:
+            characteristic = self._get_notifiable_characteristic(feature)
+            results.append(characteristic is not None)
+            if characteristic is None:
+                continue
+            handle = characteristic.getHandle()
+            if not self._char_handle_to_notifying_features_dict.get(handle) \
+                and characteristic not in characteristics:
+                characteristics.append(characteristic)
+            enabled.append((feature, handle))
+        # The state is updated only once the descriptors have been written.
+        self._set_notification_status_bulk(characteristics, True)
+        for (feature, handle) in enabled:
             feature.set_notify(True)
-            self.set_notification_status(characteristic, True)
-            return True
-        return False
+            self._char_handle_to_notifying_features_dict.setdefault(
+                handle, set()).add(feature)
+        return results
 
     def disable_notifications(self, feature):
         """Ask the node to stop notifying when a feature updates its value.
@@ -854,16 +1355,121 @@ class Node(Peripheral, object):
             disabled, or it is not possible to turn notifications off for it,
             True otherwise.
         """
-        if not feature.is_enabled() or feature.get_parent_node() != self:
-            return False
-        characteristic = feature.get_characteristic()
-        if self.characteristic_can_be_notified(characteristic):
+        return self.disable_notifications_bulk([feature])[0]
+
+    def disable_notifications_bulk(self, features):
+        """Ask the node to stop notifying when any of the given features updates
+        its value.
+
+        The notifications of a characteristic are turned off only once none of
+        its features is notifying anymore.
+
+        Args:
+            features (list): The given features (list of
+                :class:`blue_st_sdk.feature.Feature` objects).
+
+        Returns:
+            list: For each feature, False if the feature is not handled by this
+            node, or it is disabled, or it is not possible to turn notifications
+            off for it, True otherwise.
+
+        Raises:
+            'BTLEException' is raised if a descriptor write fails, in which case
+            the given features keep notifying.
+        """
+        results = []
+        characteristics = []
+        disabled = []
+        removed_features = {}
+        for feature in features:
+            characteristic = self._get_notifiable_characteristic(feature)
+            results.append(characteristic is not None)
+            if characteristic is None:
+                continue
+            handle = characteristic.getHandle()
+            disabled.append((feature, handle))
+            notifying_features = \
+                self._char_handle_to_notifying_features_dict.get(handle)
+            if notifying_features and feature in notifying_features:
+                removed = removed_features.setdefault(handle, set())
+                removed.add(feature)
+                if removed >= notifying_features \
+                    and characteristic not in characteristics:
+                    characteristics.append(characteristic)
+        # The state is updated only once the descriptors have been written.
+        self._set_notification_status_bulk(characteristics, False)
+        for (feature, handle) in disabled:
             feature.set_notify(False)
-            if not self.characteristic_has_other_notifying_features(
-                    characteristic, feature):
-                self.set_notification_status(characteristic, False)
+            notifying_features = \
+                self._char_handle_to_notifying_features_dict.get(handle)
+            if notifying_features:
+                notifying_features.discard(feature)
+        return results
+
+    def _set_notification_status_bulk(self, characteristics, status):
+        """Ask the node to set the notification status of many characteristics
+        at once.
+
+        Args:
+            characteristics (list): The BLE characteristics. Refer to
+                `Characteristic <https://ianharvey.github.io/bluepy-doc/characteristic.html>`_
+                for more information.
+            status (bool): True if the notifications have to be turned on, False
+                otherwise.
+        """
+        if not characteristics:
+            return
+        self._discover_cccd_handles(characteristics)
+        value = self._NOTIFICATION_ON if status else self._NOTIFICATION_OFF
+        self._write_characteristics([(self._char_handle_to_cccd_handle_dict[
+            characteristic.getHandle()], value)
+            for characteristic in characteristics])
+
+    def _startHelper(self, iface=None):
+        """Start bluepy's helper, if not running yet.
+
+        The output of the helper is read through a
+        :class:`blue_st_sdk.node._HelperOutput` object, so that the lines
+        already read from the pipe are not left waiting for new data.
+
+        Args:
+            iface (int, optional): Bluetooth adapter to use.
+        """
+        started = self._helper is None
+        Peripheral._startHelper(self, iface)
+        if started and self._helper is not None:
+            self._helper.stdout = _HelperOutput(self._helper.stdout)
+
+    def _has_buffered_line(self):
+        """Check whether a line of bluepy's helper has already been read from
+        the pipe without being consumed.
+
+        Returns:
+            bool: True if a line has already been read, False otherwise.
+        """
+        helper = self._helper
+        return helper is not None \
+            and isinstance(helper.stdout, _HelperOutput) \
+            and helper.stdout.has_line()
+
+    def _has_pending_data(self):
+        """Check whether data of the node can be read without blocking.
+
+        Returns:
+            bool: True if a line of bluepy's helper has already been read from
+            the pipe, or if the file descriptor of the node is ready, False
+            otherwise.
+        """
+        if self._has_buffered_line():
+            return True
+        fd = self.fileno()
+        if fd is None:
+            return False
+        try:
+            return bool(select.select([fd], [], [], 0)[0])
+        except (IOError, OSError, ValueError, select.error):
+            # Leaving the link loss to be reported while reading.
             return True
-        return False
 
     def notifications_enabled(self, feature):
         """Check whether notifications are enabled for a feature.
@@ -882,7 +1488,8 @@ class Node(Peripheral, object):
 
         If a notification is received, the
         :meth:`blue_st_sdk.feature.FeatureListener.on_update` method of any
-        added listener is called.
+        added listener is called. With a timeout of zero the method does not
+        block, and only a notification already received is dispatched.
 
         Args:
             timeout_s (float): Time in seconds to wait before returning.
@@ -890,8 +1497,45 @@ class Node(Peripheral, object):
         Returns:
             bool: True if a notification is received before the timeout elapses,
             False otherwise.
+
+        Raises:
+            'BTLEException' is raised if the link to the node is lost, in which
+            case the node moves to the
+            :attr:`blue_st_sdk.node.NodeStatus.UNREACHABLE` status.
+        """
+        try:
+            if self._has_buffered_line():
+                # Polling the pipe would not report the line already read.
+                return self.waitForNotifications(0)
+            if timeout_s == 0 and not self._has_pending_data():
+                return False
+            return self.waitForNotifications(timeout_s)
+        except BTLEException as e:
+            self._handle_link_loss()
+            raise e
+
+    def get_last_notification_time(self):
+        """Get the time of the last notification received since connecting.
+
+        Returns:
+            float: The time of the last notification received, in seconds since
+            the epoch, "None" if no notification has been received yet.
         """
-        return self.waitForNotifications(timeout_s)
+        return self._last_notification_time
+
+    def fileno(self):
+        """Get the file descriptor through which the notifications of the node
+        are received.
+
+        It allows to wait for the notifications of many nodes at once, e.g.
+        through a :class:`blue_st_sdk.notification_poller.NotificationPoller`
+        object.
+
+        Returns:
+            int: The file descriptor, "None" if the node is not connected.
+        """
+        helper = self._helper
+        return helper.stdout.fileno() if helper is not None else None
 
     def characteristic_has_other_notifying_features(self, characteristic, feature):
         """Check whether a characteristic has other enabled features beyond the
@@ -908,13 +1552,9 @@ class Node(Peripheral, object):
             True if the characteristic has other enabled features beyond the
             given one, False otherwise.
         """
-        features = self._get_corresponding_features(characteristic.getHandle())
-        for feature_entry in features:
-            if feature_entry == feature:
-                pass
-            elif feature_entry.is_notifying():
-                return True
-        return False
+        notifying_features = self._char_handle_to_notifying_features_dict.get(
+            characteristic.getHandle(), set())
+        return bool(notifying_features - set([feature]))
 
     def add_listener(self, listener):
         """Add a listener.
@@ -980,22 +1620,90 @@ class NodeDelegate(DefaultDelegate):
             :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidDataException`
                 if the data array has not enough data to read.
         """
+        receive_time = time.time()
+        self._node._last_notification_time = receive_time
+
+        # Handing the notification over to the receive pipeline, if any.
+        raw_packet_ring = self._node._raw_packet_ring
+        if raw_packet_ring is not None:
+            raw_packet_ring.put(char_handle, data, receive_time)
+            return
+
         try:
-            # Calling on-read callback.
-            if self._node._debug_console:
-                # Calling on-update callback for a debug characteristic.
-                characteristic = \
-                    self._node._char_handle_to_characteristic_dict[char_handle]
-                if Debug.is_debug_characteristic(str(characteristic.uuid)):
-                    self._node._debug_console.on_update_characteristic(
-                        characteristic, data)
-                    return
-            # Calling on-read callback for the other characteristics.
-            self._node._update_features(char_handle, data, True)
+            # Calling the handler of the characteristic, if any.
+            handler = self._node._notification_handlers_dict.get(char_handle)
+            if handler is not None:
+                handler(data, receive_time)
         except InvalidDataException as e:
             self._logger.warning(str(e))
 
 
+class _HelperOutput(object):
+    """Output of bluepy's helper, read line by line.
+
+    Unlike the text pipe created by bluepy, it tells whether some lines have
+    already been read from the pipe without being consumed, as they do not make
+    the file descriptor ready again.
+    """
+
+    _CHUNK_SIZE = 4096
+    """Maximum number of bytes read from the pipe at once."""
+
+    def __init__(self, stdout):
+        """Constructor.
+
+        Args:
+            stdout (file): Standard output of bluepy's helper.
+        """
+        self._stdout = stdout
+        """Standard output of bluepy's helper."""
+
+        self._fd = stdout.fileno()
+        """File descriptor of the standard output."""
+
+        self._buffer = b''
+        """Data read from the pipe and not consumed yet."""
+
+    def fileno(self):
+        """Get the file descriptor of the standard output.
+
+        Returns:
+            int: The file descriptor.
+        """
+        return self._fd
+
+    def has_line(self):
+        """Check whether a whole line has already been read from the pipe.
+
+        Returns:
+            bool: True if a line can be read without blocking, False otherwise.
+        """
+        return b'\n' in self._buffer
+
+    def readline(self):
+        """Read a line, waiting for it if needed.
+
+        Returns:
+            str: The line, with its newline character, or an empty string if
+            the helper has exited.
+        """
+        index = self._buffer.find(b'\n')
+        while index < 0:
+            data = os.read(self._fd, self._CHUNK_SIZE)
+            if not data:
+                index = len(self._buffer) - 1
+                break
+            self._buffer += data
+            index = self._buffer.find(b'\n')
+        line = self._buffer[:index + 1]
+        self._buffer = self._buffer[index + 1:]
+        return line if isinstance(line, str) else line.decode('utf-8')
+
+    def close(self):
+        """Close the standard output."""
+        self._stdout.close()
+
+
 class NodeType(Enum):
     """Type of node."""
 
@@ -0,0 +1,300 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""node_registry
+
+The node_registry module contains a persistent registry of the nodes discovered,
+so that after a restart the known nodes can be connected to directly, without
+waiting for a discovery process.
+
+The registry is stored in a single compact JSON file, rewritten whenever a node
+is added or changes its advertising data. For each node it keeps the tag, the
+address type, the last advertising data, the advertised device identifier and
+feature mask, the key of its entry in the
+:class:`blue_st_sdk.gatt_cache.GattCache`, and the time it was last seen.
+"""
+
+
+# IMPORT
+
+from collections import OrderedDict
+import json
+import os
+import tempfile
+import threading
+import time
+from bluepy.btle import ScanEntry
+
+from blue_st_sdk.gatt_cache import GattCache
+
+
+# DEFINITIONS
+
+WRITE_DELAY_s_DEFAULT = 0
+"""Default time in seconds the changes are collected for before writing them,
+"0" to write them at once."""
+
+RSSI_UNKNOWN = -127
+"""Received Signal Strength Indication of the nodes restored from the registry,
+before being seen again."""
+
+_FORMAT_VERSION = 1
+"""Version of the format of the registry file."""
+
+_LAST_SEEN_RESOLUTION_s = 3600
+"""Time in seconds the time a node was last seen has to advance by for the node
+to be written again."""
+
+
+# CLASSES
+
+class NodeRegistry(object):
+    """Persistent registry of the nodes discovered.
+
+    To be set through :meth:`blue_st_sdk.manager.Manager.set_node_registry()`,
+    which restores the nodes of the registry and keeps it up to date with the
+    discovery process.
+    """
+
+    def __init__(self, path, max_age_s=None,
+        write_delay_s=WRITE_DELAY_s_DEFAULT):
+        """Constructor.
+
+        The registry is loaded from the file, if it exists.
+
+        Args:
+            path (str): Path of the registry file.
+            max_age_s (float, optional): Time in seconds after which a node not
+                seen any more is dropped when loading the registry, "None" to
+                keep the nodes forever.
+            write_delay_s (float, optional): Time in seconds the changes are
+                collected for before writing them, "0" to write them at once.
+        """
+        self._path = path
+        """Path of the registry file."""
+
+        self._max_age_s = max_age_s
+        """Time in seconds after which a node not seen any more is dropped."""
+
+        self._write_delay_s = write_delay_s
+        """Time in seconds the changes are collected for before writing them."""
+
+        self._entries = OrderedDict()
+        """Dictionary that maps the tags of the nodes to their entries, i.e.
+        lists with the tag, the address type, the advertising data as a list of
+        (tag, value) pairs, the device identifier, the feature mask, the key of
+        the GATT cache, and the time the node was last seen."""
+
+        self._dirty = False
+        """Whether the registry has changes not written yet."""
+
+        self._timer = None
+        """Timer writing the changes collected, if any."""
+
+        self._lock = threading.RLock()
+        """Lock protecting the entries."""
+
+        self._load()
+
+    def _load(self):
+        """Load the registry from its file, dropping the nodes too old."""
+        try:
+            with open(self._path, 'r') as registry_file:
+                content = json.load(registry_file)
+            if content.get('format') != _FORMAT_VERSION:
+                return
+            now = time.time()
+            for entry in content['nodes']:
+                if len(entry) != 7:
+                    continue
+                if self._max_age_s is not None \
+                    and now - entry[6] > self._max_age_s:
+                    continue
+                self._entries[entry[0]] = entry
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            self._entries = OrderedDict()
+
+    def get_tags(self):
+        """Get the tags of the nodes in the registry.
+
+        Returns:
+            list: The tags of the nodes, in order of discovery.
+        """
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get_scan_entries(self):
+        """Get the scan entries of the nodes in the registry, as if they had
+        been just discovered.
+
+        Returns:
+            list: A list of :class:`blue_st_sdk.node_registry.StoredScanEntry`
+            objects, in order of discovery.
+        """
+        with self._lock:
+            return [StoredScanEntry(entry) for entry in self._entries.values()]
+
+    def store(self, record, is_new_data=True):
+        """Store a node in the registry, if it is new or has changed.
+
+        Args:
+            record (:class:`blue_st_sdk.manager.DiscoveryRecord`): Record of the
+                node.
+            is_new_data (bool, optional): False if the advertising data of the
+                node has not changed since it was last stored, in which case
+                only the time it was last seen is checked.
+        """
+        if not is_new_data:
+            stored = self._entries.get(record.get_tag())
+            if stored is not None and record.get_last_seen() - stored[6] \
+                < _LAST_SEEN_RESOLUTION_s:
+                return
+        advertising_data = record.get_advertising_data()
+        entry = [
+            record.get_tag(),
+            record.get_addr_type(),
+            [[tag, value] for (tag, description, value)
+                in record.get_scan_data()],
+            advertising_data.get_device_id(),
+            advertising_data.get_feature_mask(),
+            GattCache.get_key(advertising_data),
+            int(record.get_last_seen())
+        ]
+        with self._lock:
+            stored = self._entries.get(entry[0])
+            if stored is not None and stored[:6] == entry[:6] \
+                and entry[6] - stored[6] < _LAST_SEEN_RESOLUTION_s:
+                return
+            self._entries[entry[0]] = entry
+            self._changed()
+
+    def remove(self, tag):
+        """Remove a node from the registry.
+
+        Args:
+            tag (str): Tag of the node.
+        """
+        with self._lock:
+            if self._entries.pop(tag, None) is not None:
+                self._changed()
+
+    def clear(self):
+        """Remove all the nodes from the registry."""
+        with self._lock:
+            self._entries = OrderedDict()
+            self._changed()
+
+    def _changed(self):
+        """Write the changes, at once or after the write delay. To be called
+        while holding the lock."""
+        self._dirty = True
+        if self._write_delay_s <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self._write_delay_s, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write the changes not written yet, if any."""
+        with self._lock:
+            self._timer = None
+            if not self._dirty:
+                return
+            content = {
+                'format': _FORMAT_VERSION,
+                'nodes': list(self._entries.values())
+            }
+            # Writing to a temporary file first, so that readers never see a
+            # partially written registry.
+            folder = os.path.dirname(os.path.abspath(self._path))
+            (fd, temporary_path) = tempfile.mkstemp('.json', dir=folder)
+            with os.fdopen(fd, 'w') as registry_file:
+                json.dump(content, registry_file, separators=(',', ':'))
+            os.rename(temporary_path, self._path)
+            self._dirty = False
+
+
+class StoredScanEntry(object):
+    """Scan entry of a node restored from a
+    :class:`blue_st_sdk.node_registry.NodeRegistry`, with the same interface as
+    bluepy's "ScanEntry" class."""
+
+    def __init__(self, entry):
+        """Constructor.
+
+        Args:
+            entry (list): Entry of the node in the registry.
+        """
+        self.addr = entry[0]
+        """MAC address."""
+
+        self.addrType = entry[1]
+        """Address type."""
+
+        self.iface = 0
+        """Index of the adapter that found the device."""
+
+        self.rssi = RSSI_UNKNOWN
+        """Received Signal Strength Indication."""
+
+        self.connectable = True
+        """Whether the device is connectable."""
+
+        self.updateCount = 0
+        """Number of advertising packets received."""
+
+        self.last_seen = entry[6]
+        """Time the device was last seen, in seconds since the epoch."""
+
+        self._scan_data = [(tag, ScanEntry.dataTags.get(tag, hex(tag)), value)
+            for (tag, value) in entry[2]]
+        """Last advertising data received."""
+
+    def getScanData(self):
+        """Get the advertising data.
+
+        Returns:
+            list: A list of (tag, description, value) tuples.
+        """
+        return self._scan_data
+
+    def getValueText(self, sdid):
+        """Get the value of an advertising data field.
+
+        Args:
+            sdid (int): Tag of the field.
+
+        Returns:
+            str: The value of the field, "None" if missing.
+        """
+        for (tag, description, value) in self._scan_data:
+            if tag == sdid:
+                return value
+        return None
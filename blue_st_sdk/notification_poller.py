@@ -0,0 +1,276 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""notification_poller
+
+The notification_poller module contains a poller that waits for the
+notifications of many nodes at once on a single thread.
+
+Instead of calling :meth:`blue_st_sdk.node.Node.wait_for_notifications()` on
+each node in turn, which makes the latency grow with the number of nodes, the
+poller waits on the file descriptors of all the nodes through "epoll" (or
+"select" where "epoll" is not available) and dispatches the notifications of
+the nodes that are ready only.
+"""
+
+
+# IMPORT
+
+import errno
+import logging
+import os
+import select
+import threading
+from bluepy.btle import BTLEException
+
+from blue_st_sdk.utils.blue_st_exceptions import InvalidOperationException
+
+
+# DEFINITIONS
+
+DISPATCH_TIMEOUT_s = 0.001
+"""Time in seconds given to a ready node to deliver its notification."""
+
+POLL_TIMEOUT_s_DEFAULT = 1.0
+"""Default time in seconds the polling thread waits before checking whether it
+has to stop."""
+
+
+# CLASSES
+
+class NotificationPoller(object):
+    """Class that waits for the notifications of many nodes at once.
+
+    Any object exposing the "fileno()" and "wait_for_notifications()" methods
+    of the :class:`blue_st_sdk.node.Node` class can be polled, e.g. nodes of
+    simulated transports; "wait_for_notifications(0)" must not block.
+
+    The poller can be driven by the application, calling :meth:`poll()`, or by
+    a thread of its own, through :meth:`start()` and :meth:`stop()`.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self._nodes = {}
+        """Dictionary that maps file descriptors to nodes."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the dictionary of nodes."""
+
+        self._wake_up = os.pipe()
+        """Pipe waking up the poller when the nodes change or when stopping."""
+
+        self._epoll = select.epoll() if hasattr(select, 'epoll') else None
+        """"epoll" object, "None" if "epoll" is not available."""
+        if self._epoll is not None:
+            self._epoll.register(self._wake_up[0], select.EPOLLIN)
+
+        self._thread = None
+        """Polling thread."""
+
+        self._stopped = threading.Event()
+        """Event stopping the polling thread."""
+
+        self._logger = logging.getLogger('BlueSTSDK')
+
+    def add_node(self, node):
+        """Add a node to poll.
+
+        The node must be connected. If the node reconnects, it has to be added
+        again, as its file descriptor changes.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidOperationException`
+                is raised if the node is not connected.
+        """
+        fd = node.fileno()
+        if fd is None:
+            raise InvalidOperationException(
+                ' The node must be connected to be polled.')
+        with self._lock:
+            # Dropping the previous registrations of the node and the stale
+            # ones of the file descriptor, which may have been closed and
+            # reused.
+            for (old_fd, old_node) in list(self._nodes.items()):
+                if old_node is node or old_fd == fd:
+                    self._unregister(old_fd)
+            if self._epoll is not None:
+                self._epoll.register(fd, select.EPOLLIN)
+            self._nodes[fd] = node
+        self._signal()
+
+    def remove_node(self, node):
+        """Remove a node.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with self._lock:
+            for (fd, old_node) in list(self._nodes.items()):
+                if old_node is node:
+                    self._unregister(fd)
+        self._signal()
+
+    def _unregister(self, fd):
+        """Stop polling a file descriptor.
+
+        To be called while holding the lock.
+
+        Args:
+            fd (int): The file descriptor.
+        """
+        del self._nodes[fd]
+        if self._epoll is not None:
+            try:
+                self._epoll.unregister(fd)
+            except (IOError, OSError, ValueError):
+                # The file descriptor has already been closed.
+                pass
+
+    def get_nodes(self):
+        """Get the polled nodes.
+
+        Returns:
+            list: The polled nodes.
+        """
+        with self._lock:
+            return list(self._nodes.values())
+
+    def _signal(self):
+        """Wake up the poller."""
+        try:
+            os.write(self._wake_up[1], b'w')
+        except OSError:
+            pass
+
+    def _wait(self, timeout_s):
+        """Wait until some file descriptors are ready.
+
+        Args:
+            timeout_s (float): Time in seconds to wait, "None" to wait
+                indefinitely.
+
+        Returns:
+            list: The file descriptors ready.
+        """
+        try:
+            if self._epoll is not None:
+                return [fd for (fd, event) in self._epoll.poll(
+                    -1 if timeout_s is None else timeout_s)]
+            with self._lock:
+                fds = list(self._nodes.keys())
+            return select.select(
+                fds + [self._wake_up[0]], [], [], timeout_s)[0]
+        except (IOError, OSError, select.error) as e:
+            if e.args and e.args[0] == errno.EINTR:
+                return []
+            raise
+
+    def poll(self, timeout_s=None):
+        """Wait for the notifications of the polled nodes, and dispatch them to
+        their delegates.
+
+        Nodes raising an exception while dispatching (e.g. because
+        disconnected) are removed.
+
+        Args:
+            timeout_s (float, optional): Time in seconds to wait, "None" to wait
+                indefinitely.
+
+        Returns:
+            int: The number of nodes whose notifications have been dispatched.
+        """
+        dispatched = 0
+        for fd in self._wait(timeout_s):
+            if fd == self._wake_up[0]:
+                os.read(fd, 4096)
+                continue
+            with self._lock:
+                node = self._nodes.get(fd)
+            if node is None:
+                continue
+            try:
+                if node.wait_for_notifications(DISPATCH_TIMEOUT_s):
+                    dispatched += 1
+                    # Draining the notifications already read from the file
+                    # descriptor, which does not signal them again.
+                    while node.wait_for_notifications(0):
+                        pass
+            except BTLEException as e:
+                self._logger.warning(str(e))
+                self.remove_node(node)
+        return dispatched
+
+    def start(self, timeout_s=POLL_TIMEOUT_s_DEFAULT):
+        """Start polling on a thread of the poller.
+
+        Args:
+            timeout_s (float, optional): Maximum time in seconds the polling
+                thread waits before checking whether it has to stop.
+        """
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, args=(timeout_s,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, timeout_s):
+        """Body of the polling thread.
+
+        Args:
+            timeout_s (float): Maximum time in seconds to wait at each step.
+        """
+        while not self._stopped.is_set():
+            self.poll(timeout_s)
+
+    def stop(self):
+        """Stop the polling thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopped.set()
+        self._signal()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def close(self):
+        """Stop the polling thread and release the resources of the poller."""
+        self.stop()
+        with self._lock:
+            for fd in list(self._nodes.keys()):
+                self._unregister(fd)
+        if self._epoll is not None:
+            self._epoll.close()
+        for fd in self._wake_up:
+            os.close(fd)
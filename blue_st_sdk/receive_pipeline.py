@@ -0,0 +1,424 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""receive_pipeline
+
+The receive_pipeline module contains a staged pipeline that decouples the
+reception of the notifications of the nodes from their decoding.
+
+The receiving thread of a node (the one waiting for notifications) only
+timestamps the raw notifications and enqueues them into a preallocated ring of
+the node, while a separate decode thread drains the rings in batches and hands
+the notifications over to the handlers of the nodes, which decode them and
+notify the listeners. A decoding spike thus delays the decode stage only,
+leaving the receiving thread free to drain the Bluetooth socket.
+
+The depth of the rings and the latency of the decode stage, i.e. the time from
+reception to dispatching, are observable through the statistics of the
+pipeline.
+"""
+
+
+# IMPORT
+
+import logging
+import threading
+import time
+
+from blue_st_sdk.utils.blue_st_exceptions import InvalidDataException
+
+
+# DEFINITIONS
+
+CAPACITY_DEFAULT = 1024
+"""Default number of raw notifications a ring of a node can hold."""
+
+BATCH_SIZE_DEFAULT = 64
+"""Default maximum number of notifications of a node decoded in a batch."""
+
+
+# CLASSES
+
+class ReceivePipeline(object):
+    """Pipeline decoding the notifications of the nodes on a decode thread.
+
+    Nodes are added to the pipeline once connected; from then on, their
+    notifications are enqueued by the receiving thread and decoded by the decode
+    thread of the pipeline, while reads requested by the application are still
+    decoded synchronously.
+    """
+
+    def __init__(self, capacity=CAPACITY_DEFAULT, batch_size=BATCH_SIZE_DEFAULT,
+        drop_when_full=True):
+        """Constructor.
+
+        Args:
+            capacity (int, optional): Number of raw notifications the ring of
+                each node can hold.
+            batch_size (int, optional): Maximum number of notifications of a
+                node decoded in a batch.
+            drop_when_full (bool, optional): If True the notifications are
+                dropped when the ring of a node is full, otherwise the receiving
+                thread waits for the decode stage.
+        """
+        self._capacity = capacity
+        """Number of raw notifications the ring of each node can hold."""
+
+        self._batch_size = batch_size
+        """Maximum number of notifications of a node decoded in a batch."""
+
+        self._drop_when_full = drop_when_full
+        """If True the notifications are dropped when a ring is full."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the rings."""
+
+        self._ready = threading.Condition(self._lock)
+        """Condition signalling new notifications to the decode thread."""
+
+        self._idle = threading.Condition(self._lock)
+        """Condition signalling the progress of the decode thread."""
+
+        self._rings = {}
+        """Dictionary that maps nodes to their rings."""
+
+        self._busy = False
+        """True while the decode thread is dispatching a batch."""
+
+        self._stopped = False
+        """True once the pipeline has been closed."""
+
+        self._received = 0
+        """Number of notifications received."""
+
+        self._dropped = 0
+        """Number of notifications dropped because a ring was full."""
+
+        self._max_depth = 0
+        """Maximum number of notifications waiting in a ring."""
+
+        self._dispatched = 0
+        """Number of notifications dequeued and dispatched."""
+
+        self._decoded = 0
+        """Number of notifications decoded and dispatched."""
+
+        self._errors = 0
+        """Number of notifications whose decoding or dispatching failed."""
+
+        self._batches = 0
+        """Number of batches decoded."""
+
+        self._latency_sum_s = 0.0
+        """Sum of the latencies of the decode stage, in seconds."""
+
+        self._max_latency_s = 0.0
+        """Maximum latency of the decode stage, in seconds."""
+
+        self._logger = logging.getLogger('BlueSTSDK')
+        """Logger."""
+
+        self._decoder = threading.Thread(target=self._decode)
+        """Thread decoding the notifications."""
+        self._decoder.daemon = True
+        self._decoder.start()
+
+    def add_node(self, node):
+        """Decode the notifications of a node through the pipeline.
+
+        To be called once the node is connected.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with self._lock:
+            if node in self._rings:
+                return
+            ring = _RawPacketRing(self, node, self._capacity)
+            self._rings[node] = ring
+        node._raw_packet_ring = ring
+
+    def remove_node(self, node):
+        """Decode the notifications of a node on the receiving thread again.
+
+        The notifications already enqueued are decoded before returning.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        if node not in self._rings:
+            return
+        self.flush()
+        node._raw_packet_ring = None
+        self.flush()
+        with self._lock:
+            self._rings.pop(node, None)
+
+    def get_queue_depth(self, node):
+        """Get the number of notifications of a node waiting to be decoded.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+
+        Returns:
+            int: The number of notifications enqueued, 0 if the node has not
+            been added to the pipeline.
+        """
+        with self._lock:
+            ring = self._rings.get(node)
+            return ring.get_depth() if ring is not None else 0
+
+    def flush(self, timeout=None):
+        """Wait for the notifications enqueued to be decoded.
+
+        Args:
+            timeout (float, optional): Maximum time in seconds to wait, no limit
+                if not given.
+
+        Returns:
+            bool: True if all the notifications have been decoded, False if the
+            timeout expired.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._lock:
+            while self._busy or \
+                any(ring.get_depth() for ring in self._rings.values()):
+                if self._stopped and not self._decoder.is_alive():
+                    return False
+                if deadline is None:
+                    self._idle.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._idle.wait(remaining)
+        return True
+
+    def _decode(self):
+        """Body of the thread decoding the notifications."""
+        while True:
+            with self._lock:
+                self._busy = False
+                self._idle.notify_all()
+                batches = []
+                while True:
+                    for ring in list(self._rings.values()):
+                        batch = ring.get_batch(self._batch_size)
+                        if batch:
+                            batches.append((ring, batch))
+                    if batches or self._stopped:
+                        break
+                    self._ready.wait()
+                if not batches:
+                    return
+                self._busy = True
+            for (ring, batch) in batches:
+                self._dispatch(ring.get_node(), batch)
+
+    def _dispatch(self, node, batch):
+        """Hand a batch of notifications over to the handlers of a node.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+            batch (list): List of (characteristic's handle, raw data, reception
+                time) tuples.
+        """
+        for (char_handle, data, receive_time) in batch:
+            handler = node._notification_handlers_dict.get(char_handle)
+            if handler is not None:
+                try:
+                    handler(data, receive_time)
+                    self._decoded += 1
+                except InvalidDataException as e:
+                    self._errors += 1
+                    self._logger.warning(str(e))
+                except Exception as e:
+                    # Keeping the decode thread alive whatever a listener
+                    # raises.
+                    self._errors += 1
+                    self._logger.warning(
+                        'Handling a notification of node "%s" failed: %r' \
+                        % (node.get_name(), e))
+            latency = time.time() - receive_time
+            self._latency_sum_s += latency
+            if latency > self._max_latency_s:
+                self._max_latency_s = latency
+        self._dispatched += len(batch)
+        self._batches += 1
+
+    def get_statistics(self):
+        """Get the statistics of the pipeline.
+
+        Returns:
+            dict: A dictionary with the number of notifications received
+            ("received"), dropped because a ring was full ("dropped"), decoded
+            and dispatched ("decoded"), whose decoding or dispatching failed
+            ("errors"), the number of batches decoded ("batches"), the current
+            and maximum depth of the rings ("depth" and "max_depth"), and the
+            mean and maximum latency in seconds of the decode stage
+            ("mean_latency_s" and "max_latency_s").
+        """
+        with self._lock:
+            return {
+                'received': self._received,
+                'dropped': self._dropped,
+                'decoded': self._decoded,
+                'errors': self._errors,
+                'batches': self._batches,
+                'depth': sum(ring.get_depth() for ring in self._rings.values()),
+                'max_depth': self._max_depth,
+                'mean_latency_s': self._latency_sum_s / self._dispatched \
+                    if self._dispatched > 0 else 0.0,
+                'max_latency_s': self._max_latency_s
+            }
+
+    def close(self):
+        """Decode the pending notifications and stop the decode thread."""
+        for node in list(self._rings.keys()):
+            self.remove_node(node)
+        with self._lock:
+            self._stopped = True
+            self._ready.notify_all()
+        self._decoder.join()
+
+
+class _RawPacketRing(object):
+    """Preallocated ring of the raw notifications of a node.
+
+    Notifications are enqueued by the receiving thread of the node and dequeued
+    in batches by the decode thread of the pipeline, both holding the lock of
+    the pipeline.
+    """
+
+    def __init__(self, pipeline, node, capacity):
+        """Constructor.
+
+        Args:
+            pipeline (:class:`blue_st_sdk.receive_pipeline.ReceivePipeline`):
+                The pipeline the ring belongs to.
+            node (:class:`blue_st_sdk.node.Node`): Node whose notifications are
+                enqueued.
+            capacity (int): Number of raw notifications the ring can hold.
+        """
+        self._pipeline = pipeline
+        """Pipeline the ring belongs to."""
+
+        self._node = node
+        """Node whose notifications are enqueued."""
+
+        self._capacity = capacity
+        """Number of raw notifications the ring can hold."""
+
+        self._handles = [0] * capacity
+        """Characteristics' handles of the notifications."""
+
+        self._data = [None] * capacity
+        """Raw data of the notifications."""
+
+        self._times = [0.0] * capacity
+        """Reception times of the notifications, in seconds since the epoch."""
+
+        self._head = 0
+        """Number of notifications enqueued."""
+
+        self._tail = 0
+        """Number of notifications dequeued."""
+
+    def get_node(self):
+        """Get the node whose notifications are enqueued.
+
+        Returns:
+            :class:`blue_st_sdk.node.Node`: The node.
+        """
+        return self._node
+
+    def get_depth(self):
+        """Get the number of notifications waiting in the ring.
+
+        Returns:
+            int: The number of notifications waiting in the ring.
+        """
+        return self._head - self._tail
+
+    def put(self, char_handle, data, receive_time):
+        """Enqueue a raw notification.
+
+        To be called by the receiving thread of the node.
+
+        Args:
+            char_handle (int): The characteristic's handle.
+            data (str): The raw data.
+            receive_time (float): Reception time in seconds since the epoch.
+
+        Returns:
+            bool: True if the notification has been enqueued, False if it has
+            been dropped.
+        """
+        pipeline = self._pipeline
+        with pipeline._lock:
+            pipeline._received += 1
+            depth = self._head - self._tail
+            while depth >= self._capacity:
+                if pipeline._drop_when_full or pipeline._stopped:
+                    pipeline._dropped += 1
+                    return False
+                pipeline._idle.wait()
+                depth = self._head - self._tail
+            index = self._head % self._capacity
+            self._handles[index] = char_handle
+            self._data[index] = data
+            self._times[index] = receive_time
+            self._head += 1
+            if depth >= pipeline._max_depth:
+                pipeline._max_depth = depth + 1
+            if depth == 0:
+                pipeline._ready.notify()
+        return True
+
+    def get_batch(self, batch_size):
+        """Dequeue a batch of raw notifications.
+
+        To be called by the decode thread of the pipeline, holding its lock.
+
+        Args:
+            batch_size (int): Maximum number of notifications to dequeue.
+
+        Returns:
+            list: List of (characteristic's handle, raw data, reception time)
+            tuples.
+        """
+        count = min(self._head - self._tail, batch_size)
+        batch = []
+        for i in range(self._tail, self._tail + count):
+            index = i % self._capacity
+            batch.append((self._handles[index], self._data[index],
+                self._times[index]))
+            self._data[index] = None
+        self._tail += count
+        return batch
@@ -0,0 +1,424 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""reconnection_supervisor
+
+The reconnection_supervisor module contains a supervisor that reconnects the
+nodes whose link is lost unexpectedly, and brings them back to the state they
+were in.
+
+A link is considered lost when waiting for the notifications of a node raises
+an exception, or when a node whose notifications are enabled stays silent for
+longer than a given timeout. The supervisor then reconnects the node with a
+jittered exponential backoff, resets the unwrapping of its timestamps, and
+enables again the notifications of the features that were notifying.
+"""
+
+
+# IMPORT
+
+from collections import deque
+import logging
+import random
+import threading
+import time
+from bluepy.btle import BTLEException
+
+from blue_st_sdk.node import NodeListener
+from blue_st_sdk.node import NodeStatus
+
+
+# DEFINITIONS
+
+INITIAL_DELAY_s_DEFAULT = 0.5
+"""Default delay in seconds before the first reconnection attempt."""
+
+MAX_DELAY_s_DEFAULT = 30.0
+"""Default maximum delay in seconds between two reconnection attempts."""
+
+MULTIPLIER_DEFAULT = 2.0
+"""Default factor the delay grows by after each failed attempt."""
+
+JITTER_DEFAULT = 0.5
+"""Default fraction of the delay randomly subtracted from it, so that many
+nodes lost together do not reconnect all at once."""
+
+CHECK_PERIOD_s_DEFAULT = 0.5
+"""Default time in seconds between two checks of the supervised nodes."""
+
+_LATENCIES_SIZE = 1000
+"""Number of reconnection latencies kept."""
+
+
+# CLASSES
+
+class ReconnectionSupervisor(NodeListener):
+    """Supervisor reconnecting the nodes whose link is lost unexpectedly.
+
+    The supervisor reacts to the nodes moving to the
+    :attr:`blue_st_sdk.node.NodeStatus.UNREACHABLE` status; nodes disconnected
+    through :meth:`blue_st_sdk.node.Node.disconnect()` are left alone.
+    """
+
+    def __init__(self, initial_delay_s=INITIAL_DELAY_s_DEFAULT,
+        max_delay_s=MAX_DELAY_s_DEFAULT, multiplier=MULTIPLIER_DEFAULT,
+        jitter=JITTER_DEFAULT, max_attempts=None, notification_timeout_s=None,
+        poller=None, check_period_s=CHECK_PERIOD_s_DEFAULT):
+        """Constructor.
+
+        Args:
+            initial_delay_s (float, optional): Delay in seconds before the first
+                reconnection attempt.
+            max_delay_s (float, optional): Maximum delay in seconds between two
+                reconnection attempts.
+            multiplier (float, optional): Factor the delay grows by after each
+                failed attempt.
+            jitter (float, optional): Fraction of the delay randomly subtracted
+                from it, between 0 and 1.
+            max_attempts (int, optional): Number of failed attempts after which
+                a node is given up, "None" to retry forever.
+            notification_timeout_s (float, optional): Time in seconds without
+                notifications after which the link to a node whose
+                notifications are enabled is considered lost, "None" to rely on
+                the exceptions only.
+            poller (:class:`blue_st_sdk.notification_poller.NotificationPoller`,
+                optional): Poller the supervised nodes are polled by, to which
+                they are added again once reconnected.
+            check_period_s (float, optional): Time in seconds between two checks
+                of the supervised nodes.
+        """
+        self._initial_delay_s = initial_delay_s
+        """Delay in seconds before the first reconnection attempt."""
+
+        self._max_delay_s = max_delay_s
+        """Maximum delay in seconds between two reconnection attempts."""
+
+        self._multiplier = multiplier
+        """Factor the delay grows by after each failed attempt."""
+
+        self._jitter = jitter
+        """Fraction of the delay randomly subtracted from it."""
+
+        self._max_attempts = max_attempts
+        """Number of failed attempts after which a node is given up."""
+
+        self._notification_timeout_s = notification_timeout_s
+        """Time in seconds without notifications after which a link is
+        considered lost."""
+
+        self._poller = poller
+        """Poller the supervised nodes are polled by."""
+
+        self._check_period_s = check_period_s
+        """Time in seconds between two checks of the supervised nodes."""
+
+        self._nodes = {}
+        """Dictionary that maps the supervised nodes to their
+        :class:`blue_st_sdk.reconnection_supervisor._Reconnection` object, or to
+        "None" if their link is up."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the dictionary of nodes."""
+
+        self._link_losses = 0
+        """Number of link losses detected."""
+
+        self._reconnections = 0
+        """Number of successful reconnections."""
+
+        self._failed_attempts = 0
+        """Number of failed reconnection attempts."""
+
+        self._given_up = 0
+        """Number of nodes given up."""
+
+        self._latencies = deque(maxlen=_LATENCIES_SIZE)
+        """Latest reconnection latencies in seconds, from the loss of the link
+        to the restoration of the notifications."""
+
+        self._wake_up = threading.Event()
+        """Event waking up the supervising thread."""
+
+        self._stopped = threading.Event()
+        """Event stopping the supervising thread."""
+
+        self._thread = threading.Thread(target=self._run)
+        """Supervising thread."""
+        self._thread.daemon = True
+        self._thread.start()
+
+        self._logger = logging.getLogger('BlueSTSDK')
+
+    def add_node(self, node):
+        """Supervise a node.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with self._lock:
+            if node in self._nodes:
+                return
+            self._nodes[node] = None
+        node.add_listener(self)
+        if node.get_status() == NodeStatus.UNREACHABLE:
+            self._on_link_lost(node)
+
+    def remove_node(self, node):
+        """Stop supervising a node.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        node.remove_listener(self)
+        with self._lock:
+            self._nodes.pop(node, None)
+
+    def get_nodes(self):
+        """Get the supervised nodes.
+
+        Returns:
+            list: The supervised nodes.
+        """
+        with self._lock:
+            return list(self._nodes.keys())
+
+    def on_status_change(self, node, new_status, old_status):
+        """To be called whenever a node changes its status.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): Node that has changed its
+                status.
+            new_status (str): New status.
+            old_status (str): Old status.
+        """
+        if new_status == NodeStatus.UNREACHABLE.value:
+            self._on_link_lost(node)
+
+    def _on_link_lost(self, node):
+        """Schedule the reconnection of a node whose link has been lost.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+        """
+        with self._lock:
+            if node not in self._nodes or self._nodes[node] is not None:
+                return
+            self._nodes[node] = _Reconnection(node, self._initial_delay_s)
+            self._link_losses += 1
+        if self._poller is not None:
+            self._poller.remove_node(node)
+        self._logger.warning('Link to node %s lost.' % node.get_tag())
+        self._wake_up.set()
+
+    def _check_notifications(self):
+        """Declare lost the links of the nodes silent for too long."""
+        if self._notification_timeout_s is None:
+            return
+        now = time.time()
+        with self._lock:
+            nodes = [node for (node, reconnection) in self._nodes.items()
+                if reconnection is None and node.is_connected()]
+        for node in nodes:
+            if not [feature for feature in node.get_features()
+                if feature.is_notifying()]:
+                continue
+            last_time = node.get_last_notification_time()
+            if last_time is None:
+                # Waiting a full timeout since the check started.
+                node._last_notification_time = now
+            elif now - last_time > self._notification_timeout_s:
+                if self._poller is not None:
+                    self._poller.remove_node(node)
+                node._handle_link_loss()
+
+    def _run(self):
+        """Body of the supervising thread."""
+        while not self._stopped.is_set():
+            self._wake_up.wait(self._get_next_wait_s())
+            self._wake_up.clear()
+            if self._stopped.is_set():
+                return
+            self._check_notifications()
+            now = time.time()
+            with self._lock:
+                due = [reconnection for reconnection in self._nodes.values()
+                    if reconnection is not None
+                    and reconnection.next_attempt_time <= now]
+            for reconnection in due:
+                self._reconnect(reconnection)
+
+    def _get_next_wait_s(self):
+        """Get the time to wait before the next check or attempt.
+
+        Returns:
+            float: The time in seconds to wait.
+        """
+        wait_s = self._check_period_s
+        now = time.time()
+        with self._lock:
+            for reconnection in self._nodes.values():
+                if reconnection is not None:
+                    wait_s = min(wait_s,
+                        max(0, reconnection.next_attempt_time - now))
+        return wait_s
+
+    def _reconnect(self, reconnection):
+        """Attempt to reconnect a node.
+
+        Args:
+            reconnection (:class:`blue_st_sdk.reconnection_supervisor._Reconnection`):
+                The reconnection of the node.
+        """
+        node = reconnection.node
+        try:
+            node.connect()
+            if not node.is_connected():
+                raise BTLEException(BTLEException.DISCONNECTED,
+                    'Failed to connect to peripheral %s' % node.get_tag())
+            node._unwrap_timestamp.reset()
+            node.enable_notifications_bulk(reconnection.features)
+        except BTLEException as e:
+            # Releasing what the failed attempt may have left open.
+            node._handle_link_loss()
+            self._on_attempt_failed(reconnection, str(e))
+            return
+        except Exception as e:
+            # Any other error (e.g. of the GATT cache or of the transport) fails
+            # the attempt too, without stopping the supervision of the nodes.
+            self._logger.warning('Reconnecting node %s failed: %r'
+                % (node.get_tag(), e))
+            node._handle_link_loss()
+            self._on_attempt_failed(reconnection, repr(e))
+            return
+        latency_s = time.time() - reconnection.lost_time
+        with self._lock:
+            if self._nodes.get(node) is not reconnection:
+                return
+            self._nodes[node] = None
+            self._reconnections += 1
+            self._latencies.append(latency_s)
+        if self._poller is not None:
+            self._poller.add_node(node)
+        self._logger.info('Node %s reconnected in %.3f s.'
+            % (node.get_tag(), latency_s))
+
+    def _on_attempt_failed(self, reconnection, message):
+        """Schedule the next attempt to reconnect a node, or give it up.
+
+        Args:
+            reconnection (:class:`blue_st_sdk.reconnection_supervisor._Reconnection`):
+                The reconnection of the node.
+            message (str): Reason of the failure.
+        """
+        with self._lock:
+            self._failed_attempts += 1
+            reconnection.attempts += 1
+            if self._max_attempts is not None \
+                and reconnection.attempts >= self._max_attempts:
+                self._given_up += 1
+                self._nodes.pop(reconnection.node, None)
+                self._logger.warning('Giving up node %s: %s'
+                    % (reconnection.node.get_tag(), message))
+                return
+            reconnection.delay_s = min(self._max_delay_s,
+                reconnection.delay_s * self._multiplier)
+            reconnection.next_attempt_time = time.time() \
+                + reconnection.delay_s * (1 - self._jitter * random.random())
+
+    def get_statistics(self):
+        """Get the statistics of the supervisor.
+
+        Returns:
+            dict: A dictionary with the number of link losses detected
+            ("link_losses"), of successful reconnections ("reconnections"), of
+            failed reconnection attempts ("failed_attempts"), of nodes given up
+            ("given_up"), and the mean and maximum reconnection latency in
+            seconds ("mean_latency_s", "max_latency_s", "None" if no node has
+            reconnected yet).
+        """
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                'link_losses': self._link_losses,
+                'reconnections': self._reconnections,
+                'failed_attempts': self._failed_attempts,
+                'given_up': self._given_up,
+                'mean_latency_s': sum(latencies) / len(latencies)
+                    if latencies else None,
+                'max_latency_s': max(latencies) if latencies else None
+            }
+
+    def get_latencies(self):
+        """Get the latest reconnection latencies.
+
+        Returns:
+            list: The latest reconnection latencies in seconds, from the loss of
+            the link to the restoration of the notifications.
+        """
+        with self._lock:
+            return list(self._latencies)
+
+    def close(self):
+        """Stop supervising the nodes."""
+        for node in self.get_nodes():
+            self.remove_node(node)
+        self._stopped.set()
+        self._wake_up.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+class _Reconnection(object):
+    """Reconnection of a node in progress."""
+
+    def __init__(self, node, delay_s):
+        """Constructor.
+
+        Args:
+            node (:class:`blue_st_sdk.node.Node`): The node.
+            delay_s (float): Delay in seconds before the first attempt.
+        """
+        self.node = node
+        """The node."""
+
+        self.features = [feature for feature in node.get_features()
+            if feature.is_notifying()]
+        """Features whose notifications have to be enabled again."""
+
+        self.lost_time = time.time()
+        """Time, in seconds since the epoch, the link has been lost."""
+
+        self.attempts = 0
+        """Number of failed attempts."""
+
+        self.delay_s = delay_s
+        """Current delay in seconds between two attempts."""
+
+        self.next_attempt_time = self.lost_time + delay_s
+        """Time, in seconds since the epoch, of the next attempt."""
@@ -0,0 +1,161 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""scan_filter
+
+The scan_filter module contains declarative filters applied to the advertising
+data of the devices while discovering them, before any node is built.
+"""
+
+
+# IMPORT
+
+import re
+
+from blue_st_sdk.utils.ble_advertising_data_parser import BLEAdvertisingDataParser
+
+
+# CLASSES
+
+class ScanFilter(object):
+    """Filter of the devices discovered by the
+    :class:`blue_st_sdk.manager.Manager`.
+
+    A device passes the filter if it satisfies all the given criteria. The
+    criteria are checked on the raw scan entry, from the cheapest to the most
+    expensive one, so that discarding a device costs almost nothing and does not
+    require parsing its advertising data.
+    """
+
+    _COMPLETE_LOCAL_NAME = 0x09
+    """Code identifier for the complete local name."""
+
+    _MANUFACTURER_SPECIFIC_DATA = 0xFF
+    """Code identifier for the manufacturer data."""
+
+    def __init__(self, mac_addresses=None, mac_prefixes=None, node_types=None,
+        device_ids=None, feature_mask=None, name_pattern=None, min_rssi=None):
+        """Constructor.
+
+        Args:
+            mac_addresses (list, optional): MAC addresses of the devices
+                allowed.
+            mac_prefixes (list, optional): Prefixes of the MAC addresses of the
+                devices allowed (e.g. "c0:85").
+            node_types (list, optional): Types of the devices allowed (list of
+                :class:`blue_st_sdk.node.NodeType` objects).
+            device_ids (list, optional): Identifiers of the devices allowed.
+            feature_mask (int, optional): Bits of the feature mask the devices
+                must advertise.
+            name_pattern (str, optional): Regular expression the name of the
+                devices must contain a match of.
+            min_rssi (int, optional): Minimum RSSI of the advertising data.
+        """
+        self._mac_addresses = frozenset([address.lower()
+            for address in mac_addresses]) if mac_addresses else None
+        """MAC addresses of the devices allowed, None if any."""
+
+        self._mac_prefixes = tuple([prefix.lower()
+            for prefix in mac_prefixes]) if mac_prefixes else None
+        """Prefixes of the MAC addresses of the devices allowed, None if any."""
+
+        self._node_types = frozenset(node_types) if node_types else None
+        """Types of the devices allowed, None if any."""
+
+        self._device_ids = frozenset(device_ids) if device_ids else None
+        """Identifiers of the devices allowed, None if any."""
+
+        self._feature_mask = feature_mask
+        """Bits of the feature mask the devices must advertise, None if any."""
+
+        self._name_pattern = re.compile(name_pattern) \
+            if name_pattern is not None else None
+        """Regular expression the name of the devices must contain a match of,
+        None if any."""
+
+        self._min_rssi = min_rssi
+        """Minimum RSSI of the advertising data, None if any."""
+
+        self._needs_manufacturer_data = node_types is not None \
+            or device_ids is not None or feature_mask is not None
+        """Tells whether the manufacturer specific data have to be checked."""
+
+    def matches(self, scan_entry):
+        """Check whether a discovered device passes the filter.
+
+        Args:
+            scan_entry (ScanEntry): BLE device. It contains device information
+                and advertising data. Refer to
+                `ScanEntry <https://ianharvey.github.io/bluepy-doc/scanentry.html>`_
+                for more information.
+
+        Returns:
+            bool: True if the device satisfies all the criteria, False
+            otherwise.
+        """
+        # Checking the address and the RSSI, already available.
+        if self._mac_addresses is not None or self._mac_prefixes is not None:
+            address = scan_entry.addr.lower()
+            if self._mac_addresses is not None \
+                and address not in self._mac_addresses:
+                return False
+            if self._mac_prefixes is not None \
+                and not address.startswith(self._mac_prefixes):
+                return False
+        if self._min_rssi is not None and scan_entry.rssi < self._min_rssi:
+            return False
+
+        # Checking the name.
+        if self._name_pattern is not None:
+            name = scan_entry.getValueText(self._COMPLETE_LOCAL_NAME)
+            if name is None or not self._name_pattern.search(name):
+                return False
+
+        # Checking the fields of the manufacturer specific data.
+        if self._needs_manufacturer_data:
+            data = scan_entry.getValueText(self._MANUFACTURER_SPECIFIC_DATA)
+            if data is None or len(data) < 12:
+                return False
+            try:
+                device_id = BLEAdvertisingDataParser._get_device_id(
+                    int(data[2:4], 16))
+                feature_mask = int(data[4:12], 16)
+            except ValueError:
+                return False
+            if self._device_ids is not None \
+                and device_id not in self._device_ids:
+                return False
+            if self._feature_mask is not None \
+                and feature_mask & self._feature_mask != self._feature_mask:
+                return False
+            if self._node_types is not None \
+                and BLEAdvertisingDataParser._get_node_type(device_id) \
+                not in self._node_types:
+                return False
+        return True
@@ -0,0 +1,284 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""scan_scheduler
+
+The scan_scheduler module contains a scheduler adapting the duty cycle of the
+discovery process to the churn of the devices around.
+
+Scanning continuously costs CPU and radio time even when the set of devices has
+been stable for long. The scheduler splits the scanning into cycles made of a
+scanning window followed by an idle time, measures the rate of the new devices
+and of the significant changes of the advertising data (feature mask, sleeping
+status) during each cycle, and shortens the cycles and lengthens the windows
+when the churn is high, or the other way round when it is low, within the
+configured bounds.
+"""
+
+
+# IMPORT
+
+import threading
+
+
+# DEFINITIONS
+
+MIN_WINDOW_s_DEFAULT = 1.0
+"""Default minimum scanning window in seconds."""
+
+MAX_WINDOW_s_DEFAULT = 5.0
+"""Default maximum scanning window in seconds."""
+
+MAX_INTERVAL_s_DEFAULT = 60.0
+"""Default maximum time in seconds between the start of two scanning windows."""
+
+LOW_CHURN_RATE_DEFAULT = 0.02
+"""Default rate of events per second below which the scanning slows down."""
+
+HIGH_CHURN_RATE_DEFAULT = 0.2
+"""Default rate of events per second above which the scanning speeds up."""
+
+FACTOR_DEFAULT = 2.0
+"""Default factor windows and intervals are scaled by at each adjustment."""
+
+
+# CLASSES
+
+class AdaptiveScanScheduler(object):
+    """Scheduler adapting the duty cycle of the discovery process to the churn
+    of the devices.
+
+    The scheduler starts scanning continuously, i.e. with a window as long as
+    the interval; it is set through
+    :meth:`blue_st_sdk.manager.Manager.set_scan_scheduler()`, and it is driven
+    by the discovery process, which reports the events through
+    :meth:`on_discovery()` and :meth:`on_advertisement_change()`, and the end of
+    each cycle through :meth:`end_cycle()`. The scheduler does not measure the
+    time by itself, so that it can be driven over a virtual time too.
+    """
+
+    def __init__(self, min_window_s=MIN_WINDOW_s_DEFAULT,
+        max_window_s=MAX_WINDOW_s_DEFAULT, max_interval_s=MAX_INTERVAL_s_DEFAULT,
+        low_churn_rate=LOW_CHURN_RATE_DEFAULT,
+        high_churn_rate=HIGH_CHURN_RATE_DEFAULT, factor=FACTOR_DEFAULT):
+        """Constructor.
+
+        Args:
+            min_window_s (float, optional): Minimum scanning window in seconds.
+            max_window_s (float, optional): Maximum scanning window in seconds.
+            max_interval_s (float, optional): Maximum time in seconds between
+                the start of two scanning windows.
+            low_churn_rate (float, optional): Rate of events per second below
+                which the scanning slows down.
+            high_churn_rate (float, optional): Rate of events per second above
+                which the scanning speeds up.
+            factor (float, optional): Factor windows and intervals are scaled by
+                at each adjustment, greater than 1.
+
+        Raises:
+            :exc:`ValueError` is raised if the bounds are not consistent.
+        """
+        if not 0 < min_window_s <= max_window_s <= max_interval_s:
+            raise ValueError('The scanning windows must be positive and not '
+                'longer than the maximum interval.')
+        if not 0 <= low_churn_rate <= high_churn_rate:
+            raise ValueError('The low churn rate must not exceed the high one.')
+        if factor <= 1:
+            raise ValueError('The factor must be greater than 1.')
+
+        self._min_window_s = float(min_window_s)
+        """Minimum scanning window in seconds."""
+
+        self._max_window_s = float(max_window_s)
+        """Maximum scanning window in seconds."""
+
+        self._max_interval_s = float(max_interval_s)
+        """Maximum time in seconds between the start of two scanning windows."""
+
+        self._low_churn_rate = low_churn_rate
+        """Rate of events per second below which the scanning slows down."""
+
+        self._high_churn_rate = high_churn_rate
+        """Rate of events per second above which the scanning speeds up."""
+
+        self._factor = factor
+        """Factor windows and intervals are scaled by at each adjustment."""
+
+        self._window_s = self._max_window_s
+        """Current scanning window in seconds."""
+
+        self._interval_s = self._max_window_s
+        """Current time in seconds between the start of two scanning windows."""
+
+        self._discoveries = 0
+        """New devices found during the current cycle."""
+
+        self._changes = 0
+        """Significant changes of the advertising data during the current
+        cycle."""
+
+        self._discovery_rate = 0.0
+        """New devices per second during the last cycle."""
+
+        self._change_rate = 0.0
+        """Significant changes of the advertising data per second during the
+        last cycle."""
+
+        self._cycles = 0
+        """Number of cycles completed."""
+
+        self._scanning_time_s = 0.0
+        """Overall time in seconds spent scanning."""
+
+        self._elapsed_time_s = 0.0
+        """Overall time in seconds of the cycles completed."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the state of the scheduler."""
+
+    def reset(self):
+        """Go back to scanning continuously, forgetting the statistics."""
+        with self._lock:
+            self._window_s = self._max_window_s
+            self._interval_s = self._max_window_s
+            self._discoveries = 0
+            self._changes = 0
+            self._discovery_rate = 0.0
+            self._change_rate = 0.0
+            self._cycles = 0
+            self._scanning_time_s = 0.0
+            self._elapsed_time_s = 0.0
+
+    def on_discovery(self):
+        """Report a new device."""
+        with self._lock:
+            self._discoveries += 1
+
+    def on_advertisement_change(self):
+        """Report a significant change of the advertising data of a device,
+        i.e. of its feature mask or of its sleeping status."""
+        with self._lock:
+            self._changes += 1
+
+    def get_window_s(self):
+        """Get the current scanning window.
+
+        Returns:
+            float: The time in seconds to scan for at each cycle.
+        """
+        return self._window_s
+
+    def get_interval_s(self):
+        """Get the current scanning interval.
+
+        Returns:
+            float: The time in seconds between the start of two scanning
+            windows.
+        """
+        return self._interval_s
+
+    def get_idle_s(self):
+        """Get the current idle time.
+
+        Returns:
+            float: The time in seconds not to scan for at each cycle, after the
+            scanning window.
+        """
+        with self._lock:
+            return self._interval_s - self._window_s
+
+    def get_duty_cycle(self):
+        """Get the current duty cycle.
+
+        Returns:
+            float: The fraction of the time spent scanning, between 0 and 1.
+        """
+        with self._lock:
+            return self._window_s / self._interval_s
+
+    def end_cycle(self, scanning_s, idle_s):
+        """Close the current cycle and adjust the following ones to the churn
+        measured.
+
+        Args:
+            scanning_s (float): Time in seconds the cycle has been scanning for.
+            idle_s (float): Time in seconds the cycle has been idle for.
+
+        Returns:
+            float: The duty cycle of the following cycles.
+        """
+        with self._lock:
+            elapsed_s = scanning_s + idle_s
+            if elapsed_s <= 0:
+                return self._window_s / self._interval_s
+            self._discovery_rate = self._discoveries / float(elapsed_s)
+            self._change_rate = self._changes / float(elapsed_s)
+            self._discoveries = 0
+            self._changes = 0
+            self._cycles += 1
+            self._scanning_time_s += scanning_s
+            self._elapsed_time_s += elapsed_s
+
+            rate = self._discovery_rate + self._change_rate
+            if rate >= self._high_churn_rate:
+                # Scanning longer and more often.
+                self._window_s = min(self._window_s * self._factor,
+                    self._max_window_s)
+                self._interval_s = max(self._interval_s / self._factor,
+                    self._window_s)
+            elif rate <= self._low_churn_rate:
+                # Scanning shorter and less often.
+                self._window_s = max(self._window_s / self._factor,
+                    self._min_window_s)
+                self._interval_s = min(self._interval_s * self._factor,
+                    self._max_interval_s)
+            return self._window_s / self._interval_s
+
+    def get_statistics(self):
+        """Get the statistics of the scheduler.
+
+        Returns:
+            dict: A dictionary with the current scanning window ("window_s"),
+            interval ("interval_s"), and duty cycle ("duty_cycle"), the rates of
+            new devices ("discovery_rate") and of significant changes of the
+            advertising data ("change_rate") per second during the last cycle,
+            the number of cycles completed ("cycles"), and the fraction of their
+            time spent scanning ("mean_duty_cycle").
+        """
+        with self._lock:
+            return {
+                'window_s': self._window_s,
+                'interval_s': self._interval_s,
+                'duty_cycle': self._window_s / self._interval_s,
+                'discovery_rate': self._discovery_rate,
+                'change_rate': self._change_rate,
+                'cycles': self._cycles,
+                'mean_duty_cycle': self._scanning_time_s / self._elapsed_time_s
+                    if self._elapsed_time_s else 1.0
+            }
@@ -0,0 +1,1056 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""simulated_transport
+
+The simulated_transport module contains a transport that simulates Bluetooth
+Low Energy (BLE) devices following the BlueST protocol, so that applications
+and the SDK itself can be exercised without Bluetooth hardware.
+
+Simulated devices advertise a device identifier and a feature mask, export one
+characteristic for each feature, and notify data periodically for the
+characteristics whose notifications are enabled.
+Links to simulated devices can be dropped on demand or on schedule, to exercise
+the handling of link losses.
+"""
+
+
+# IMPORT
+
+from collections import deque
+import binascii
+import errno
+import fcntl
+import os
+import select
+import struct
+import threading
+import time
+from bluepy.btle import BTLEException
+from bluepy.btle import Characteristic
+from bluepy.btle import DefaultDelegate
+from bluepy.btle import Descriptor
+from bluepy.btle import Service
+
+import blue_st_sdk.manager
+from blue_st_sdk.node import Node
+from blue_st_sdk.transport import Transport
+from blue_st_sdk.utils.ble_node_definitions import BLENodeDefinitions
+
+
+# DEFINITIONS
+
+_SERVICE_DECLARATION_UUID = 0x2800
+"""UUID of the primary service declaration."""
+
+_CHARACTERISTIC_DECLARATION_UUID = 0x2803
+"""UUID of the characteristic declaration."""
+
+_CCCD_UUID = 0x2902
+"""UUID of the client characteristic configuration descriptor."""
+
+FEATURE_SERVICE_UUID = '00000000' + BLENodeDefinitions.BASE_FEATURE_UUID \
+    + BLENodeDefinitions.BLUESTSDK_SERVICE_UUID
+"""UUID of the service exporting the features of a simulated device."""
+
+PROPERTIES_DEFAULT = \
+    Characteristic.props['READ'] | Characteristic.props['NOTIFY']
+"""Default properties of the characteristics of a simulated device."""
+
+NOTIFICATION_PERIOD_s_DEFAULT = 0.05
+"""Default time in seconds between two notifications of a simulated device."""
+
+
+# FUNCTIONS
+
+def get_feature_characteristic_uuid(feature_mask):
+    """Get the UUID of the base characteristic exporting the given features.
+
+    Args:
+        feature_mask (int): Feature mask of the characteristic.
+
+    Returns:
+        str: The UUID of the characteristic.
+    """
+    return '%08x' % feature_mask + BLENodeDefinitions.BASE_FEATURE_UUID \
+        + BLENodeDefinitions.BLUESTSDK_CHARACTERISTIC_UUID
+
+
+# CLASSES
+
+class SimulatedDevice(object):
+    """Simulated BLE device following the BlueST protocol."""
+
+    def __init__(self, address, name='SIM', device_id=0x01, feature_mask=0,
+        rssi=-50, notification_period_s=NOTIFICATION_PERIOD_s_DEFAULT):
+        """Constructor.
+
+        A characteristic is exported for each bit of the feature mask known by
+        the :class:`blue_st_sdk.manager.Manager` for the given device
+        identifier; its data are zeros unless set through
+        :meth:`set_data_source()`.
+
+        Args:
+            address (str): MAC address of the device (hexadecimal string
+                separated by colons).
+            name (str, optional): Advertised name of the device.
+            device_id (int, optional): Advertised device identifier.
+            feature_mask (int, optional): Advertised feature mask.
+            rssi (int, optional): Received Signal Strength Indication.
+            notification_period_s (float, optional): Time in seconds between
+                two notifications.
+        """
+        self._address = address
+        """MAC address."""
+
+        self._name = name
+        """Advertised name."""
+
+        self._device_id = device_id
+        """Advertised device identifier."""
+
+        self._feature_mask = feature_mask
+        """Advertised feature mask."""
+
+        self.rssi = rssi
+        """Received Signal Strength Indication."""
+
+        self.notification_period_s = notification_period_s
+        """Time in seconds between two notifications."""
+
+        self.advertising = True
+        """Whether the device is advertising, i.e. visible to scanners."""
+
+        self.ifaces = None
+        """Indexes of the simulated adapters in range of the device, "None" if
+        in range of all of them."""
+
+        self.link_lifetime_s = None
+        """Time in seconds after which a link to the device drops, "None" if
+        links never drop."""
+
+        self.link_downtime_s = 0
+        """Time in seconds the device refuses connections after a link has
+        dropped."""
+
+        self.connection_time_s = 0
+        """Time in seconds needed to establish a link to the device."""
+
+        self.response_time_s = 0
+        """Time in seconds the device takes to answer a GATT request."""
+
+        self._nodes = set()
+        """Nodes connected to the device."""
+
+        self._unreachable_until = 0
+        """Time, in seconds since the epoch, until which the device refuses
+        connections."""
+
+        self._characteristics = []
+        """List of (UUID, properties, data source) tuples describing the
+        exported characteristics."""
+
+        table = blue_st_sdk.manager.Manager.get_node_features_table(device_id)
+        feature_mask &= 0xFFFFFFFF
+        while feature_mask:
+            mask = 1 << (feature_mask.bit_length() - 1)
+            feature_mask ^= mask
+            feature_class = table[mask.bit_length() - 1]
+            if feature_class is not None:
+                length = getattr(feature_class, 'DATA_LENGTH_BYTES', 0)
+                self.add_characteristic(
+                    get_feature_characteristic_uuid(mask),
+                    self._zeros(length))
+
+    @classmethod
+    def _zeros(self, length):
+        """Get a data source returning zeros.
+
+        Args:
+            length (int): Length of the data in bytes.
+
+        Returns:
+            function: A data source returning "length" zero bytes.
+        """
+        data = b'\x00' * length
+        return lambda counter: data
+
+    def add_characteristic(self, uuid, data_source,
+        properties=PROPERTIES_DEFAULT):
+        """Add a characteristic to the device.
+
+        Args:
+            uuid (str): UUID of the characteristic.
+            data_source (function): Function taking the notification counter
+                and returning the data of the characteristic, without the
+                timestamp, which is added by the device.
+            properties (int, optional): Properties of the characteristic, as a
+                combination of the values of bluepy's "Characteristic.props".
+        """
+        self._characteristics.append([uuid, properties, data_source])
+
+    def set_data_source(self, uuid, data_source):
+        """Set the data source of a characteristic.
+
+        Args:
+            uuid (str): UUID of the characteristic.
+            data_source (function): Function taking the notification counter
+                and returning the data of the characteristic, without the
+                timestamp.
+
+        Raises:
+            :exc:`ValueError` if the device does not export the characteristic.
+        """
+        for characteristic in self._characteristics:
+            if characteristic[0] == uuid:
+                characteristic[2] = data_source
+                return
+        raise ValueError('Unknown characteristic "%s".' % uuid)
+
+    def is_reachable(self):
+        """Check whether the device accepts connections.
+
+        Returns:
+            bool: True if the device is advertising and has not dropped a link
+            recently, False otherwise.
+        """
+        return self.advertising and time.time() >= self._unreachable_until
+
+    def drop_links(self, downtime_s=None):
+        """Drop the links to the device, as if it went out of range.
+
+        Args:
+            downtime_s (float, optional): Time in seconds the device refuses
+                connections afterwards, :attr:`link_downtime_s` if not given.
+        """
+        if downtime_s is None:
+            downtime_s = self.link_downtime_s
+        self._unreachable_until = time.time() + downtime_s
+        for node in list(self._nodes):
+            node._drop_link()
+
+    def get_address(self):
+        """Get the MAC address of the device.
+
+        Returns:
+            str: The MAC address of the device.
+        """
+        return self._address
+
+    def get_characteristics(self):
+        """Get the characteristics of the device.
+
+        Returns:
+            list: A list of (UUID, properties, data source) lists.
+        """
+        return self._characteristics
+
+    def get_scan_data(self):
+        """Get the advertising data of the device.
+
+        Returns:
+            list: A list of (tag, description, value) tuples, as returned by the
+            "getScanData()" method of bluepy's "ScanEntry" class.
+        """
+        manufacturer_data = binascii.hexlify(struct.pack(
+            '>BBI', 0x01, self._device_id, self._feature_mask)).decode('ascii')
+        return [
+            (0x09, 'Complete Local Name', u'' + self._name),
+            (0xFF, 'Manufacturer', manufacturer_data)
+        ]
+
+
+class SimulatedScanEntry(object):
+    """Scan entry of a simulated device, with the same interface as bluepy's
+    "ScanEntry" class.
+    """
+
+    def __init__(self, device, iface=0):
+        """Constructor.
+
+        Args:
+            device (:class:`blue_st_sdk.simulated_transport.SimulatedDevice`):
+                The simulated device.
+            iface (int, optional): Index of the adapter that found the device.
+        """
+        self.device = device
+        """Simulated device."""
+
+        self.addr = device.get_address()
+        """MAC address."""
+
+        self.addrType = 'public'
+        """Address type."""
+
+        self.iface = iface
+        """Index of the adapter that found the device."""
+
+        self.rssi = device.rssi
+        """Received Signal Strength Indication."""
+
+        self.connectable = True
+        """Whether the device is connectable."""
+
+        self.updateCount = 0
+        """Number of advertising packets received."""
+
+        self._scan_data = None
+        """Last advertising data received."""
+
+    def _update(self):
+        """Update the entry with the current advertising data of the device.
+
+        Returns:
+            bool: True if the advertising data have changed, False otherwise.
+        """
+        scan_data = self.device.get_scan_data()
+        is_new_data = scan_data != self._scan_data
+        self._scan_data = scan_data
+        self.rssi = self.device.rssi
+        self.updateCount += 1
+        return is_new_data
+
+    def getScanData(self):
+        """Get the advertising data.
+
+        Returns:
+            list: A list of (tag, description, value) tuples.
+        """
+        return self._scan_data
+
+    def getValueText(self, sdid):
+        """Get the value of an advertising data field.
+
+        Args:
+            sdid (int): Tag of the field.
+
+        Returns:
+            str: The value of the field, "None" if missing.
+        """
+        for (tag, description, value) in self._scan_data:
+            if tag == sdid:
+                return value
+        return None
+
+
+class SimulatedScanner(object):
+    """Scanner of simulated devices, with the same interface as bluepy's
+    "Scanner" class.
+    """
+
+    def __init__(self, transport, iface=0):
+        """Constructor.
+
+        Args:
+            transport (:class:`blue_st_sdk.simulated_transport.SimulatedTransport`):
+                Transport owning the simulated devices.
+            iface (int, optional): Index of the simulated adapter.
+        """
+        self._transport = transport
+        self.iface = iface
+        self.delegate = DefaultDelegate()
+        self.scanned = {}
+        self._started = False
+
+    def withDelegate(self, delegate):
+        """Set the delegate notified of the discovered devices.
+
+        Args:
+            delegate: The delegate.
+
+        Returns:
+            :class:`blue_st_sdk.simulated_transport.SimulatedScanner`: This
+            scanner.
+        """
+        self.delegate = delegate
+        return self
+
+    def start(self, passive=False):
+        """Start scanning."""
+        self._started = True
+
+    def stop(self):
+        """Stop scanning."""
+        self._started = False
+
+    def clear(self):
+        """Forget the devices found so far."""
+        self.scanned = {}
+
+    def process(self, timeout=10.0):
+        """Report the advertising devices to the delegate, then wait for the
+        scanning time.
+
+        Args:
+            timeout (float, optional): Scanning time in seconds.
+
+        Raises:
+            'BTLEException' is raised if the scanner has not been started.
+        """
+        if not self._started:
+            raise BTLEException(BTLEException.INTERNAL_ERROR,
+                'Helper not started (did you call start()?)')
+        for device in self._transport.get_devices():
+            if not device.advertising:
+                continue
+            if device.ifaces is not None and self.iface not in device.ifaces:
+                continue
+            address = device.get_address()
+            entry = self.scanned.get(address)
+            if entry is None:
+                entry = SimulatedScanEntry(device, self.iface)
+                self.scanned[address] = entry
+            is_new_data = entry._update()
+            if self.delegate is not None:
+                self.delegate.handleDiscovery(
+                    entry, entry.updateCount <= 1, is_new_data)
+        time.sleep(timeout * self._transport.get_time_scale())
+
+    def getDevices(self):
+        """Get the devices found.
+
+        Returns:
+            list: A list of
+            :class:`blue_st_sdk.simulated_transport.SimulatedScanEntry`
+            objects.
+        """
+        return list(self.scanned.values())
+
+    def scan(self, timeout=10, passive=False):
+        """Scan for devices.
+
+        Args:
+            timeout (float, optional): Scanning time in seconds.
+            passive (bool, optional): Unused.
+
+        Returns:
+            list: A list of
+            :class:`blue_st_sdk.simulated_transport.SimulatedScanEntry`
+            objects.
+        """
+        self.clear()
+        self.start(passive)
+        self.process(timeout)
+        self.stop()
+        return self.getDevices()
+
+
+class SimulatedNode(Node):
+    """Node connected to a simulated device.
+
+    The GATT database of the device is made of a single service with, for each
+    characteristic, the declaration, the value, and the client characteristic
+    configuration descriptor handles, in this order.
+    """
+
+    def __init__(self, scan_entry, transport=None, device=None):
+        """Constructor.
+
+        Args:
+            scan_entry (:class:`blue_st_sdk.simulated_transport.SimulatedScanEntry`):
+                Scan entry of the simulated device.
+            transport (:class:`blue_st_sdk.simulated_transport.SimulatedTransport`,
+                optional): Transport enforcing the limits of the simulated
+                adapters, if any.
+            device (:class:`blue_st_sdk.simulated_transport.SimulatedDevice`,
+                optional): The simulated device, the one of the scan entry if
+                not given.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidBLEAdvertisingDataException`
+                is raised if the advertising data is not well formed.
+        """
+        self._simulated_device = device or scan_entry.device
+        """Simulated device."""
+
+        self._transport = transport
+        """Transport enforcing the limits of the simulated adapters."""
+
+        self._link_up = False
+        """Whether the simulated link is up."""
+
+        self._notifying_handles = set()
+        """Value handles of the characteristics whose notifications are
+        enabled."""
+
+        self._counter = 0
+        """Notification counter."""
+
+        self._pipe = None
+        """Pipe (read and write file descriptors) through which the device
+        signals that a notification is due, so that the node can be polled as
+        a real one."""
+
+        self._ticker = None
+        """Thread signalling the notifications."""
+
+        self._stop_ticking = threading.Event()
+        """Event stopping the thread signalling the notifications."""
+
+        self._link_lock = threading.Lock()
+        """Lock serializing the accesses to the simulated link."""
+
+        self._link_time = None
+        """Time, in seconds since the epoch, the simulated link was opened."""
+
+        self._commands = deque()
+        """Commands handed over to the simulated helper and not answered yet."""
+
+        super(SimulatedNode, self).__init__(scan_entry)
+
+    def _connect_link(self):
+        """Open the simulated connection.
+
+        Raises:
+            'BTLEException' is raised if the device is not advertising or is out
+            of range of the adapter.
+        """
+        ifaces = self._simulated_device.ifaces
+        if not self._simulated_device.is_reachable() \
+            or (ifaces is not None and self._iface not in ifaces):
+            raise BTLEException(BTLEException.DISCONNECTED,
+                'Failed to connect to peripheral %s' % self.get_tag())
+        if self._transport is not None:
+            self._transport._open_link(self._iface,
+                self._simulated_device.connection_time_s)
+        elif self._simulated_device.connection_time_s:
+            time.sleep(self._simulated_device.connection_time_s)
+        self._notifying_handles = set()
+        self._commands.clear()
+        self._link_time = time.time()
+        self._pipe = os.pipe()
+        fcntl.fcntl(self._pipe[1], fcntl.F_SETFL,
+            fcntl.fcntl(self._pipe[1], fcntl.F_GETFL) | os.O_NONBLOCK)
+        self._stop_ticking.clear()
+        self._ticker = threading.Thread(target=self._tick)
+        self._ticker.daemon = True
+        self._link_up = True
+        self._simulated_device._nodes.add(self)
+        self._ticker.start()
+
+    def _disconnect_link(self):
+        """Close the simulated connection."""
+        self._link_up = False
+        self._simulated_device._nodes.discard(self)
+        self._notifying_handles = set()
+        self._stop_ticking.set()
+        if self._ticker is not None \
+            and self._ticker is not threading.current_thread():
+            self._ticker.join()
+        self._ticker = None
+        if self._pipe is not None:
+            for fd in self._pipe:
+                os.close(fd)
+            self._pipe = None
+            if self._transport is not None:
+                self._transport._close_link(self._iface)
+
+    def _tick(self):
+        """Body of the thread signalling the notifications, once every
+        notification period of the device.
+
+        When the node does not keep up, the signals exceeding the capacity of
+        the pipe are lost, as notifications exceeding the capacity of a real
+        link.
+        """
+        next_time = time.time()
+        pipe = self._pipe
+        while True:
+            next_time += self._simulated_device.notification_period_s
+            if self._stop_ticking.wait(max(0, next_time - time.time())):
+                return
+            lifetime = self._simulated_device.link_lifetime_s
+            if lifetime is not None \
+                and time.time() - self._link_time >= lifetime:
+                self._simulated_device.drop_links()
+                return
+            if self._notifying_handles:
+                try:
+                    os.write(pipe[1], b'n')
+                except OSError as e:
+                    if e.errno != errno.EAGAIN:
+                        return
+
+    def _drop_link(self):
+        """Drop the simulated link, signalling it as a notification so that the
+        node notices."""
+        with self._link_lock:
+            if not self._link_up:
+                return
+            self._link_up = False
+            self._stop_ticking.set()
+            try:
+                os.write(self._pipe[1], b'd')
+            except OSError:
+                pass
+
+    def fileno(self):
+        """Get the file descriptor through which the notifications of the
+        simulated device are signalled.
+
+        Returns:
+            int: The file descriptor, "None" if the node is not connected.
+        """
+        pipe = self._pipe
+        return pipe[0] if pipe is not None else None
+
+    def _check_link(self):
+        """Check that the simulated link is up.
+
+        Raises:
+            'BTLEException' is raised if the link is down.
+        """
+        if not self._link_up:
+            raise BTLEException(BTLEException.DISCONNECTED,
+                'Device disconnected')
+
+    def _wait_response(self):
+        """Wait for the response time of the simulated device.
+
+        Raises:
+            'BTLEException' is raised if the link is down.
+        """
+        self._check_link()
+        if self._simulated_device.response_time_s:
+            time.sleep(self._simulated_device.response_time_s)
+
+    def _get_layout(self):
+        """Get the GATT database of the simulated device.
+
+        Returns:
+            list: A list of (declaration handle, value handle, CCCD handle,
+            UUID, properties, data source) tuples.
+        """
+        layout = []
+        handle = 1
+        for (uuid, properties, data_source) in \
+            self._simulated_device.get_characteristics():
+            layout.append((handle + 1, handle + 2, handle + 3, uuid, properties,
+                data_source))
+            handle += 3
+        return layout
+
+    def getServices(self):
+        """Get the services of the simulated device.
+
+        Returns:
+            list: A list of bluepy "Service" objects.
+        """
+        self._wait_response()
+        layout = self._get_layout()
+        end = layout[-1][2] if layout else 1
+        return [Service(self, FEATURE_SERVICE_UUID, 1, end)]
+
+    def getCharacteristics(self, startHnd=1, endHnd=0xFFFF, uuid=None):
+        """Get the characteristics of the simulated device within a handle
+        range.
+
+        Returns:
+            list: A list of bluepy "Characteristic" objects.
+        """
+        self._wait_response()
+        return [Characteristic(self, char_uuid, declaration, properties, value)
+            for (declaration, value, cccd, char_uuid, properties, data_source)
+            in self._get_layout()
+            if startHnd <= declaration <= endHnd
+            and (uuid is None or str(uuid) == char_uuid)]
+
+    def getDescriptors(self, startHnd=1, endHnd=0xFFFF):
+        """Get the descriptors of the simulated device within a handle range.
+
+        Returns:
+            list: A list of bluepy "Descriptor" objects.
+        """
+        self._wait_response()
+        descriptors = []
+        if startHnd <= 1 <= endHnd:
+            descriptors.append(Descriptor(self, _SERVICE_DECLARATION_UUID, 1))
+        for (declaration, value, cccd, char_uuid, properties, data_source) in \
+            self._get_layout():
+            for (uuid, handle) in ((_CHARACTERISTIC_DECLARATION_UUID,
+                declaration), (char_uuid, value), (_CCCD_UUID, cccd)):
+                if startHnd <= handle <= endHnd:
+                    descriptors.append(Descriptor(self, uuid, handle))
+        return descriptors
+
+    def _get_value(self, data_source):
+        """Get the value of a characteristic, with the timestamp.
+
+        Args:
+            data_source (function): Data source of the characteristic.
+
+        Returns:
+            bytes: The value of the characteristic.
+        """
+        return struct.pack('<H', self._counter & 0xFFFF) \
+            + data_source(self._counter)
+
+    def readCharacteristic(self, handle):
+        """Read a characteristic or a descriptor.
+
+        Args:
+            handle (int): Handle to read.
+
+        Returns:
+            bytes: The value read.
+
+        Raises:
+            'BTLEException' is raised if the link is down or the handle is
+            unknown.
+        """
+        self._wait_response()
+        with self._link_lock:
+            self._check_link()
+            for (declaration, value, cccd, char_uuid, properties,
+                data_source) in self._get_layout():
+                if handle == value:
+                    return self._get_value(data_source)
+                if handle == cccd:
+                    return self._NOTIFICATION_ON \
+                        if value in self._notifying_handles \
+                        else self._NOTIFICATION_OFF
+        raise BTLEException(BTLEException.GATT_ERROR,
+            'Invalid handle %d' % handle)
+
+    def _writeCmd(self, cmd):
+        """Hand a command over to the simulated helper, as bluepy's.
+
+        Only the read ("rd") and the write with response ("wrr") commands are
+        supported, so that the requests pipelined by
+        :meth:`blue_st_sdk.node.Node._read_characteristics()` and
+        :meth:`blue_st_sdk.node.Node._write_characteristics()` are exercised.
+
+        Args:
+            cmd (str): The command.
+
+        Raises:
+            'BTLEException' is raised if the link is down.
+        """
+        self._check_link()
+        self._commands.append(cmd.split())
+
+    def _getResp(self, wantType, timeout=None):
+        """Execute the oldest command handed over to the simulated helper and
+        get its response, as bluepy's.
+
+        Args:
+            wantType (str): Type of the response expected.
+            timeout (float, optional): Unused.
+
+        Returns:
+            dict: The response, as bluepy's.
+
+        Raises:
+            'BTLEException' is raised if the link is down, a handle is unknown,
+            or no command is waiting for a response.
+        """
+        if not self._commands:
+            raise BTLEException(BTLEException.INTERNAL_ERROR,
+                'No command waiting for a response')
+        command = self._commands.popleft()
+        handle = int(command[1], 16)
+        if command[0] == 'rd':
+            return {'rsp': ['rd'], 'd': [self.readCharacteristic(handle)]}
+        return self.writeCharacteristic(handle,
+            binascii.a2b_hex(command[2] if len(command) > 2 else ''), True)
+
+    def writeCharacteristic(self, handle, val, withResponse=False):
+        """Write a characteristic or a descriptor.
+
+        Writing the client characteristic configuration descriptor of a
+        characteristic turns its notifications on or off.
+
+        Args:
+            handle (int): Handle to write.
+            val (bytes): Value to write.
+            withResponse (bool, optional): Unused.
+
+        Returns:
+            dict: The response, as bluepy's.
+
+        Raises:
+            'BTLEException' is raised if the link is down or the handle is
+            unknown.
+        """
+        self._wait_response()
+        with self._link_lock:
+            self._check_link()
+            for (declaration, value, cccd, char_uuid, properties,
+                data_source) in self._get_layout():
+                if handle == cccd:
+                    if val == self._NOTIFICATION_OFF:
+                        self._notifying_handles.discard(value)
+                    else:
+                        self._notifying_handles.add(value)
+                    return {'rsp': ['wr']}
+                if handle == value:
+                    return {'rsp': ['wr']}
+        raise BTLEException(BTLEException.GATT_ERROR,
+            'Invalid handle %d' % handle)
+
+    def waitForNotifications(self, timeout):
+        """Wait for the next notification of the simulated device.
+
+        All the characteristics whose notifications are enabled are notified
+        together, once every notification period of the device.
+
+        Args:
+            timeout (float): Time in seconds to wait.
+
+        Returns:
+            bool: True if a notification has been delivered, False otherwise.
+
+        Raises:
+            'BTLEException' is raised if the link is down.
+        """
+        self._check_link()
+        fd = self.fileno()
+        try:
+            if not select.select([fd], [], [], timeout or None)[0]:
+                return False
+            os.read(fd, 1)
+        except (OSError, select.error, TypeError, ValueError):
+            raise BTLEException(BTLEException.DISCONNECTED,
+                'Device disconnected')
+        with self._link_lock:
+            self._check_link()
+            notifications = [(value, self._get_value(data_source))
+                for (declaration, value, cccd, char_uuid, properties,
+                data_source) in self._get_layout()
+                if value in self._notifying_handles]
+            self._counter += 1
+        if self.delegate is not None:
+            for (handle, data) in notifications:
+                self.delegate.handleNotification(handle, data)
+        return bool(notifications)
+
+
+class SimulatedTransport(Transport):
+    """Transport working with simulated devices."""
+
+    def __init__(self, devices=None, time_scale=1.0, max_connecting=None,
+        max_links=None, adapters=1):
+        """Constructor.
+
+        Args:
+            devices (list, optional): List of
+                :class:`blue_st_sdk.simulated_transport.SimulatedDevice`
+                objects.
+            time_scale (float, optional): Factor applied to the scanning time;
+                "0" makes scans return immediately.
+            max_connecting (int, optional): Maximum number of simultaneous
+                connection attempts of a simulated adapter, "None" if
+                unlimited. Exceeding attempts fail, as with BlueZ.
+            max_links (int, optional): Maximum number of simultaneous links of a
+                simulated adapter, "None" if unlimited. Exceeding connections
+                fail.
+            adapters (int, optional): Number of simulated adapters, with
+                indexes from "0" on.
+        """
+        self._devices = list(devices) if devices else []
+        """Simulated devices."""
+
+        self._time_scale = time_scale
+        """Factor applied to the scanning time."""
+
+        self._max_connecting = max_connecting
+        """Maximum number of simultaneous connection attempts of an adapter."""
+
+        self._max_links = max_links
+        """Maximum number of simultaneous links of an adapter."""
+
+        self._adapters = adapters
+        """Number of simulated adapters."""
+
+        self._connecting = {}
+        """Dictionary that maps adapters to their connection attempts in
+        progress."""
+
+        self._links = {}
+        """Dictionary that maps adapters to their links."""
+
+        self._links_lock = threading.Lock()
+        """Lock protecting the dictionaries of connections and links."""
+
+    def add_device(self, device):
+        """Add a simulated device.
+
+        Args:
+            device (:class:`blue_st_sdk.simulated_transport.SimulatedDevice`):
+                The simulated device.
+        """
+        self._devices.append(device)
+
+    def remove_device(self, device):
+        """Remove a simulated device.
+
+        Args:
+            device (:class:`blue_st_sdk.simulated_transport.SimulatedDevice`):
+                The simulated device.
+        """
+        if device in self._devices:
+            self._devices.remove(device)
+
+    def get_devices(self):
+        """Get the simulated devices.
+
+        Returns:
+            list: A list of
+            :class:`blue_st_sdk.simulated_transport.SimulatedDevice` objects.
+        """
+        return list(self._devices)
+
+    def get_device(self, address):
+        """Get a simulated device by address.
+
+        Args:
+            address (str): MAC address of the device.
+
+        Returns:
+            :class:`blue_st_sdk.simulated_transport.SimulatedDevice`: The
+            simulated device, "None" if not found.
+        """
+        for device in self._devices:
+            if device.get_address().lower() == address.lower():
+                return device
+        return None
+
+    def _open_link(self, iface, connection_time_s):
+        """Open a simulated link, enforcing the limits of the adapter.
+
+        Args:
+            iface (int): Index of the simulated adapter.
+            connection_time_s (float): Time in seconds needed to establish the
+                link.
+
+        Raises:
+            'BTLEException' is raised if the adapter does not exist or if its
+            limits are exceeded.
+        """
+        self._check_adapter(iface)
+        with self._links_lock:
+            connecting = self._connecting.get(iface, 0)
+            links = self._links.get(iface, 0)
+            if self._max_connecting is not None \
+                and connecting >= self._max_connecting:
+                raise BTLEException(BTLEException.INTERNAL_ERROR,
+                    'Operation already in progress')
+            if self._max_links is not None \
+                and connecting + links >= self._max_links:
+                raise BTLEException(BTLEException.INTERNAL_ERROR,
+                    'Too many links')
+            self._connecting[iface] = connecting + 1
+        try:
+            if connection_time_s:
+                time.sleep(connection_time_s)
+        finally:
+            with self._links_lock:
+                self._connecting[iface] -= 1
+                self._links[iface] = self._links.get(iface, 0) + 1
+
+    def _close_link(self, iface):
+        """Close a simulated link.
+
+        Args:
+            iface (int): Index of the simulated adapter.
+        """
+        with self._links_lock:
+            self._links[iface] -= 1
+
+    def _check_adapter(self, iface):
+        """Check that a simulated adapter exists.
+
+        Args:
+            iface (int): Index of the simulated adapter.
+
+        Raises:
+            'BTLEException' is raised if the adapter does not exist.
+        """
+        if not 0 <= iface < self._adapters:
+            raise BTLEException(BTLEException.INTERNAL_ERROR,
+                'No such adapter: hci%d' % iface)
+
+    def get_links(self, iface=0):
+        """Get the number of links open through a simulated adapter.
+
+        Args:
+            iface (int, optional): Index of the simulated adapter.
+
+        Returns:
+            int: The number of links open through the adapter.
+        """
+        with self._links_lock:
+            return self._links.get(iface, 0)
+
+    def get_time_scale(self):
+        """Get the factor applied to the scanning time.
+
+        Returns:
+            float: The factor applied to the scanning time.
+        """
+        return self._time_scale
+
+    def create_scanner(self, iface=0):
+        """Create a scanner of simulated devices.
+
+        Args:
+            iface (int, optional): Index of the simulated adapter.
+
+        Returns:
+            :class:`blue_st_sdk.simulated_transport.SimulatedScanner`: The
+            scanner.
+
+        Raises:
+            'BTLEException' is raised if the adapter does not exist.
+        """
+        self._check_adapter(iface)
+        return SimulatedScanner(self, iface)
+
+    def create_node(self, scan_entry):
+        """Create a node connected to a simulated device.
+
+        Args:
+            scan_entry (:class:`blue_st_sdk.simulated_transport.SimulatedScanEntry`):
+                Scan entry of the simulated device; other scan entries (e.g.
+                restored from a
+                :class:`blue_st_sdk.node_registry.NodeRegistry`) are looked up
+                by address among the simulated devices.
+
+        Returns:
+            :class:`blue_st_sdk.simulated_transport.SimulatedNode`: The node.
+
+        Raises:
+            'BTLEException' is raised if the simulated device is not found.
+        """
+        device = getattr(scan_entry, 'device', None) \
+            or self.get_device(scan_entry.addr)
+        if device is None:
+            raise BTLEException(BTLEException.DISCONNECTED,
+                'Device not found: %s' % scan_entry.addr)
+        return SimulatedNode(scan_entry, self, device)
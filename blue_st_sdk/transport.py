@@ -0,0 +1,131 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""transport
+
+The transport module defines the interface through which the
+:class:`blue_st_sdk.manager.Manager` class gets the Bluetooth Low Energy (BLE)
+scanners and nodes it works with, and its default implementation based on
+bluepy.
+"""
+
+
+# IMPORT
+
+from abc import ABCMeta
+from abc import abstractmethod
+from bluepy.btle import Scanner
+
+from blue_st_sdk.node import Node
+
+
+# INTERFACES
+
+class Transport(object):
+    """Interface used by the :class:`blue_st_sdk.manager.Manager` class to
+    create scanners and nodes.
+
+    Scanners must behave as bluepy's
+    `Scanner <https://ianharvey.github.io/bluepy-doc/scanner.html>`_ class,
+    nodes must be :class:`blue_st_sdk.node.Node` objects.
+    """
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def create_scanner(self, iface=0):
+        """Create a scanner.
+
+        Args:
+            iface (int, optional): Index of the Bluetooth adapter to use, i.e.
+                "N" in "/dev/hciN".
+
+        Returns:
+            A scanner object with the same interface as bluepy's "Scanner".
+
+        Raises:
+            :exc:`NotImplementedError` if the method has not been implemented.
+        """
+        raise NotImplementedError('You must implement "create_scanner()" to '
+                                  'use the "Transport" class.')
+
+    @abstractmethod
+    def create_node(self, scan_entry):
+        """Create a node from a scan entry.
+
+        Args:
+            scan_entry (ScanEntry): BLE device, as returned by a scanner
+                created by this transport.
+
+        Returns:
+            :class:`blue_st_sdk.node.Node`: The node.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidBLEAdvertisingDataException`
+                is raised if the advertising data is not well formed.
+            :exc:`NotImplementedError` if the method has not been implemented.
+        """
+        raise NotImplementedError('You must implement "create_node()" to '
+                                  'use the "Transport" class.')
+
+
+# CLASSES
+
+class BluepyTransport(Transport):
+    """Transport based on bluepy, i.e. on real Bluetooth adapters."""
+
+    def create_scanner(self, iface=0):
+        """Create a scanner.
+
+        Args:
+            iface (int, optional): Index of the Bluetooth adapter to use, i.e.
+                "N" in "/dev/hciN".
+
+        Returns:
+            Scanner: A bluepy scanner. Refer to
+            `Scanner <https://ianharvey.github.io/bluepy-doc/scanner.html>`_
+            for more information.
+        """
+        return Scanner(iface)
+
+    def create_node(self, scan_entry):
+        """Create a node from a scan entry.
+
+        Args:
+            scan_entry (ScanEntry): BLE device. Refer to
+                `ScanEntry <https://ianharvey.github.io/bluepy-doc/scanentry.html>`_
+                for more information.
+
+        Returns:
+            :class:`blue_st_sdk.node.Node`: The node.
+
+        Raises:
+            :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidBLEAdvertisingDataException`
+                is raised if the advertising data is not well formed.
+        """
+        return Node(scan_entry)
@@ -4,7 +4,13 @@ __all__ = [
     'blue_st_exceptions', \
     'bv_audio_sync_manager', \
     'dict_put_single_element', \
+    'feature_logger_pipeline', \
+    'feature_store', \
     'number_conversion', \
+    'numpy_export', \
+    'sample_history', \
+    'shared_ring_buffer', \
+    'shared_sample_ring', \
     'unwrap_timestamp', \
     'uuid_to_feature_map'
 ]
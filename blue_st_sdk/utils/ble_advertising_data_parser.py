@@ -35,6 +35,8 @@ data coming from Bluetooth devices and recognized by the BlueSTSDK.
 
 # IMPORT
 
+import binascii
+
 import blue_st_sdk.node
 from blue_st_sdk.utils.blue_st_exceptions import InvalidBLEAdvertisingDataException
 
@@ -115,7 +117,8 @@ class BLEAdvertisingDataParser(object):
         # Getting data.
         for data in advertising_data:
             if data[0] == self._COMPLETE_LOCAL_NAME:
-                self._name = data[2].encode('utf-8')
+                self._name = data[2] if isinstance(data[2], str) \
+                    else data[2].encode('utf-8')
             elif data[0] == self._TX_POWER:
                 self._tx_power = data[2]
             elif data[0] == self._MANUFACTURER_SPECIFIC_DATA:
@@ -144,7 +147,7 @@ class BLEAdvertisingDataParser(object):
             :exc:`blue_st_sdk.utils.blue_st_exceptions.InvalidBLEAdvertisingDataException`
                 is raised if the advertising data is not well formed.
         """
-        length = len(manufacturer_specific_data.decode('hex')) + 1  # Adding 1 byte of the field-type, which is hidden by the Bluepy library.
+        length = len(binascii.unhexlify(manufacturer_specific_data)) + 1  # Adding 1 byte of the field-type, which is hidden by the Bluepy library.
         if length != self.ADVERTISING_DATA_MANUFACTURER_LENGTH_1 and length != self.ADVERTISING_DATA_MANUFACTURER_LENGTH_2:
             raise InvalidBLEAdvertisingDataException(
                 ' ' + self._name + ': ' \
@@ -162,8 +165,8 @@ class BLEAdvertisingDataParser(object):
                 'Version must be in [' + str(self.VERSION_PROTOCOL_SUPPORTED_MIN) + '..' + str(self.VERSION_PROTOCOL_SUPPORTED_MAX) + '].'
             )
 
-        self._device_id = int(manufacturer_specific_data[2:4], 16)
-        self._device_id = self._device_id & 0xFF if self._device_id & 0x80 == 0x80 else self._device_id & 0x1F
+        self._device_id = self._get_device_id(
+            int(manufacturer_specific_data[2:4], 16))
 
         try:
             self._board_type = self._get_node_type(self._device_id)
@@ -174,6 +177,20 @@ class BLEAdvertisingDataParser(object):
         self._feature_mask = int(manufacturer_specific_data[4:12], 16)
         self._address = manufacturer_specific_data[12:24] if length == self.ADVERTISING_DATA_MANUFACTURER_LENGTH_2 else None
 
+    @classmethod
+    def _get_device_id(self, node_type):
+        """Parse the node type field to get the device identifier.
+
+        Args:
+            node_type (int): Node type.
+
+        Returns:
+            int: The device identifier.
+        """
+        return node_type & 0xFF if node_type & 0x80 == 0x80 \
+            else node_type & 0x1F
+
+    @classmethod
     def _get_node_type(self, device_id):
         """Get the node's type.
     
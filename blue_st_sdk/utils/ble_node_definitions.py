@@ -37,6 +37,7 @@ and recognized by the BlueSTSDK.
 
 import uuid
 import re
+import struct
 
 from blue_st_sdk.features import *
 
@@ -277,7 +278,12 @@ class FeatureCharacteristic(object):
         Returns:
             int: The first 32 bit of the characteristic's UUID.
         """
-        return int(str(uuid).split('-')[0], 16)
+        # Reading the binary value when available, to avoid formatting and
+        # parsing the UUID's string.
+        bin_val = getattr(uuid, 'binVal', None)
+        if bin_val is not None:
+            return struct.unpack_from('>I', bin_val)[0]
+        return int(str(uuid)[:8], 16)
 
     @classmethod
     def is_base_feature_characteristic(self, uuid):
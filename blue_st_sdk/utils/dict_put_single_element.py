@@ -35,12 +35,15 @@ elements.
 
 # IMPORT
 
-import collections
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 
 
 # CLASSES
 
-class DictPutSingleElement(collections.MutableMapping):
+class DictPutSingleElement(MutableMapping):
     """Utility class to map keys to list of elements.
 
     It works like a dictionary with an exception: the "put()" method inserts a
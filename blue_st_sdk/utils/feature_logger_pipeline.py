@@ -0,0 +1,308 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""feature_logger_pipeline
+
+The feature_logger_pipeline module contains a feature logger that moves the
+logging of the features' updates off the notification path.
+
+Records are appended to a bounded queue by the thread receiving the
+notifications and drained by a dedicated writer thread, which hands them to the
+wrapped loggers in groups. The wrapped loggers are flushed only on request or
+when the pipeline is closed, so that loggers writing in blocks keep writing
+full ones. A slow disk does not slow down the reception of the notifications: when
+the queue is full, records are dropped and counted.
+"""
+
+
+# IMPORT
+
+from collections import deque
+import threading
+import time
+
+from blue_st_sdk.feature import FeatureLogger
+
+
+# DEFINITIONS
+
+QUEUE_SIZE_DEFAULT = 10000
+"""Default maximum number of records waiting to be written."""
+
+BATCH_SIZE_DEFAULT = 256
+"""Default number of records that wakes up the writer thread."""
+
+MAX_DELAY_ms_DEFAULT = 200
+"""Default maximum time in milliseconds a record waits to be written."""
+
+
+# CLASSES
+
+class AsyncFeatureLogger(FeatureLogger):
+    """Feature logger that forwards the records to other feature loggers on a
+    dedicated writer thread.
+
+    Any :class:`blue_st_sdk.feature.FeatureLogger` can be wrapped unchanged.
+    The "flush()" method of the wrapped loggers, if they have one, is called by
+    :meth:`flush()` and :meth:`close()` only.
+    """
+
+    def __init__(self, loggers, queue_size=QUEUE_SIZE_DEFAULT,
+        batch_size=BATCH_SIZE_DEFAULT, max_delay_ms=MAX_DELAY_ms_DEFAULT,
+        drop_oldest=False):
+        """Constructor.
+
+        Args:
+            loggers (list): Feature loggers to forward the records to (list of
+                :class:`blue_st_sdk.feature.FeatureLogger` objects), or a
+                single feature logger.
+            queue_size (int, optional): Maximum number of records waiting to be
+                written.
+            batch_size (int, optional): Number of waiting records that wakes up
+                the writer thread.
+            max_delay_ms (int, optional): Maximum time in milliseconds a record
+                waits before being written, greater than zero.
+            drop_oldest (bool, optional): If True, when the queue is full the
+                oldest record is dropped, otherwise the new one.
+
+        Raises:
+            :exc:`ValueError` if the queue size, the batch size, or the maximum
+            delay are not positive.
+        """
+        if queue_size <= 0 or batch_size <= 0:
+            raise ValueError('Queue size and batch size must be positive.')
+        if max_delay_ms is None or max_delay_ms <= 0:
+            raise ValueError('Maximum delay must be positive.')
+        if isinstance(loggers, FeatureLogger):
+            loggers = [loggers]
+
+        self._loggers = list(loggers)
+        """Wrapped feature loggers."""
+
+        self._queue_size = queue_size
+        """Maximum number of records waiting to be written."""
+
+        self._batch_size = batch_size
+        """Number of waiting records that wakes up the writer thread."""
+
+        self._max_delay_s = max_delay_ms / 1000.0
+        """Maximum time in seconds a record waits before being written."""
+
+        self._drop_oldest = drop_oldest
+        """Whether to drop the oldest record instead of the new one when the
+        queue is full."""
+
+        self._queue = deque()
+        """Queue of the records waiting to be written. Appending and popping
+        are atomic, hence no lock is taken on the notification path."""
+
+        self._wake_up = threading.Event()
+        """Event waking up the writer thread."""
+
+        self._written_condition = threading.Condition()
+        """Condition notified each time a group of records has been
+        written."""
+
+        self._enqueued = 0
+        """Number of records enqueued."""
+
+        self._dropped = 0
+        """Number of records dropped because the queue was full."""
+
+        self._written = 0
+        """Number of records handed to the wrapped loggers."""
+
+        self._errors = 0
+        """Number of records whose logging raised an exception."""
+
+        self._batches = 0
+        """Number of groups of records written."""
+
+        self._max_depth = 0
+        """Maximum number of records waiting to be written."""
+
+        self._flush_requests = 0
+        """Number of flushes of the wrapped loggers requested."""
+
+        self._flushed = 0
+        """Number of requested flushes of the wrapped loggers performed."""
+
+        self._stopped = False
+        """Whether the writer thread has been asked to stop."""
+
+        self._thread = threading.Thread(target=self._run)
+        """Writer thread."""
+        self._thread.daemon = True
+        self._thread.start()
+
+    def log_update(self, feature, raw_data, sample):
+        """To be called to log the updates of the feature.
+
+        The record is only enqueued: it is written later by the writer thread.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature that has
+                updated.
+            raw_data (str): Raw data used to update the feature.
+            sample (:class:`blue_st_sdk.feature.Sample`): Sample data extracted
+                from the feature.
+        """
+        depth = len(self._queue)
+        if depth >= self._queue_size:
+            self._dropped += 1
+            if not self._drop_oldest:
+                return
+            try:
+                self._queue.popleft()
+            except IndexError:
+                pass
+            depth -= 1
+        self._queue.append((feature, raw_data, sample))
+        self._enqueued += 1
+        depth += 1
+        if depth > self._max_depth:
+            self._max_depth = depth
+        if depth >= self._batch_size:
+            self._wake_up.set()
+
+    def _run(self):
+        """Body of the writer thread."""
+        while True:
+            self._wake_up.wait(self._max_delay_s)
+            self._wake_up.clear()
+            stopped = self._stopped
+            # Read before writing, so that the records enqueued before a
+            # request are written before the loggers are flushed.
+            requests = self._flush_requests
+            self._write_pending()
+            if stopped or requests > self._flushed:
+                self._flush_loggers()
+                with self._written_condition:
+                    self._flushed = requests
+                    self._written_condition.notify_all()
+            if stopped:
+                break
+
+    def _write_pending(self):
+        """Write all the records waiting in the queue, in groups."""
+        while self._queue:
+            count = 0
+            while count < self._batch_size:
+                try:
+                    (feature, raw_data, sample) = self._queue.popleft()
+                except IndexError:
+                    break
+                for logger in self._loggers:
+                    try:
+                        logger.log_update(feature, raw_data, sample)
+                    except Exception:
+                        self._errors += 1
+                count += 1
+            with self._written_condition:
+                self._written += count
+                self._batches += 1
+                self._written_condition.notify_all()
+
+    def _flush_loggers(self):
+        """Flush the wrapped loggers that have a "flush()" method."""
+        for logger in self._loggers:
+            if hasattr(logger, 'flush'):
+                try:
+                    logger.flush()
+                except Exception:
+                    self._errors += 1
+
+    def flush(self, timeout=None):
+        """Wait until the records enqueued so far have been written and the
+        wrapped loggers have been flushed.
+
+        Args:
+            timeout (float, optional): Maximum time in seconds to wait, "None"
+                to wait indefinitely.
+
+        Returns:
+            bool: True if the records have been written and flushed, False if
+            the timeout expired.
+        """
+        target = self._enqueued
+        deadline = None if timeout is None else time.time() + timeout
+        with self._written_condition:
+            self._flush_requests += 1
+            request = self._flush_requests
+            while (self._written + self._lost() < target
+                or self._flushed < request) and self._thread.is_alive():
+                self._wake_up.set()
+                remaining = 0.1 if deadline is None \
+                    else min(0.1, deadline - time.time())
+                if remaining <= 0:
+                    return False
+                self._written_condition.wait(remaining)
+        return True
+
+    def _lost(self):
+        """Get the number of enqueued records later dropped from the queue.
+
+        Returns:
+            int: The number of enqueued records dropped in favour of newer
+            ones.
+        """
+        return self._dropped if self._drop_oldest else 0
+
+    def close(self, timeout=None):
+        """Write the pending records, flush the wrapped loggers, and stop the
+        writer thread.
+
+        Args:
+            timeout (float, optional): Maximum time in seconds to wait for the
+                writer thread, "None" to wait indefinitely.
+        """
+        self._stopped = True
+        self._wake_up.set()
+        self._thread.join(timeout)
+
+    def get_statistics(self):
+        """Get the statistics of the pipeline.
+
+        Returns:
+            dict: A dictionary with the number of records enqueued ("enqueued"),
+            dropped because the queue was full ("dropped"), handed to the
+            wrapped loggers ("written"), whose logging raised an exception
+            ("errors"), the number of groups written ("batches"), and the
+            current ("depth") and maximum ("max_depth") number of records
+            waiting to be written.
+        """
+        return {
+            'enqueued': self._enqueued,
+            'dropped': self._dropped,
+            'written': self._written,
+            'errors': self._errors,
+            'batches': self._batches,
+            'depth': len(self._queue),
+            'max_depth': self._max_depth
+        }
@@ -0,0 +1,699 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""feature_store
+
+The feature_store module contains a high-throughput feature logger that stores
+the samples of the features on disk as compressed columnar blocks, and a reader
+that retrieves them by time range.
+
+Each feature of each node is stored in a series made of three files within the
+node's folder:
+ - a schema file (".json"), describing the fields of the feature;
+ - a data file (".dat"), made of compressed blocks of samples with one column
+   for each field plus a timestamp column;
+ - an index file (".idx"), with the position and the timestamp range of each
+   block, so that time range queries read only the blocks needed.
+
+Only the Python standard library is required. NumPy, if installed, can be used
+to get the samples read as structured arrays.
+"""
+
+
+# IMPORT
+
+from array import array
+import json
+import os
+import struct
+import sys
+import threading
+import zlib
+
+from blue_st_sdk.feature import FeatureLogger
+from blue_st_sdk.features.field import Field
+from blue_st_sdk.features.field import FieldType
+from blue_st_sdk.utils.sample_history import SampleBlock
+from blue_st_sdk.utils.sample_history import get_array_typecode
+from blue_st_sdk.utils.sample_history import TIMESTAMP_TYPECODE
+
+
+# DEFINITIONS
+
+BLOCK_SIZE_DEFAULT = 4096
+"""Default number of samples of a block."""
+
+COMPRESSION_LEVEL_DEFAULT = 1
+"""Default zlib compression level of the blocks."""
+
+_OBJECT_TYPECODE = 'O'
+"""Typecode of the columns stored as JSON objects."""
+
+_BLOCK_HEADER = struct.Struct('<4sII')
+"""Block header: magic number, number of samples, number of columns."""
+
+_BLOCK_MAGIC = b'BSTB'
+"""Magic number of the blocks."""
+
+_COLUMN_HEADER = struct.Struct('<cI')
+"""Column header: typecode, length of the compressed column in bytes."""
+
+_INDEX_RECORD = struct.Struct('<QIIdd')
+"""Index record: offset and length in bytes of the block within the data file,
+number of samples, minimum and maximum timestamp."""
+
+_SCHEMA_EXTENSION = '.json'
+"""Extension of the schema files."""
+
+_DATA_EXTENSION = '.dat'
+"""Extension of the data files."""
+
+_INDEX_EXTENSION = '.idx'
+"""Extension of the index files."""
+
+
+# FUNCTIONS
+
+def _to_bytes(column):
+    """Get the raw bytes of an "array" object.
+
+    Args:
+        column (array): The array.
+
+    Returns:
+        bytes: The raw bytes of the array.
+    """
+    if hasattr(column, 'tobytes'):
+        return column.tobytes()
+    return column.tostring()
+
+def _from_bytes(typecode, data):
+    """Build an "array" object from raw bytes.
+
+    Args:
+        typecode (str): Typecode of the array.
+        data (bytes): The raw bytes of the array.
+
+    Returns:
+        array: The array.
+    """
+    column = array(typecode)
+    if hasattr(column, 'frombytes'):
+        column.frombytes(data)
+    else:
+        column.fromstring(data)
+    return column
+
+def _take(column, indices):
+    """Get the values of a column at the given positions.
+
+    Args:
+        column (list): The column, either an "array" object or a list.
+        indices (list): The positions of the values to get.
+
+    Returns:
+        list: The values, as an "array" object if the column is one.
+    """
+    values = [column[i] for i in indices]
+    if isinstance(column, array):
+        return array(column.typecode, values)
+    return values
+
+def _get_folder_name(node_tag):
+    """Get the name of the folder of a node.
+
+    Args:
+        node_tag (str): Tag of the node.
+
+    Returns:
+        str: The name of the folder of the node.
+    """
+    return str(node_tag).replace(':', '-')
+
+def _get_file_name(series_name):
+    """Get the base name of the files of a series.
+
+    Args:
+        series_name (str): Name of the series.
+
+    Returns:
+        str: The base name of the files of the series.
+    """
+    return ''.join(c if c.isalnum() or c in '-_' else '_'
+        for c in str(series_name))
+
+
+# CLASSES
+
+class ColumnarFeatureLogger(FeatureLogger):
+    """Feature logger that stores samples on disk as compressed columnar blocks
+    with a time range index.
+
+    Samples are buffered per feature and written a block at a time, so that
+    each call to :meth:`log_update()` costs only the append of the sample's
+    values to the columns of the current block. Call :meth:`flush()` to write
+    the incomplete blocks and :meth:`close()` when done.
+
+    Non-numeric fields (e.g. ByteArray and DateTime) are stored as JSON values.
+    """
+
+    def __init__(self, root_dir, block_size=BLOCK_SIZE_DEFAULT,
+        compression_level=COMPRESSION_LEVEL_DEFAULT):
+        """Constructor.
+
+        Args:
+            root_dir (str): Folder where to store the data.
+            block_size (int, optional): Number of samples of a block.
+            compression_level (int, optional): zlib compression level, from 0
+                (no compression) to 9 (best compression).
+
+        Raises:
+            :exc:`ValueError` if the block size is not positive.
+        """
+        if block_size <= 0:
+            raise ValueError('The block size must be positive.')
+
+        self._root_dir = root_dir
+        """Folder where to store the data."""
+
+        self._block_size = block_size
+        """Number of samples of a block."""
+
+        self._compression_level = compression_level
+        """zlib compression level."""
+
+        self._writers = {}
+        """Dictionary that maps features to their series writers."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the dictionary of writers."""
+
+    def _get_series_name(self, feature):
+        """Get the name of the series of a feature.
+
+        Features of the same node with the same name (e.g. two temperatures)
+        get a numeric suffix.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): The feature.
+
+        Returns:
+            str: The name of the series of the feature.
+        """
+        name = feature.get_name()
+        node = feature.get_parent_node()
+        if node is None:
+            return name
+        same_name = [f for f in node.get_features()
+            if f.get_name() == name]
+        if feature in same_name and same_name.index(feature) > 0:
+            return '%s_%d' % (name, same_name.index(feature))
+        return name
+
+    def _get_writer(self, feature):
+        """Get the series writer of a feature, creating it if needed.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): The feature.
+
+        Returns:
+            :class:`blue_st_sdk.utils.feature_store._SeriesWriter`: The series
+            writer of the feature.
+        """
+        writer = self._writers.get(feature)
+        if writer is None:
+            with self._lock:
+                writer = self._writers.get(feature)
+                if writer is None:
+                    node = feature.get_parent_node()
+                    node_tag = node.get_tag() if node is not None else 'unknown'
+                    writer = _SeriesWriter(
+                        os.path.join(
+                            self._root_dir, _get_folder_name(node_tag)),
+                        node_tag,
+                        self._get_series_name(feature),
+                        feature.get_fields_description(),
+                        self._block_size,
+                        self._compression_level)
+                    self._writers[feature] = writer
+        return writer
+
+    def log_update(self, feature, raw_data, sample):
+        """To be called to log the updates of the feature.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature that has
+                updated.
+            raw_data (str): Raw data used to update the feature.
+            sample (:class:`blue_st_sdk.feature.Sample`): Sample data extracted
+                from the feature.
+        """
+        self._get_writer(feature).append(sample._timestamp, sample._data)
+
+    def flush(self):
+        """Write the incomplete blocks of all the features to disk."""
+        with self._lock:
+            writers = list(self._writers.values())
+        for writer in writers:
+            writer.flush()
+
+    def close(self):
+        """Write the incomplete blocks of all the features to disk and close
+        the files."""
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers = {}
+        for writer in writers:
+            writer.close()
+
+
+class _SeriesWriter(object):
+    """Class that writes the samples of a feature on disk."""
+
+    def __init__(self, folder, node_tag, series_name, description, block_size,
+        compression_level):
+        """Constructor.
+
+        Args:
+            folder (str): Folder of the node.
+            node_tag (str): Tag of the node.
+            series_name (str): Name of the series.
+            description (list): Description of the data of the feature (list of
+                :class:`blue_st_sdk.features.field.Field` objects).
+            block_size (int): Number of samples of a block.
+            compression_level (int): zlib compression level.
+        """
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        base = os.path.join(folder, _get_file_name(series_name))
+
+        self._typecodes = [get_array_typecode(field.get_type())
+            for field in description]
+        """Typecodes of the data columns ("None" for JSON columns)."""
+
+        self._block_size = block_size
+        """Number of samples of a block."""
+
+        self._compression_level = compression_level
+        """zlib compression level."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the current block and the files."""
+
+        self._write_schema(base + _SCHEMA_EXTENSION, node_tag, series_name,
+            description)
+
+        self._data_file = open(base + _DATA_EXTENSION, 'ab')
+        """Data file."""
+
+        self._index_file = open(base + _INDEX_EXTENSION, 'ab')
+        """Index file."""
+
+        self._reset()
+
+    def _write_schema(self, path, node_tag, series_name, description):
+        """Write the schema of the series, if not already written.
+
+        Args:
+            path (str): Path of the schema file.
+            node_tag (str): Tag of the node.
+            series_name (str): Name of the series.
+            description (list): Description of the data of the feature.
+        """
+        if os.path.exists(path):
+            return
+        schema = {
+            'node': node_tag,
+            'series': series_name,
+            'byteorder': sys.byteorder,
+            'fields': [{
+                'name': field.get_name(),
+                'unit': field.get_unit(),
+                'type': field.get_type().value,
+                'max': field.get_max(),
+                'min': field.get_min()
+            } for field in description]
+        }
+        with open(path, 'w') as schema_file:
+            json.dump(schema, schema_file, default=str)
+
+    def _reset(self):
+        """Start a new block."""
+        self._timestamps = []
+        self._columns = [[] for typecode in self._typecodes]
+
+    def append(self, timestamp, data):
+        """Append a sample to the current block, writing it if complete.
+
+        Args:
+            timestamp (int): Sample's timestamp, "None" if missing.
+            data (list): Sample's data.
+        """
+        # Samples whose data do not map one-to-one onto the fields (e.g. audio
+        # packets) are stored as a whole into the only field available.
+        if len(self._typecodes) == 1 and len(data) > 1:
+            data = [data]
+        with self._lock:
+            self._timestamps.append(
+                float('nan') if timestamp is None else timestamp)
+            columns = self._columns
+            for i in range(0, len(columns)):
+                columns[i].append(data[i] if i < len(data) else None)
+            if len(self._timestamps) >= self._block_size:
+                self._write_block()
+
+    def _encode_column(self, typecode, values):
+        """Encode a column.
+
+        Args:
+            typecode (str): Typecode of the column, "None" for JSON columns.
+            values (list): Values of the column.
+
+        Returns:
+            bytes: The encoded column, with its header.
+        """
+        if typecode is None:
+            typecode = _OBJECT_TYPECODE
+            raw = json.dumps(values, default=str).encode('utf-8')
+        else:
+            if None in values:
+                default = float('nan') if typecode in 'fd' else 0
+                values = [default if v is None else v for v in values]
+            raw = _to_bytes(array(typecode, values))
+        compressed = zlib.compress(raw, self._compression_level)
+        return _COLUMN_HEADER.pack(typecode.encode('ascii'), len(compressed)) \
+            + compressed
+
+    def _write_block(self):
+        """Write the current block and its index record, and start a new block.
+
+        To be called while holding the lock.
+        """
+        count = len(self._timestamps)
+        if count == 0:
+            return
+        chunks = [_BLOCK_HEADER.pack(
+            _BLOCK_MAGIC, count, len(self._columns) + 1)]
+        chunks.append(self._encode_column(
+            TIMESTAMP_TYPECODE, self._timestamps))
+        for i in range(0, len(self._columns)):
+            chunks.append(self._encode_column(
+                self._typecodes[i], self._columns[i]))
+        block = b''.join(chunks)
+        valid = [t for t in self._timestamps if t == t]
+        t_min = min(valid) if valid else float('nan')
+        t_max = max(valid) if valid else float('nan')
+
+        self._data_file.seek(0, os.SEEK_END)
+        offset = self._data_file.tell()
+        self._data_file.write(block)
+        self._data_file.flush()
+        self._index_file.write(
+            _INDEX_RECORD.pack(offset, len(block), count, t_min, t_max))
+        self._index_file.flush()
+        self._reset()
+
+    def flush(self):
+        """Write the current block, even if incomplete."""
+        with self._lock:
+            self._write_block()
+
+    def close(self):
+        """Write the current block and close the files."""
+        with self._lock:
+            self._write_block()
+            self._data_file.close()
+            self._index_file.close()
+
+
+class ColumnarFeatureStore(object):
+    """Class that reads the samples written by a
+    :class:`blue_st_sdk.utils.feature_store.ColumnarFeatureLogger`.
+
+    Time range queries rely on the index to read only the blocks overlapping
+    the requested range.
+    """
+
+    def __init__(self, root_dir):
+        """Constructor.
+
+        Args:
+            root_dir (str): Folder where the data are stored.
+        """
+        self._root_dir = root_dir
+        """Folder where the data are stored."""
+
+    def get_series(self):
+        """Get the list of the stored series.
+
+        Returns:
+            list: A list of (node tag, series name) tuples.
+        """
+        series = []
+        if not os.path.isdir(self._root_dir):
+            return series
+        for folder in sorted(os.listdir(self._root_dir)):
+            path = os.path.join(self._root_dir, folder)
+            if not os.path.isdir(path):
+                continue
+            for file_name in sorted(os.listdir(path)):
+                if file_name.endswith(_SCHEMA_EXTENSION):
+                    schema = self._read_schema(os.path.join(path, file_name))
+                    series.append((schema['node'], schema['series']))
+        return series
+
+    def _get_base_path(self, node_tag, series_name):
+        """Get the base path of the files of a series.
+
+        Args:
+            node_tag (str): Tag of the node.
+            series_name (str): Name of the series, i.e. the name of the feature,
+                possibly followed by a numeric suffix.
+
+        Returns:
+            str: The base path of the files of the series.
+        """
+        return os.path.join(self._root_dir, _get_folder_name(node_tag),
+            _get_file_name(series_name))
+
+    @classmethod
+    def _read_schema(self, path):
+        """Read a schema file.
+
+        Args:
+            path (str): Path of the schema file.
+
+        Returns:
+            dict: The schema.
+        """
+        with open(path, 'r') as schema_file:
+            return json.load(schema_file)
+
+    def get_fields_description(self, node_tag, series_name):
+        """Get the description of the data fields of a series.
+
+        Args:
+            node_tag (str): Tag of the node.
+            series_name (str): Name of the series.
+
+        Returns:
+            list: The description of the data fields of the series (list of
+            :class:`blue_st_sdk.features.field.Field` objects).
+
+        Raises:
+            :exc:`IOError` if the series does not exist.
+        """
+        schema = self._read_schema(
+            self._get_base_path(node_tag, series_name) + _SCHEMA_EXTENSION)
+        return [Field(field['name'], field['unit'], FieldType(field['type']),
+            field['max'], field['min']) for field in schema['fields']]
+
+    def _read_index(self, base):
+        """Read the index of a series.
+
+        Args:
+            base (str): Base path of the files of the series.
+
+        Returns:
+            list: The list of index records, as tuples.
+        """
+        with open(base + _INDEX_EXTENSION, 'rb') as index_file:
+            data = index_file.read()
+        size = _INDEX_RECORD.size
+        return [_INDEX_RECORD.unpack_from(data, i)
+            for i in range(0, len(data) - size + 1, size)]
+
+    @classmethod
+    def _decode_block(self, data, swap):
+        """Decode a block.
+
+        Args:
+            data (bytes): The block.
+            swap (bool): True if the byte order of the block differs from the
+                one of this machine.
+
+        Returns:
+            list: The columns of the block, the timestamp column first.
+
+        Raises:
+            :exc:`ValueError` if the block is corrupted.
+        """
+        (magic, count, n_columns) = _BLOCK_HEADER.unpack_from(data, 0)
+        if magic != _BLOCK_MAGIC:
+            raise ValueError('Corrupted block.')
+        offset = _BLOCK_HEADER.size
+        columns = []
+        for i in range(0, n_columns):
+            (typecode, length) = _COLUMN_HEADER.unpack_from(data, offset)
+            offset += _COLUMN_HEADER.size
+            raw = zlib.decompress(data[offset:offset + length])
+            offset += length
+            typecode = typecode.decode('ascii')
+            if typecode == _OBJECT_TYPECODE:
+                columns.append(json.loads(raw.decode('utf-8')))
+            else:
+                column = _from_bytes(typecode, raw)
+                if swap:
+                    column.byteswap()
+                columns.append(column)
+        return columns
+
+    def iter_blocks(self, node_tag, series_name, t_start=None, t_end=None):
+        """Iterate over the stored blocks of a series, restricted to a time
+        range.
+
+        Only the blocks overlapping the time range are read from disk, one at a
+        time, so that series bigger than the available memory can be
+        processed. Timestamps are not required to be monotonic, e.g. they
+        restart when the device reboots: the samples within the time range are
+        returned in the order they have been stored, and the samples without a
+        timestamp are returned only if no time range is given.
+
+        Args:
+            node_tag (str): Tag of the node.
+            series_name (str): Name of the series.
+            t_start (int, optional): Minimum timestamp, included.
+            t_end (int, optional): Maximum timestamp, included.
+
+        Yields:
+            :class:`blue_st_sdk.utils.sample_history.SampleBlock`: Blocks of
+            samples within the time range. Numeric columns are "array" objects.
+
+        Raises:
+            :exc:`IOError` if the series does not exist.
+            :exc:`ValueError` if the data file is corrupted.
+        """
+        base = self._get_base_path(node_tag, series_name)
+        schema = self._read_schema(base + _SCHEMA_EXTENSION)
+        description = self.get_fields_description(node_tag, series_name)
+        swap = schema['byteorder'] != sys.byteorder
+        index = self._read_index(base)
+
+        # Filtering the index linearly, as timestamps may go backwards and
+        # blocks without timestamps have "NaN" bounds.
+        is_ranged = t_start is not None or t_end is not None
+        if is_ranged:
+            index = [record for record in index
+                if record[3] == record[3]
+                and (t_start is None or record[4] >= t_start)
+                and (t_end is None or record[3] <= t_end)]
+
+        with open(base + _DATA_EXTENSION, 'rb') as data_file:
+            for (offset, length, count, t_min, t_max) in index:
+                data_file.seek(offset)
+                columns = self._decode_block(data_file.read(length), swap)
+                if is_ranged:
+                    # Selecting the samples within the time range.
+                    indices = [i for (i, t) in enumerate(columns[0])
+                        if (t_start is None or t >= t_start)
+                        and (t_end is None or t <= t_end)]
+                    if not indices:
+                        continue
+                    if indices[-1] - indices[0] + 1 == len(indices):
+                        columns = [column[indices[0]:indices[-1] + 1]
+                            for column in columns]
+                    else:
+                        columns = [_take(column, indices)
+                            for column in columns]
+                yield SampleBlock(description, columns[0], columns[1:])
+
+    def read(self, node_tag, series_name, t_start=None, t_end=None):
+        """Read the samples of a series within a time range.
+
+        Args:
+            node_tag (str): Tag of the node.
+            series_name (str): Name of the series.
+            t_start (int, optional): Minimum timestamp, included.
+            t_end (int, optional): Maximum timestamp, included.
+
+        Returns:
+            :class:`blue_st_sdk.utils.sample_history.SampleBlock`: The samples
+            within the time range. Numeric columns are "array" objects.
+
+        Raises:
+            :exc:`IOError` if the series does not exist.
+            :exc:`ValueError` if the data file is corrupted.
+        """
+        description = self.get_fields_description(node_tag, series_name)
+        timestamps = array(TIMESTAMP_TYPECODE)
+        columns = None
+        for block in self.iter_blocks(node_tag, series_name, t_start, t_end):
+            timestamps.extend(block.get_timestamps())
+            if columns is None:
+                columns = list(block.get_columns())
+            else:
+                for i in range(0, len(columns)):
+                    columns[i] += block.get_column(i)
+        if columns is None:
+            columns = [[] for field in description]
+        return SampleBlock(description, timestamps, columns)
+
+    def read_array(self, node_tag, series_name, t_start=None, t_end=None):
+        """Read the samples of a series within a time range as a NumPy
+        structured array.
+
+        Args:
+            node_tag (str): Tag of the node.
+            series_name (str): Name of the series.
+            t_start (int, optional): Minimum timestamp, included.
+            t_end (int, optional): Maximum timestamp, included.
+
+        Returns:
+            numpy.ndarray: The samples within the time range. Refer to
+            :func:`blue_st_sdk.utils.numpy_export.block_to_array()` for more
+            information.
+
+        Raises:
+            :exc:`ImportError` if NumPy is not installed.
+            :exc:`IOError` if the series does not exist.
+            :exc:`ValueError` if the data file is corrupted.
+        """
+        from blue_st_sdk.utils.numpy_export import block_to_array
+        return block_to_array(
+            self.read(node_tag, series_name, t_start, t_end))
@@ -57,7 +57,7 @@ class NumberConversion(object):
         Returns:
             int: The corresponding numerical value.      
         """
-        return struct.unpack('B', data[index])[0]
+        return struct.unpack_from('B', data, index)[0]
 
 
 class LittleEndian(object):
@@ -78,7 +78,7 @@ class LittleEndian(object):
             The corresponding numerical value.
         """
         #return ByteBuffer.wrap(data, start, 2).order(ByteOrder.LITTLE_ENDIAN).getShort()
-        return struct.unpack('<h', struct.pack('cc', *data[start : start + 2]))[0]
+        return struct.unpack_from('<h', data, start)[0]
 
     @classmethod
     def bytes_to_int32(self, data, start = 0):
@@ -93,7 +93,7 @@ class LittleEndian(object):
             The corresponding numerical value.
         """
         #return ByteBuffer.wrap(data, start, 4).order(ByteOrder.LITTLE_ENDIAN).getInt()
-        return struct.unpack('<i', struct.pack('cccc', *data[start : start + 4]))[0]
+        return struct.unpack_from('<i', data, start)[0]
 
     @classmethod
     def bytes_to_uint16(self, data, start = 0):
@@ -108,7 +108,7 @@ class LittleEndian(object):
             The corresponding numerical value.
         """
         #return ByteBuffer.wrap(data, start, 2).order(ByteOrder.LITTLE_ENDIAN).getShort() & 0xFFFF
-        return struct.unpack('<H', struct.pack('cc', *data[start : start + 2]))[0]
+        return struct.unpack_from('<H', data, start)[0]
 
     @classmethod
     def bytes_to_uint32(self, data, start = 0):
@@ -123,7 +123,7 @@ class LittleEndian(object):
             The corresponding numerical value.
         """
         #return ((long(ByteBuffer.wrap(data, start, 4).order(ByteOrder.LITTLE_ENDIAN).getInt())) & 0xFFFFFFFFL)
-        return struct.unpack('<I', struct.pack('cccc', *data[start : start + 4]))[0]
+        return struct.unpack_from('<I', data, start)[0]
 
     @classmethod
     def bytes_to_float(self, data, start = 0):
@@ -138,7 +138,7 @@ class LittleEndian(object):
             The corresponding numerical value.
         """
         #return Float.intBitsToFloat(self.bytes_to_int32(data, start))
-        return struct.unpack('<f', struct.pack('cccc', *data[start : start + 4]))[0]
+        return struct.unpack_from('<f', data, start)[0]
 
     @classmethod
     def int16_to_bytes(self, value):
@@ -229,7 +229,7 @@ class BigEndian(object):
             The corresponding numerical value.
         """
         #return ByteBuffer.wrap(data, start, 2).order(ByteOrder.BIG_ENDIAN).getShort()
-        return struct.unpack('>h', struct.pack('cc', *data[start : start + 2]))[0]
+        return struct.unpack_from('>h', data, start)[0]
 
     @classmethod
     def bytes_to_int32(self, data, start = 0):
@@ -244,7 +244,7 @@ class BigEndian(object):
             The corresponding numerical value.
         """
         #return ByteBuffer.wrap(data, start, 4).order(ByteOrder.BIG_ENDIAN).getInt()
-        return struct.unpack('>i', struct.pack('cccc', *data[start : start + 4]))[0]
+        return struct.unpack_from('>i', data, start)[0]
 
     @classmethod
     def bytes_to_uint16(self, data, start = 0):
@@ -259,7 +259,7 @@ class BigEndian(object):
             The corresponding numerical value.
         """
         #return ByteBuffer.wrap(data, start, 2).order(ByteOrder.BIG_ENDIAN).getShort() & 0xFFFF
-        return struct.unpack('>H', struct.pack('cc', *data[start : start + 2]))[0]
+        return struct.unpack_from('>H', data, start)[0]
 
     @classmethod
     def bytes_to_uint32(self, data, start = 0):
@@ -274,7 +274,7 @@ class BigEndian(object):
             The corresponding numerical value.
         """
         #return ((long(ByteBuffer.wrap(data, start, 4).order(ByteOrder.BIG_ENDIAN).getInt())) & 0xFFFFFFFFL)
-        return struct.unpack('>I', struct.pack('cccc', *data[start : start + 4]))[0]
+        return struct.unpack_from('>I', data, start)[0]
 
     @classmethod
     def bytes_to_float(self, data, start = 0):
@@ -289,7 +289,7 @@ class BigEndian(object):
             The corresponding numerical value.
         """
         #return Float.intBitsToFloat(self.bytes_to_int32(data, start))
-        return struct.unpack('>f', struct.pack('cccc', *data[start : start + 4]))[0]
+        return struct.unpack_from('>f', data, start)[0]
 
     @classmethod
     def int16_to_bytes(self, value):
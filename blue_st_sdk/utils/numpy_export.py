@@ -0,0 +1,373 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""numpy_export
+
+The numpy_export module contains tools to convert the samples of a feature, the
+history of a feature, and recorded streams of samples into NumPy structured
+arrays.
+
+NumPy is an optional dependency of the BlueSTSDK: the functions of this module
+raise an "ImportError" if NumPy is not installed.
+"""
+
+
+# IMPORT
+
+from blue_st_sdk.feature import FeatureListener
+from blue_st_sdk.features.field import FieldType
+from blue_st_sdk.utils.unwrap_timestamp import UnwrapTimestamp
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# DEFINITIONS
+
+FIELD_TYPE_TO_DTYPE = {
+    FieldType.Float: 'float32',
+    FieldType.Int64: 'int64',
+    FieldType.UInt32: 'uint32',
+    FieldType.Int32: 'int32',
+    FieldType.UInt16: 'uint16',
+    FieldType.Int16: 'int16',
+    FieldType.UInt8: 'uint8',
+    FieldType.Int8: 'int8',
+    FieldType.ByteArray: 'object',
+    FieldType.DateTime: 'datetime64[us]'
+}
+"""Map from field's types to NumPy data types."""
+
+TIMESTAMP_FIELD_NAME = 'timestamp'
+"""Name of the timestamp column of the structured arrays."""
+
+TIMESTAMP_DTYPE = 'int64'
+"""NumPy data type of the timestamp column."""
+
+MISSING_TIMESTAMP = -1
+"""Value of the timestamp column for samples without timestamp (e.g. audio
+samples)."""
+
+CHUNK_SIZE_DEFAULT = 65536
+"""Default number of samples of the chunks returned by :func:`iter_chunks()`."""
+
+
+# FUNCTIONS
+
+def _check_numpy():
+    """Check that NumPy is available.
+
+    Raises:
+        :exc:`ImportError` if NumPy is not installed.
+    """
+    if numpy is None:
+        raise ImportError('NumPy is required to export samples to arrays.')
+
+def get_field_dtype(field_type):
+    """Get the NumPy data type of the given field type.
+
+    Args:
+        field_type (:class:`blue_st_sdk.features.field.FieldType`): Field type.
+
+    Returns:
+        str: The NumPy data type used to store values of the given field type.
+    """
+    return FIELD_TYPE_TO_DTYPE.get(field_type, 'object')
+
+def get_dtype(description):
+    """Get the structured NumPy data type of the samples of a feature.
+
+    The data type has a "timestamp" column followed by one column for each
+    field, named after the field. Duplicated names get a numeric suffix.
+
+    Args:
+        description (list): Description of the data of the feature (list of
+            :class:`blue_st_sdk.features.field.Field` objects).
+
+    Returns:
+        numpy.dtype: The structured data type.
+
+    Raises:
+        :exc:`ImportError` if NumPy is not installed.
+    """
+    _check_numpy()
+    names = [TIMESTAMP_FIELD_NAME]
+    formats = [TIMESTAMP_DTYPE]
+    for field in description:
+        name = str(field.get_name())
+        unique_name = name
+        i = 1
+        while unique_name in names:
+            unique_name = '%s_%d' % (name, i)
+            i += 1
+        names.append(unique_name)
+        formats.append(get_field_dtype(field.get_type()))
+    return numpy.dtype({'names': names, 'formats': formats})
+
+def _get_row(timestamp, data, n_fields):
+    """Get a row of a structured array from a sample.
+
+    Args:
+        timestamp (int): Sample's timestamp, "None" if missing.
+        data (list): Sample's data.
+        n_fields (int): Number of fields of the feature.
+
+    Returns:
+        tuple: The row.
+    """
+    # Samples whose data do not map one-to-one onto the fields (e.g. audio
+    # packets) are stored as a whole into the only field available.
+    if n_fields == 1 and len(data) > 1:
+        data = [data]
+    row = [MISSING_TIMESTAMP if timestamp is None else timestamp]
+    for i in range(0, n_fields):
+        row.append(data[i] if i < len(data) else None)
+    return tuple(row)
+
+def _fill(array, index, row):
+    """Store a row into a structured array, replacing missing values.
+
+    Args:
+        array (numpy.ndarray): The structured array.
+        index (int): Position of the row.
+        row (tuple): The row.
+    """
+    try:
+        array[index] = row
+    except (TypeError, ValueError):
+        # Missing values (None) are not allowed in numeric columns.
+        names = array.dtype.names
+        for i in range(0, len(row)):
+            if row[i] is not None:
+                array[names[i]][index] = row[i]
+
+def samples_to_array(samples, description=None):
+    """Convert a sequence of samples into a structured array.
+
+    Args:
+        samples (list): List of :class:`blue_st_sdk.feature.Sample` objects.
+        description (list, optional): Description of the data of the feature
+            (list of :class:`blue_st_sdk.features.field.Field` objects). By
+            default the description of the first sample is used.
+
+    Returns:
+        numpy.ndarray: A structured array with a row for each sample.
+
+    Raises:
+        :exc:`ImportError` if NumPy is not installed.
+        :exc:`ValueError` if the description is not given and there are no
+            samples.
+    """
+    _check_numpy()
+    samples = list(samples)
+    if description is None:
+        if not samples:
+            raise ValueError('The description of the fields is needed to '
+                'convert an empty list of samples.')
+        description = samples[0].get_description()
+    array = numpy.zeros(len(samples), dtype=get_dtype(description))
+    n_fields = len(description)
+    for i in range(0, len(samples)):
+        sample = samples[i]
+        _fill(array, i, _get_row(sample._timestamp, sample._data, n_fields))
+    return array
+
+def block_to_array(block):
+    """Convert a block of samples into a structured array.
+
+    Args:
+        block (:class:`blue_st_sdk.utils.sample_history.SampleBlock`): Block
+            of samples, e.g. a window of the history of a feature or a block
+            delivered to a :class:`blue_st_sdk.feature.FeatureBatchListener`.
+
+    Returns:
+        numpy.ndarray: A structured array with a row for each sample.
+
+    Raises:
+        :exc:`ImportError` if NumPy is not installed.
+    """
+    _check_numpy()
+    description = block.get_fields_description()
+    array = numpy.zeros(len(block), dtype=get_dtype(description))
+    names = array.dtype.names
+    timestamps = numpy.asarray(block.get_timestamps(), dtype=object)
+    # Timestamps are missing if "None" or, in the history, "NaN".
+    missing = numpy.array(
+        [t is None or t != t for t in timestamps], dtype=bool)
+    timestamps[missing] = MISSING_TIMESTAMP
+    array[TIMESTAMP_FIELD_NAME] = timestamps.astype(TIMESTAMP_DTYPE)
+    for i in range(0, len(description)):
+        column = block.get_column(i)
+        if array.dtype[names[i + 1]] == numpy.dtype(object):
+            array[names[i + 1]] = list(column)
+        else:
+            try:
+                array[names[i + 1]] = column
+            except (TypeError, ValueError):
+                for j in range(0, len(column)):
+                    if column[j] is not None:
+                        array[names[i + 1]][j] = column[j]
+    return array
+
+def history_to_array(history, n=None):
+    """Convert the history of a feature into a structured array.
+
+    Args:
+        history (:class:`blue_st_sdk.utils.sample_history.SampleHistory`):
+            History of a feature.
+        n (int, optional): Number of samples to convert, starting from the
+            most recent one. By default all the samples are converted.
+
+    Returns:
+        numpy.ndarray: A structured array with a row for each sample, oldest
+        first.
+
+    Raises:
+        :exc:`ImportError` if NumPy is not installed.
+    """
+    return block_to_array(history.last(len(history) if n is None else n))
+
+def iter_chunks(samples, description, chunk_size=CHUNK_SIZE_DEFAULT,
+    unwrap=False):
+    """Iterate over a stream of samples in structured arrays of bounded size.
+
+    The stream is consumed lazily, so that recordings bigger than the
+    available memory can be processed chunk by chunk.
+
+    Args:
+        samples: Iterable of :class:`blue_st_sdk.feature.Sample` objects or of
+            (timestamp, data) tuples, e.g. a replayed recording.
+        description (list): Description of the data of the feature (list of
+            :class:`blue_st_sdk.features.field.Field` objects).
+        chunk_size (int, optional): Maximum number of samples of a chunk.
+        unwrap (bool, optional): True if the timestamps are the raw 16-bit
+            timestamps sent by the node and have to be unwrapped, False if they
+            are already unwrapped.
+
+    Yields:
+        numpy.ndarray: Structured arrays of at most *chunk_size* rows.
+
+    Raises:
+        :exc:`ImportError` if NumPy is not installed.
+        :exc:`ValueError` if the chunk size is not positive.
+    """
+    _check_numpy()
+    if chunk_size <= 0:
+        raise ValueError('The chunk size must be positive.')
+    dtype = get_dtype(description)
+    n_fields = len(description)
+    unwrap_timestamp = UnwrapTimestamp() if unwrap else None
+    chunk = numpy.zeros(chunk_size, dtype=dtype)
+    index = 0
+    for sample in samples:
+        if isinstance(sample, tuple):
+            (timestamp, data) = sample
+        else:
+            (timestamp, data) = (sample._timestamp, sample._data)
+        if unwrap_timestamp is not None and timestamp is not None:
+            timestamp = unwrap_timestamp.unwrap(timestamp)
+        _fill(chunk, index, _get_row(timestamp, data, n_fields))
+        index += 1
+        if index == chunk_size:
+            yield chunk
+            chunk = numpy.zeros(chunk_size, dtype=dtype)
+            index = 0
+    if index > 0:
+        yield chunk[:index]
+
+
+# CLASSES
+
+class FeatureArrayRecorder(FeatureListener):
+    """Feature listener that records the notified samples of a feature into a
+    structured array.
+
+    The array is preallocated and doubled in size whenever it is full.
+    """
+
+    _INITIAL_CAPACITY = 1024
+    """Initial number of rows of the array."""
+
+    def __init__(self, feature, capacity=_INITIAL_CAPACITY):
+        """Constructor.
+
+        The recorder has to be added as a listener to the feature to start
+        recording.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature to record.
+            capacity (int, optional): Initial number of rows of the array.
+
+        Raises:
+            :exc:`ImportError` if NumPy is not installed.
+        """
+        _check_numpy()
+
+        self._n_fields = len(feature.get_fields_description())
+        """Number of fields of the feature."""
+
+        self._array = numpy.zeros(
+            max(1, capacity), dtype=get_dtype(feature.get_fields_description()))
+        """Array of the recorded samples."""
+
+        self._size = 0
+        """Number of recorded samples."""
+
+    def on_update(self, feature, sample):
+        """To be called whenever the feature updates its data.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature that has
+                updated.
+            sample (:class:`blue_st_sdk.feature.Sample`): Sample data extracted
+                from the feature.
+        """
+        if self._size == len(self._array):
+            array = numpy.zeros(2 * len(self._array), dtype=self._array.dtype)
+            array[:self._size] = self._array
+            self._array = array
+        _fill(self._array, self._size,
+            _get_row(sample._timestamp, sample._data, self._n_fields))
+        self._size += 1
+
+    def get_array(self):
+        """Get the recorded samples.
+
+        Returns:
+            numpy.ndarray: A structured array with a row for each recorded
+            sample. It is a view on the internal buffer, valid until the next
+            sample is recorded.
+        """
+        return self._array[:self._size]
+
+    def clear(self):
+        """Remove all the recorded samples."""
+        self._size = 0
@@ -0,0 +1,447 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""sample_history
+
+The sample_history module contains tools to keep a fixed-size, columnar history
+of the samples received by a feature.
+"""
+
+
+# IMPORT
+
+from array import array
+import threading
+
+from blue_st_sdk.features.field import FieldType
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# DEFINITIONS
+
+def _get_int64_typecode():
+    """Get the typecode of the 64-bit integer arrays, if available.
+
+    Returns:
+        str: 'q' if supported by the "array" module, 'd' otherwise.
+    """
+    try:
+        array('q')
+        return 'q'
+    except ValueError:
+        return 'd'
+
+FIELD_TYPE_TO_TYPECODE = {
+    FieldType.Float: 'f',
+    FieldType.Int64: _get_int64_typecode(),
+    FieldType.UInt32: 'I',
+    FieldType.Int32: 'i',
+    FieldType.UInt16: 'H',
+    FieldType.Int16: 'h',
+    FieldType.UInt8: 'B',
+    FieldType.Int8: 'b',
+    FieldType.ByteArray: None,
+    FieldType.DateTime: None
+}
+"""Map from field's types to typecodes of the "array" module.
+"None" means that the values are kept as Python objects."""
+
+TIMESTAMP_TYPECODE = 'd'
+"""Typecode of the timestamp column.
+Missing timestamps (e.g. audio samples) are stored as "NaN"."""
+
+
+# FUNCTIONS
+
+def get_array_typecode(field_type):
+    """Get the typecode to store values of the given field type.
+
+    Args:
+        field_type (:class:`blue_st_sdk.features.field.FieldType`): Field type.
+
+    Returns:
+        str: The typecode of the "array" module suitable to store values of the
+        given field type, "None" if values have to be stored as Python objects.
+    """
+    return FIELD_TYPE_TO_TYPECODE.get(field_type)
+
+
+# CLASSES
+
+class SampleBlock(object):
+    """Columnar block of samples.
+
+    A block has a timestamp column and one column for each field of the
+    feature, all of the same length. Columns are "array" objects, NumPy arrays,
+    or lists, depending on who built the block and on the fields' types.
+    """
+
+    def __init__(self, description, timestamps, columns):
+        """Constructor.
+
+        Args:
+            description (list): Description of the data of the feature (list of
+                :class:`blue_st_sdk.features.field.Field` objects).
+            timestamps: Timestamp column.
+            columns (list): Data columns, one for each field.
+        """
+        self._description = description
+        """List of feature's fields."""
+
+        self._timestamps = timestamps
+        """Timestamp column."""
+
+        self._columns = columns
+        """Data columns, one for each field."""
+
+    def get_fields_description(self):
+        """Get the description of the data fields of the block.
+
+        Returns:
+            list: The description of the data fields of the block (list of
+            :class:`blue_st_sdk.features.field.Field` objects).
+        """
+        return self._description
+
+    def get_timestamps(self):
+        """Get the timestamp column.
+
+        Returns:
+            The timestamp column.
+        """
+        return self._timestamps
+
+    def get_columns(self):
+        """Get the data columns.
+
+        Returns:
+            list: The data columns, one for each field.
+        """
+        return self._columns
+
+    def get_column(self, index):
+        """Get a data column.
+
+        Args:
+            index (int): Index of the field.
+
+        Returns:
+            The data column of the field at the given position.
+        """
+        return self._columns[index]
+
+    def get_column_by_name(self, name):
+        """Get a data column by field name.
+
+        Args:
+            name (str): Name of the field.
+
+        Returns:
+            The data column of the field with the given name, "None" if not
+            found.
+        """
+        for i in range(0, len(self._description)):
+            if self._description[i].get_name() == name:
+                return self._columns[i]
+        return None
+
+    def __len__(self):
+        """Get the number of samples of the block.
+
+        Returns:
+            int: The number of samples of the block.
+        """
+        return len(self._timestamps)
+
+    def __str__(self):
+        """Get a string representing the block.
+
+        Returns:
+            str: A string representing the block.
+        """
+        return 'Samples: ' + str(len(self)) + ' Fields: ' \
+            + str([field.get_name() for field in self._description])
+
+
+class SampleHistory(object):
+    """Fixed-capacity, columnar ring buffer of samples.
+
+    All the columns are preallocated at creation time and are twice the
+    capacity long: each value is written both at position "i" and
+    "i + capacity", so that the last "n" samples are always a contiguous slice
+    of each column. When NumPy is used the windows returned by :meth:`last()`
+    and :meth:`since()` are views on the buffer (no copy), and they are
+    overwritten as new samples arrive; with the "array" module windows are
+    copies.
+
+    Fields whose type has no numeric representation (e.g. ByteArray and
+    DateTime) are stored as Python objects. Missing numeric values are stored
+    as "NaN" for floating point columns and as "0" for integer columns.
+    """
+
+    def __init__(self, description, capacity, use_numpy=None):
+        """Constructor.
+
+        Args:
+            description (list): Description of the data of the feature (list of
+                :class:`blue_st_sdk.features.field.Field` objects).
+            capacity (int): Maximum number of samples kept.
+            use_numpy (bool, optional): True to store the columns in NumPy
+                arrays, False to use the "array" module. By default NumPy is
+                used if available.
+
+        Raises:
+            :exc:`ValueError` if the capacity is not positive.
+            :exc:`ImportError` if NumPy is required but not available.
+        """
+        if capacity <= 0:
+            raise ValueError('The capacity of the history must be positive.')
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if use_numpy and numpy is None:
+            raise ImportError('NumPy is required to store the history in NumPy '
+                'arrays.')
+
+        self._description = description
+        """List of feature's fields."""
+
+        self._capacity = capacity
+        """Maximum number of samples kept."""
+
+        self._use_numpy = use_numpy
+        """Tells whether the columns are NumPy arrays."""
+
+        self._typecodes = [get_array_typecode(field.get_type())
+            for field in description]
+        """Typecodes of the data columns ("None" for object columns)."""
+
+        self._timestamps = self._allocate_column(TIMESTAMP_TYPECODE)
+        """Timestamp column."""
+
+        self._columns = [self._allocate_column(typecode)
+            for typecode in self._typecodes]
+        """Data columns, one for each field."""
+
+        self._defaults = [self._get_default_value(typecode)
+            for typecode in self._typecodes]
+        """Values stored in place of missing values, one for each field."""
+
+        self._position = 0
+        """Position where the next sample will be written."""
+
+        self._size = 0
+        """Number of samples stored."""
+
+        self._lock = threading.Lock()
+        """Lock protecting the write position."""
+
+    def _allocate_column(self, typecode):
+        """Allocate a column twice the capacity long.
+
+        Args:
+            typecode (str): Typecode of the column, "None" for object columns.
+
+        Returns:
+            The allocated column.
+        """
+        length = 2 * self._capacity
+        if typecode is None:
+            if self._use_numpy:
+                return numpy.empty(length, dtype=object)
+            return [None] * length
+        if self._use_numpy:
+            return numpy.zeros(length, dtype=numpy.dtype(typecode))
+        return array(typecode, [self._get_default_value(typecode)]) * length
+
+    @classmethod
+    def _get_default_value(self, typecode):
+        """Get the value stored in place of a missing value.
+
+        Args:
+            typecode (str): Typecode of the column, "None" for object columns.
+
+        Returns:
+            "NaN" for floating point columns, "0" for integer columns, "None"
+            for object columns.
+        """
+        if typecode is None:
+            return None
+        if typecode in 'fd':
+            return float('nan')
+        return 0
+
+    def append(self, timestamp, data):
+        """Append a sample to the history, overwriting the oldest one if the
+        history is full.
+
+        Args:
+            timestamp (int): Sample's timestamp, "None" if missing.
+            data (list): Sample's data.
+        """
+        # Samples whose data do not map one-to-one onto the fields (e.g. audio
+        # packets) are stored as a whole into the only field available.
+        if len(self._columns) == 1 and len(data) > 1:
+            data = [data]
+        with self._lock:
+            first = self._position
+            second = first + self._capacity
+            value = float('nan') if timestamp is None else timestamp
+            self._timestamps[first] = value
+            self._timestamps[second] = value
+            for i in range(0, len(self._columns)):
+                value = data[i] if i < len(data) else None
+                if value is None:
+                    value = self._defaults[i]
+                column = self._columns[i]
+                column[first] = value
+                column[second] = value
+            self._position = (first + 1) % self._capacity
+            if self._size < self._capacity:
+                self._size += 1
+
+    def _get_window(self, n):
+        """Get the last "n" samples.
+
+        Args:
+            n (int): Number of samples, not greater than the current size.
+
+        Returns:
+            :class:`blue_st_sdk.utils.sample_history.SampleBlock`: A block with
+            the last "n" samples, oldest first.
+        """
+        end = self._position + self._capacity
+        start = end - n
+        return SampleBlock(
+            self._description,
+            self._timestamps[start:end],
+            [column[start:end] for column in self._columns])
+
+    def last(self, n):
+        """Get the last "n" samples.
+
+        Args:
+            n (int): Number of samples. If greater than the number of samples
+                stored, all the samples are returned.
+
+        Returns:
+            :class:`blue_st_sdk.utils.sample_history.SampleBlock`: A block with
+            the last "n" samples, oldest first.
+        """
+        with self._lock:
+            return self._get_window(max(0, min(n, self._size)))
+
+    def since(self, timestamp):
+        """Get the samples whose timestamp is greater than or equal to the
+        given one.
+
+        Timestamps are not required to be non-decreasing, as they restart
+        when the node reconnects or the device reboots: the samples are
+        selected one by one, and samples without a timestamp are never
+        returned. If the samples selected are the last ones the block is a
+        window as the one returned by :meth:`last()`, otherwise it is a copy.
+
+        Args:
+            timestamp (int): Minimum timestamp of the samples to return.
+
+        Returns:
+            :class:`blue_st_sdk.utils.sample_history.SampleBlock`: A block with
+            the requested samples, oldest first.
+        """
+        with self._lock:
+            end = self._position + self._capacity
+            timestamps = self._timestamps
+            indices = [i for i in range(end - self._size, end)
+                if timestamps[i] >= timestamp]
+            if not indices or indices[0] == end - len(indices):
+                return self._get_window(len(indices))
+            return SampleBlock(
+                self._description,
+                self._take(timestamps, indices),
+                [self._take(column, indices) for column in self._columns])
+
+    @classmethod
+    def _take(self, column, indices):
+        """Copy the values of a column at the given positions.
+
+        Args:
+            column: The column.
+            indices (list): The positions of the values to copy.
+
+        Returns:
+            A column of the same kind with the values copied.
+        """
+        if numpy is not None and isinstance(column, numpy.ndarray):
+            return column[indices]
+        values = [column[i] for i in indices]
+        if isinstance(column, array):
+            return array(column.typecode, values)
+        return values
+
+    def clear(self):
+        """Remove all the samples from the history."""
+        with self._lock:
+            self._position = 0
+            self._size = 0
+
+    def get_capacity(self):
+        """Get the maximum number of samples kept.
+
+        Returns:
+            int: The maximum number of samples kept.
+        """
+        return self._capacity
+
+    def get_fields_description(self):
+        """Get the description of the data fields of the history.
+
+        Returns:
+            list: The description of the data fields of the history (list of
+            :class:`blue_st_sdk.features.field.Field` objects).
+        """
+        return self._description
+
+    def uses_numpy(self):
+        """Check whether the columns are NumPy arrays.
+
+        Returns:
+            bool: True if the columns are NumPy arrays, False otherwise.
+        """
+        return self._use_numpy
+
+    def __len__(self):
+        """Get the number of samples stored.
+
+        Returns:
+            int: The number of samples stored.
+        """
+        return self._size
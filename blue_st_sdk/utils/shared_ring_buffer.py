@@ -0,0 +1,314 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""shared_ring_buffer
+
+The shared_ring_buffer module contains a ring buffer of fixed-size slots living
+in shared memory, through which processes exchange messages without pickling
+and without system calls on the data path.
+
+The buffer is backed by a file in "/dev/shm" (or in the temporary folder, if
+"/dev/shm" is not available) mapped into memory, so that unrelated processes can
+attach to it by name. The mapping itself is handled by :class:`SharedMemory`,
+which other data structures shared among processes build upon.
+
+A ring buffer has a single producer and a single consumer.
+"""
+
+
+# IMPORT
+
+import mmap
+import os
+import struct
+import tempfile
+import uuid
+
+
+# DEFINITIONS
+
+SHARED_MEMORY_FOLDER = '/dev/shm' if os.path.isdir('/dev/shm') \
+    else tempfile.gettempdir()
+"""Folder of the files backing the ring buffers."""
+
+_MAGIC = b'BSTRING1'
+"""Magic number of the ring buffers."""
+
+_HEADER = struct.Struct('<8sII')
+"""Header: magic number, size of a slot in bytes, number of slots."""
+
+_COUNTER = struct.Struct('<Q')
+"""Counter of the slots written or read."""
+
+_WRITE_COUNTER_OFFSET = 64
+"""Offset of the counter of the slots written. Each counter sits on its own
+cache line."""
+
+_READ_COUNTER_OFFSET = 128
+"""Offset of the counter of the slots read."""
+
+_DATA_OFFSET = 192
+"""Offset of the first slot."""
+
+_LENGTH = struct.Struct('<I')
+"""Length of the message stored in a slot."""
+
+
+# CLASSES
+
+class SharedMemory(object):
+    """File in shared memory mapped into memory, which unrelated processes can
+    attach to by name.
+
+    The counters stored in the mapping are unsigned 64-bit integers, each
+    meant to sit on a cache line of its own.
+    """
+
+    def __init__(self, name, prefix, size, create):
+        """Constructor.
+
+        Args:
+            name (str): Name of the mapping; a unique name starting with the
+                prefix is generated if "None".
+            prefix (str): Prefix of the names generated.
+            size (int): Size of the mapping in bytes, used only when creating
+                it.
+            create (bool): If True creates a new mapping, otherwise attaches to
+                an existing one.
+
+        Raises:
+            :exc:`OSError` if the mapping can not be created or attached.
+        """
+        if name is None:
+            name = prefix + uuid.uuid4().hex
+        self._name = name
+        """Name of the mapping."""
+
+        self._path = os.path.join(SHARED_MEMORY_FOLDER, name)
+        """Path of the file backing the mapping."""
+
+        self._owner = create
+        """Whether this object has created the mapping."""
+
+        self._map = None
+        """Memory mapping of the file."""
+
+        if create:
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT | os.O_EXCL,
+                0o600)
+            """File descriptor of the file backing the mapping, which can be
+            used to lock it."""
+        else:
+            self._fd = os.open(self._path, os.O_RDWR)
+            size = 0
+        try:
+            if create:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+        except Exception:
+            self.close()
+            raise
+
+    def get_name(self):
+        """Get the name of the mapping, to be used to attach to it.
+
+        Returns:
+            str: The name of the mapping.
+        """
+        return self._name
+
+    def _get_counter(self, offset):
+        """Get the value of a counter.
+
+        Args:
+            offset (int): Offset of the counter.
+
+        Returns:
+            int: The value of the counter.
+        """
+        return _COUNTER.unpack_from(self._map, offset)[0]
+
+    def _set_counter(self, offset, value):
+        """Set the value of a counter.
+
+        Args:
+            offset (int): Offset of the counter.
+            value (int): The value of the counter.
+        """
+        _COUNTER.pack_into(self._map, offset, value)
+
+    def close(self):
+        """Detach from the mapping, removing it if created by this object."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            if self._owner:
+                self.unlink()
+
+    def unlink(self):
+        """Remove the mapping, so that no other process can attach to it.
+
+        Processes already attached keep working until they detach.
+        """
+        try:
+            os.unlink(self._path)
+        except OSError:
+            pass
+
+
+class SharedRingBuffer(SharedMemory):
+    """Single-producer single-consumer ring buffer of fixed-size slots in
+    shared memory.
+
+    Each slot stores a message of up to :meth:`get_max_message_size()` bytes.
+    The producer calls :meth:`put()`, the consumer :meth:`get()`; neither call
+    blocks.
+    """
+
+    def __init__(self, name=None, slot_size=4096, slot_count=256,
+        create=True):
+        """Constructor.
+
+        Args:
+            name (str, optional): Name of the ring buffer; a unique name is
+                generated if not given.
+            slot_size (int, optional): Size of a slot in bytes, used only when
+                creating the ring buffer.
+            slot_count (int, optional): Number of slots, used only when
+                creating the ring buffer.
+            create (bool, optional): If True creates a new ring buffer,
+                otherwise attaches to an existing one.
+
+        Raises:
+            :exc:`ValueError` if the sizes are not valid or if the ring buffer
+            to attach to is not valid.
+            :exc:`OSError` if the ring buffer can not be created or attached.
+        """
+        if create and (slot_size <= _LENGTH.size or slot_count <= 0):
+            raise ValueError('Invalid slot size or count.')
+        super(SharedRingBuffer, self).__init__(name, 'bluestsdk-',
+            _DATA_OFFSET + slot_size * slot_count if create else None, create)
+        if create:
+            _HEADER.pack_into(self._map, 0, _MAGIC, slot_size, slot_count)
+        else:
+            (magic, slot_size, slot_count) = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC:
+                self.close()
+                raise ValueError('"%s" is not a ring buffer.' % name)
+
+        self._slot_size = slot_size
+        """Size of a slot in bytes."""
+
+        self._slot_count = slot_count
+        """Number of slots."""
+
+    def get_max_message_size(self):
+        """Get the maximum size of a message.
+
+        Returns:
+            int: The maximum size of a message in bytes.
+        """
+        return self._slot_size - _LENGTH.size
+
+    def _get_counters(self):
+        """Get the number of slots written and read so far.
+
+        Returns:
+            tuple: The number of slots written and read.
+        """
+        return (self._get_counter(_WRITE_COUNTER_OFFSET),
+            self._get_counter(_READ_COUNTER_OFFSET))
+
+    def __len__(self):
+        """Get the number of messages waiting to be read.
+
+        Returns:
+            int: The number of messages waiting to be read.
+        """
+        (written, read) = self._get_counters()
+        return written - read
+
+    def put(self, message):
+        """Write a message. To be called by the producer only.
+
+        Args:
+            message (bytes): The message.
+
+        Returns:
+            bool: True if the message has been written, False if the ring buffer
+            is full.
+
+        Raises:
+            :exc:`ValueError` if the message is longer than a slot.
+        """
+        if len(message) > self._slot_size - _LENGTH.size:
+            raise ValueError('The message is longer than a slot.')
+        (written, read) = self._get_counters()
+        if written - read >= self._slot_count:
+            return False
+        offset = _DATA_OFFSET + (written % self._slot_count) * self._slot_size
+        _LENGTH.pack_into(self._map, offset, len(message))
+        start = offset + _LENGTH.size
+        self._map[start:start + len(message)] = message
+        # Publishing the message only after having written it.
+        self._set_counter(_WRITE_COUNTER_OFFSET, written + 1)
+        return True
+
+    def get(self):
+        """Read a message. To be called by the consumer only.
+
+        Returns:
+            bytes: The message, "None" if the ring buffer is empty.
+        """
+        (written, read) = self._get_counters()
+        if written == read:
+            return None
+        offset = _DATA_OFFSET + (read % self._slot_count) * self._slot_size
+        length = _LENGTH.unpack_from(self._map, offset)[0]
+        start = offset + _LENGTH.size
+        message = self._map[start:start + length]
+        # Releasing the slot only after having copied the message.
+        self._set_counter(_READ_COUNTER_OFFSET, read + 1)
+        return message
+
+    def get_all(self):
+        """Read all the messages waiting. To be called by the consumer only.
+
+        Returns:
+            list: The messages, in the order they have been written.
+        """
+        messages = []
+        message = self.get()
+        while message is not None:
+            messages.append(message)
+            message = self.get()
+        return messages
@@ -0,0 +1,578 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""shared_sample_ring
+
+The shared_sample_ring module contains a ring of decoded samples living in
+shared memory, through which the process receiving the notifications fans out
+the samples to other processes without pickling them.
+
+The ring is made of fixed-size records, each made of the identifier of the
+node, the identifier of the feature, the timestamp, the notification time, and
+the values of the fields packed according to their types. The ring is
+self-describing: the node tags and the fields description of the features the
+identifiers refer to are stored as JSON within the ring itself.
+
+Samples are written by a :class:`SharedSampleWriter`, to be added to the
+features as a listener or as a logger, and read by any number of
+:class:`SharedSampleReader` objects, each with its own position. Writers never
+wait for readers: the oldest records are overwritten, and a reader that falls
+behind is told how many records it has lost. Several writers, even from
+different processes, can share the same ring.
+
+Only features whose fields have fixed-size numeric types are supported.
+"""
+
+
+# IMPORT
+
+from datetime import datetime
+import fcntl
+import json
+import struct
+import threading
+import time
+
+from blue_st_sdk.feature import FeatureListener
+from blue_st_sdk.feature import FeatureLogger
+from blue_st_sdk.feature import Sample
+from blue_st_sdk.features.field import Field
+from blue_st_sdk.features.field import FieldType
+from blue_st_sdk.utils.sample_history import get_array_typecode
+from blue_st_sdk.utils.shared_ring_buffer import SharedMemory
+
+
+# DEFINITIONS
+
+RECORD_SIZE_DEFAULT = 128
+"""Default size of a record in bytes."""
+
+RECORD_COUNT_DEFAULT = 65536
+"""Default number of records."""
+
+SCHEMA_SIZE_DEFAULT = 65536
+"""Default size in bytes of the area storing the schema."""
+
+_MAGIC = b'BSTSMPL1'
+"""Magic number of the sample rings."""
+
+_HEADER = struct.Struct('<8sIII')
+"""Header: magic number, size of a record in bytes, number of records, size of
+the schema area in bytes."""
+
+_COUNTER = struct.Struct('<Q')
+"""Counter of the records written."""
+
+_WRITE_COUNTER_OFFSET = 64
+"""Offset of the counter of the records written, on its own cache line."""
+
+_SCHEMA_HEADER = struct.Struct('<QI')
+"""Schema header: version, length of the schema in bytes. The version is odd
+while the schema is being changed."""
+
+_SCHEMA_OFFSET = 128
+"""Offset of the schema header."""
+
+_RECORD_HEADER = struct.Struct('<QHHqd')
+"""Record header: sequence number, node identifier, feature identifier,
+timestamp, notification time in seconds since the epoch."""
+
+
+# FUNCTIONS
+
+def _get_format(description):
+    """Get the format of the values of a feature within a record.
+
+    Args:
+        description (list): Description of the data of the feature (list of
+            :class:`blue_st_sdk.features.field.Field` objects).
+
+    Returns:
+        :class:`struct.Struct`: The format of the values, "None" if some field
+        has not a fixed-size numeric type.
+    """
+    typecodes = [get_array_typecode(field.get_type()) for field in description]
+    if None in typecodes:
+        return None
+    return struct.Struct('<' + ''.join(typecodes))
+
+def _to_seconds(notification_time):
+    """Convert a notification time to seconds since the epoch.
+
+    Args:
+        notification_time (datetime): The notification time.
+
+    Returns:
+        float: The seconds since the epoch.
+    """
+    return time.mktime(notification_time.timetuple()) \
+        + notification_time.microsecond / 1000000.0
+
+
+# CLASSES
+
+class _SharedSampleRing(SharedMemory):
+    """Mapping of a sample ring, shared by writers and readers."""
+
+    def __init__(self, name, record_size, record_count, schema_size, create):
+        """Constructor.
+
+        Args:
+            name (str): Name of the ring; a unique name is generated if "None".
+            record_size (int): Size of a record in bytes, used only when
+                creating the ring.
+            record_count (int): Number of records, used only when creating the
+                ring.
+            schema_size (int): Size in bytes of the area storing the schema,
+                used only when creating the ring.
+            create (bool): If True creates a new ring, otherwise attaches to an
+                existing one.
+
+        Raises:
+            :exc:`ValueError` if the sizes are not valid or if the ring to
+            attach to is not valid.
+            :exc:`OSError` if the ring can not be created or attached.
+        """
+        size = None
+        if create:
+            if record_size <= _RECORD_HEADER.size or record_count <= 0 \
+                or schema_size <= 0:
+                raise ValueError('Invalid record size, record count, or schema '
+                    'size.')
+            size = self._get_data_offset(schema_size) \
+                + record_size * record_count
+        super(_SharedSampleRing, self).__init__(name, 'bluestsdk-samples-',
+            size, create)
+        if create:
+            _HEADER.pack_into(self._map, 0, _MAGIC, record_size, record_count,
+                schema_size)
+        else:
+            (magic, record_size, record_count, schema_size) = \
+                _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC:
+                self.close()
+                raise ValueError('"%s" is not a sample ring.' % name)
+
+        self._record_size = record_size
+        """Size of a record in bytes."""
+
+        self._record_count = record_count
+        """Number of records."""
+
+        self._schema_size = schema_size
+        """Size in bytes of the area storing the schema."""
+
+        self._data_offset = self._get_data_offset(schema_size)
+        """Offset of the first record."""
+
+        self._schema_version = None
+        """Version of the schema last loaded."""
+
+        self._schema = {'nodes': [], 'features': []}
+        """Schema last loaded."""
+
+    @classmethod
+    def _get_data_offset(self, schema_size):
+        """Get the offset of the first record, aligned to a cache line.
+
+        Args:
+            schema_size (int): Size in bytes of the area storing the schema.
+
+        Returns:
+            int: The offset of the first record.
+        """
+        end = _SCHEMA_OFFSET + _SCHEMA_HEADER.size + schema_size
+        return (end + 63) // 64 * 64
+
+    def _get_write_counter(self):
+        """Get the number of records written so far.
+
+        Returns:
+            int: The number of records written so far.
+        """
+        return self._get_counter(_WRITE_COUNTER_OFFSET)
+
+    def _get_record_offset(self, index):
+        """Get the offset of a record.
+
+        Args:
+            index (int): Index of the record since the creation of the ring.
+
+        Returns:
+            int: The offset of the record.
+        """
+        return self._data_offset + (index % self._record_count) \
+            * self._record_size
+
+    def _load_schema(self):
+        """Load the schema, if changed since the last time.
+
+        Returns:
+            bool: True if the schema has changed, False otherwise.
+        """
+        (version, length) = _SCHEMA_HEADER.unpack_from(self._map,
+            _SCHEMA_OFFSET)
+        if version == self._schema_version or version % 2:
+            return False
+        start = _SCHEMA_OFFSET + _SCHEMA_HEADER.size
+        raw = self._map[start:start + length]
+        # Discarding the schema if changed while reading it.
+        if _SCHEMA_HEADER.unpack_from(self._map, _SCHEMA_OFFSET)[0] != version:
+            return False
+        if length > 0:
+            self._schema = json.loads(raw.decode('utf-8'))
+        self._schema_version = version
+        return True
+
+    def _store_schema(self):
+        """Store the schema. To be called while holding the lock.
+
+        Raises:
+            :exc:`ValueError` if the schema does not fit its area.
+        """
+        raw = json.dumps(self._schema, default=str).encode('utf-8')
+        if len(raw) > self._schema_size:
+            raise ValueError('The schema does not fit its area.')
+        start = _SCHEMA_OFFSET + _SCHEMA_HEADER.size
+        version = self._schema_version or 0
+        # Marking the schema as being changed.
+        _SCHEMA_HEADER.pack_into(self._map, _SCHEMA_OFFSET, version + 1, 0)
+        self._map[start:start + len(raw)] = raw
+        self._schema_version = version + 2
+        _SCHEMA_HEADER.pack_into(self._map, _SCHEMA_OFFSET,
+            self._schema_version, len(raw))
+
+
+class SharedSampleWriter(_SharedSampleRing, FeatureListener, FeatureLogger):
+    """Writer of a sample ring.
+
+    It can be added to the features either as a listener or as a logger.
+    """
+
+    def __init__(self, name=None, record_size=RECORD_SIZE_DEFAULT,
+        record_count=RECORD_COUNT_DEFAULT, schema_size=SCHEMA_SIZE_DEFAULT,
+        create=True):
+        """Constructor.
+
+        Args:
+            name (str, optional): Name of the ring; a unique name is generated
+                if not given.
+            record_size (int, optional): Size of a record in bytes, used only
+                when creating the ring.
+            record_count (int, optional): Number of records, used only when
+                creating the ring.
+            schema_size (int, optional): Size in bytes of the area storing the
+                schema, used only when creating the ring.
+            create (bool, optional): If True creates a new ring, otherwise
+                attaches to an existing one, e.g. created by a writer in another
+                process.
+
+        Raises:
+            :exc:`ValueError` if the sizes are not valid or if the ring to
+            attach to is not valid.
+            :exc:`OSError` if the ring can not be created or attached.
+        """
+        super(SharedSampleWriter, self).__init__(name, record_size,
+            record_count, schema_size, create)
+
+        self._lock = threading.Lock()
+        """Lock serializing the writers of this process; writers of different
+        processes are serialized by locking the file backing the ring."""
+
+        self._formats = {}
+        """Dictionary that maps (node tag, feature name) pairs to (node
+        identifier, feature identifier, format of the values, number of values)
+        tuples."""
+
+        self._written = 0
+        """Number of samples written."""
+
+        self._skipped = 0
+        """Number of samples skipped because not representable in a record."""
+
+        self._record = bytearray(self._record_size)
+        """Buffer where records are packed before being copied to the ring."""
+
+    def on_update(self, feature, sample):
+        """To be called whenever a feature updates its data.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature that has
+                updated.
+            sample (:class:`blue_st_sdk.feature.Sample`): Data extracted from
+                the feature.
+        """
+        self.write(feature.get_parent_node().get_tag(), feature.get_name(),
+            sample)
+
+    def log_update(self, feature, raw_data, sample):
+        """Log a feature's update.
+
+        Args:
+            feature (:class:`blue_st_sdk.feature.Feature`): Feature that has
+                updated.
+            raw_data (str): Raw data used to extract the feature field.
+            sample (:class:`blue_st_sdk.feature.Sample`): Data extracted from
+                the feature.
+        """
+        self.write(feature.get_parent_node().get_tag(), feature.get_name(),
+            sample)
+
+    def write(self, node_tag, feature_name, sample):
+        """Write a sample to the ring.
+
+        Args:
+            node_tag (str): Tag of the node.
+            feature_name (str): Name of the feature.
+            sample (:class:`blue_st_sdk.feature.Sample`): The sample.
+
+        Returns:
+            bool: True if the sample has been written, False if it can not be
+            represented in a record.
+        """
+        with self._lock:
+            key = (node_tag, feature_name)
+            entry = self._formats.get(key)
+            if entry is None:
+                entry = self._register(node_tag, feature_name,
+                    sample.get_description())
+                self._formats[key] = entry
+            (node_id, feature_id, values_format, values_count) = entry
+            data = sample.get_data()
+            if values_format is None or len(data) != values_count:
+                self._skipped += 1
+                return False
+            # Packing the whole record before touching the ring, so that a
+            # sample not representable in a record, e.g. because of a
+            # timestamp that is not an integer, never leaves a record half
+            # written.
+            record = self._record
+            try:
+                _RECORD_HEADER.pack_into(record, 0, 0, node_id, feature_id,
+                    sample.get_timestamp(),
+                    _to_seconds(sample.get_notification_time()))
+                values_format.pack_into(record, _RECORD_HEADER.size, *data)
+            except (struct.error, TypeError, AttributeError):
+                self._skipped += 1
+                return False
+            length = _RECORD_HEADER.size + values_format.size
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                index = self._get_write_counter()
+                offset = self._get_record_offset(index)
+                # Marking the record as being written.
+                self._set_counter(offset, 2 * index + 1)
+                self._map[offset + _COUNTER.size:offset + length] = \
+                    bytes(record[_COUNTER.size:length])
+                # Publishing the record only after having written it.
+                self._set_counter(offset, 2 * index + 2)
+                self._set_counter(_WRITE_COUNTER_OFFSET, index + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+            self._written += 1
+            return True
+
+    def _register(self, node_tag, feature_name, description):
+        """Get the identifiers of a node and of a feature, adding them to the
+        schema if needed. To be called while holding the lock.
+
+        Args:
+            node_tag (str): Tag of the node.
+            feature_name (str): Name of the feature.
+            description (list): Description of the data of the feature (list of
+                :class:`blue_st_sdk.features.field.Field` objects).
+
+        Returns:
+            tuple: The node identifier, the feature identifier, the format of
+            the values, "None" if the feature can not be represented in a
+            record, and the number of values.
+        """
+        values_format = _get_format(description)
+        if values_format is not None \
+            and _RECORD_HEADER.size + values_format.size > self._record_size:
+            values_format = None
+        if values_format is None:
+            return (None, None, None, 0)
+        fields = [{
+            'name': field.get_name(),
+            'unit': field.get_unit(),
+            'type': field.get_type().value,
+            'max': field.get_max(),
+            'min': field.get_min()
+        } for field in description]
+        feature = {'name': feature_name, 'fields': fields,
+            'format': values_format.format}
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            # Other writers may have changed the schema meanwhile.
+            self._schema_version = None
+            self._load_schema()
+            nodes = self._schema['nodes']
+            features = self._schema['features']
+            feature = json.loads(json.dumps(feature, default=str))
+            changed = False
+            if node_tag not in nodes:
+                nodes.append(node_tag)
+                changed = True
+            if feature not in features:
+                features.append(feature)
+                changed = True
+            if changed:
+                self._store_schema()
+            return (nodes.index(node_tag), features.index(feature),
+                values_format, len(description))
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def get_statistics(self):
+        """Get the statistics of the writer.
+
+        Returns:
+            dict: A dictionary with the number of samples written ("written")
+            and skipped because not representable in a record ("skipped").
+        """
+        return {'written': self._written, 'skipped': self._skipped}
+
+
+class SharedSampleReader(_SharedSampleRing):
+    """Reader of a sample ring.
+
+    Each reader has its own position, so that any number of readers can read
+    the same samples.
+    """
+
+    def __init__(self, name, from_oldest=False):
+        """Constructor.
+
+        Args:
+            name (str): Name of the ring.
+            from_oldest (bool, optional): If True starts reading from the oldest
+                record still available, otherwise from the next record written.
+
+        Raises:
+            :exc:`ValueError` if the ring is not valid.
+            :exc:`OSError` if the ring can not be attached.
+        """
+        super(SharedSampleReader, self).__init__(name, None, None, None, False)
+
+        self._position = self._get_write_counter()
+        """Index of the next record to read."""
+        if from_oldest:
+            self._position = max(0, self._position - self._record_count)
+
+        self._lost = 0
+        """Number of records overwritten before being read."""
+
+        self._features = []
+        """List of (feature name, description, format) tuples, one for each
+        feature identifier."""
+
+    def _update_features(self):
+        """Update the descriptions of the features if the schema has
+        changed."""
+        if not self._load_schema():
+            return
+        self._features = []
+        for feature in self._schema['features']:
+            description = [Field(field['name'], field['unit'],
+                FieldType(field['type']), field['max'], field['min'])
+                for field in feature['fields']]
+            self._features.append((feature['name'], description,
+                struct.Struct(str(feature['format']))))
+
+    def __len__(self):
+        """Get the number of records waiting to be read.
+
+        Returns:
+            int: The number of records waiting to be read, including the ones
+            already overwritten.
+        """
+        return self._get_write_counter() - self._position
+
+    def read(self, max_samples=None):
+        """Read the samples written since the last call.
+
+        Args:
+            max_samples (int, optional): Maximum number of samples to read.
+
+        Returns:
+            list: A list of (node tag, feature name,
+            :class:`blue_st_sdk.feature.Sample`) tuples, in the order the
+            samples have been written.
+        """
+        samples = []
+        while max_samples is None or len(samples) < max_samples:
+            written = self._get_write_counter()
+            if self._position >= written:
+                break
+            # Skipping the records already overwritten.
+            if written - self._position > self._record_count:
+                self._lost += written - self._record_count - self._position
+                self._position = written - self._record_count
+            offset = self._get_record_offset(self._position)
+            (sequence, node_id, feature_id, timestamp, notification_time) = \
+                _RECORD_HEADER.unpack_from(self._map, offset)
+            if sequence != 2 * self._position + 2:
+                if sequence > 2 * self._position + 2:
+                    # Overwritten meanwhile.
+                    self._lost += 1
+                    self._position += 1
+                    continue
+                break
+            if feature_id >= len(self._features) \
+                or node_id >= len(self._schema['nodes']):
+                self._update_features()
+                if feature_id >= len(self._features) \
+                    or node_id >= len(self._schema['nodes']):
+                    # Retrying once the schema is stable.
+                    break
+            (feature_name, description, values_format) = \
+                self._features[feature_id]
+            data = list(values_format.unpack_from(self._map,
+                offset + _RECORD_HEADER.size))
+            # Discarding the record if overwritten while reading it.
+            if _COUNTER.unpack_from(self._map, offset)[0] != sequence:
+                self._lost += 1
+                self._position += 1
+                continue
+            sample = Sample(data, description, timestamp)
+            sample._notification_time = \
+                datetime.fromtimestamp(notification_time)
+            samples.append((self._schema['nodes'][node_id], feature_name,
+                sample))
+            self._position += 1
+        return samples
+
+    def get_lost(self):
+        """Get the number of records overwritten before being read.
+
+        Returns:
+            int: The number of records overwritten before being read.
+        """
+        return self._lost
@@ -71,4 +71,11 @@ class UnwrapTimestamp(object):
             and self._last_timestamp > timestamp:
             self._reset_times += 1
         self._last_timestamp = timestamp
-        return long(self._reset_times) * (1 << 16) + long(timestamp)
+        return self._reset_times * (1 << 16) + timestamp
+
+    @synchronized
+    def reset(self):
+        """Forget the timestamps received so far, e.g. after the node has
+        reconnected."""
+        self._reset_times = 0
+        self._last_timestamp = 0
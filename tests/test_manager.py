@@ -0,0 +1,91 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""test_manager
+
+Tests of the manager module, run on simulated devices.
+"""
+
+
+# IMPORT
+
+import time
+import unittest
+
+from blue_st_sdk.manager import Manager
+from blue_st_sdk.simulated_transport import SimulatedDevice
+from blue_st_sdk.simulated_transport import SimulatedTransport
+
+
+# CLASSES
+
+class DiscoveryLimitsTest(unittest.TestCase):
+    """Tests of the limits set through
+    :meth:`blue_st_sdk.manager.Manager.set_discovery_limits()`."""
+
+    def setUp(self):
+        self.devices = [SimulatedDevice('c0:de:00:00:00:%02x' % i, 'N%d' % i,
+            0x02, 0x00E00000) for i in range(3)]
+        self.manager = Manager.instance()
+        self.manager.set_discovery_limits()
+        self.manager.remove_nodes()
+        self.manager.set_transport(SimulatedTransport(self.devices,
+            time_scale=0))
+        self.manager.discover(False, 0.3)
+
+    def tearDown(self):
+        self.manager.set_discovery_limits()
+        self.manager.remove_nodes()
+
+    def _get_tags(self):
+        return [record.get_tag()
+            for record in self.manager.get_discovery_records()]
+
+    def test_expired_node_evicted_once_released(self):
+        tag = self.devices[0].get_address()
+        node = self.manager.get_node_with_tag(tag)
+        node.connect()
+        try:
+            # The node sends no advertisements while connected.
+            now = time.time()
+            for record in self.manager.get_discovery_records():
+                record._last_seen = now - 100 if record.get_tag() == tag \
+                    else now
+            self.manager.set_discovery_limits(idle_ttl_s=60)
+            self.manager._evict_records()
+            self.assertIn(tag, self._get_tags())
+        finally:
+            node.disconnect()
+        self.manager._evict_records()
+        self.assertNotIn(tag, self._get_tags())
+        self.assertEqual(len(self._get_tags()), len(self.devices) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""test_node
+
+Tests of the node module, run on simulated devices.
+"""
+
+
+# IMPORT
+
+import os
+import unittest
+
+from bluepy.btle import BTLEException
+
+from blue_st_sdk.manager import Manager
+from blue_st_sdk.node import _HelperOutput
+from blue_st_sdk.notification_poller import NotificationPoller
+from blue_st_sdk.simulated_transport import SimulatedDevice
+from blue_st_sdk.simulated_transport import SimulatedTransport
+
+
+# CLASSES
+
+class NotificationsBulkTest(unittest.TestCase):
+    """Tests of :meth:`blue_st_sdk.node.Node.enable_notifications_bulk()` and
+    :meth:`blue_st_sdk.node.Node.disable_notifications_bulk()`."""
+
+    def setUp(self):
+        device = SimulatedDevice('c0:de:00:00:01:00', 'N0', 0x02, 0x00E00000)
+        self.manager = Manager.instance()
+        self.manager.remove_nodes()
+        self.manager.set_transport(SimulatedTransport([device], time_scale=0))
+        self.manager.discover(False, 0.3)
+        self.node = self.manager.get_node_with_tag(device.get_address())
+        self.node.connect()
+        self.features = [feature for feature in self.node.get_features()
+            if self.node._get_notifiable_characteristic(feature) is not None]
+
+    def tearDown(self):
+        self.node.disconnect()
+        self.manager.remove_nodes()
+
+    def _fail_writes(self):
+        """Make the simulated node fail the descriptor writes."""
+        def write_characteristic(handle, val, withResponse=False):
+            raise BTLEException(BTLEException.GATT_ERROR,
+                'Write failed on handle %d' % handle)
+        self.node.writeCharacteristic = write_characteristic
+
+    def _restore_writes(self):
+        del self.node.writeCharacteristic
+
+    def test_failed_enable_is_rolled_back(self):
+        self._fail_writes()
+        with self.assertRaises(BTLEException):
+            self.node.enable_notifications_bulk(self.features)
+        self._restore_writes()
+        for feature in self.features:
+            self.assertFalse(feature.is_notifying())
+        self.node.enable_notifications_bulk(self.features)
+        for feature in self.features:
+            self.assertTrue(feature.is_notifying())
+            self.assertIn(feature.get_characteristic().getHandle(),
+                self.node._notifying_handles)
+
+    def test_failed_disable_is_rolled_back(self):
+        self.node.enable_notifications_bulk(self.features)
+        self._fail_writes()
+        with self.assertRaises(BTLEException):
+            self.node.disable_notifications_bulk(self.features)
+        self._restore_writes()
+        for feature in self.features:
+            self.assertTrue(feature.is_notifying())
+        self.node.disable_notifications_bulk(self.features)
+        for feature in self.features:
+            self.assertFalse(feature.is_notifying())
+            self.assertNotIn(feature.get_characteristic().getHandle(),
+                self.node._notifying_handles)
+
+
+class HelperOutputTest(unittest.TestCase):
+    """Tests of :class:`blue_st_sdk.node._HelperOutput`."""
+
+    def setUp(self):
+        (read_fd, self.write_fd) = os.pipe()
+        self.output = _HelperOutput(os.fdopen(read_fd, 'r'))
+
+    def tearDown(self):
+        self.output.close()
+        os.close(self.write_fd)
+
+    def test_lines_read_together(self):
+        os.write(self.write_fd, b'rsp=$ntfy\nrsp=$ntfy\nrsp=')
+        self.assertFalse(self.output.has_line())
+        self.assertEqual(self.output.readline(), 'rsp=$ntfy\n')
+        self.assertTrue(self.output.has_line())
+        self.assertEqual(self.output.readline(), 'rsp=$ntfy\n')
+        self.assertFalse(self.output.has_line())
+        os.write(self.write_fd, b'$wr\n')
+        self.assertEqual(self.output.readline(), 'rsp=$wr\n')
+
+
+class WaitForNotificationsTest(unittest.TestCase):
+    """Tests of :meth:`blue_st_sdk.node.Node.wait_for_notifications()`."""
+
+    def setUp(self):
+        device = SimulatedDevice('c0:de:00:00:02:00', 'N0', 0x02, 0x00E00000,
+            notification_period_s=3600)
+        self.manager = Manager.instance()
+        self.manager.remove_nodes()
+        self.manager.set_transport(SimulatedTransport([device], time_scale=0))
+        self.manager.discover(False, 0.3)
+        self.node = self.manager.get_node_with_tag(device.get_address())
+        self.node.connect()
+
+    def tearDown(self):
+        self.node.disconnect()
+        self.manager.remove_nodes()
+
+    def test_zero_timeout_does_not_block(self):
+        self.assertFalse(self.node.wait_for_notifications(0))
+        poller = NotificationPoller()
+        poller.add_node(self.node)
+        self.assertEqual(poller.poll(0), 0)
+        poller.remove_node(self.node)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""test_notification_poller
+
+Tests of the notification_poller module.
+"""
+
+
+# IMPORT
+
+import os
+import select
+import unittest
+
+from blue_st_sdk.notification_poller import NotificationPoller
+
+
+# CLASSES
+
+class BufferingNode(object):
+    """Node reading all the lines available on its pipe at once, as bluepy's
+    text pipe does, and delivering them one per call."""
+
+    def __init__(self):
+        self.pipe = os.pipe()
+        self.buffered = 0
+        self.delivered = 0
+
+    def fileno(self):
+        return self.pipe[0]
+
+    def notify(self, count):
+        os.write(self.pipe[1], b'n\n' * count)
+
+    def wait_for_notifications(self, timeout_s):
+        if not self.buffered \
+            and select.select([self.pipe[0]], [], [], timeout_s)[0]:
+            self.buffered += os.read(self.pipe[0], 4096).count(b'\n')
+        if not self.buffered:
+            return False
+        self.buffered -= 1
+        self.delivered += 1
+        return True
+
+    def close(self):
+        os.close(self.pipe[0])
+        os.close(self.pipe[1])
+
+
+class NotificationPollerTest(unittest.TestCase):
+    """Tests of :class:`blue_st_sdk.notification_poller.NotificationPoller`."""
+
+    def setUp(self):
+        self.node = BufferingNode()
+        self.poller = NotificationPoller()
+        self.poller.add_node(self.node)
+
+    def tearDown(self):
+        self.poller.remove_node(self.node)
+        self.node.close()
+
+    def test_buffered_notifications_drained(self):
+        self.node.notify(3)
+        self.assertEqual(self.poller.poll(1.0), 1)
+        self.assertEqual(self.node.delivered, 3)
+        self.assertEqual(self.poller.poll(0), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
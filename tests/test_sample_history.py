@@ -0,0 +1,94 @@
+################################################################################
+# COPYRIGHT(c) 2018 STMicroelectronics                                         #
+#                                                                              #
+# Redistribution and use in source and binary forms, with or without           #
+# modification, are permitted provided that the following conditions are met:  #
+#   1. Redistributions of source code must retain the above copyright notice,  #
+#      this list of conditions and the following disclaimer.                   #
+#   2. Redistributions in binary form must reproduce the above copyright       #
+#      notice, this list of conditions and the following disclaimer in the     #
+#      documentation and/or other materials provided with the distribution.    #
+#   3. Neither the name of STMicroelectronics nor the names of its             #
+#      contributors may be used to endorse or promote products derived from    #
+#      this software without specific prior written permission.                #
+#                                                                              #
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"  #
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE    #
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE   #
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE    #
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR          #
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF         #
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS     #
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN      #
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)      #
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE   #
+# POSSIBILITY OF SUCH DAMAGE.                                                  #
+################################################################################
+
+
+
+"""test_sample_history
+
+Tests of the sample_history module.
+"""
+
+
+# IMPORT
+
+import unittest
+
+from blue_st_sdk.features.field import Field
+from blue_st_sdk.features.field import FieldType
+from blue_st_sdk.utils.sample_history import SampleHistory
+
+
+# CLASSES
+
+class SampleHistorySinceTest(unittest.TestCase):
+    """Tests of :meth:`blue_st_sdk.utils.sample_history.SampleHistory.since()`.
+    """
+
+    def _create_history(self, timestamps, use_numpy=False):
+        """Create a history with one sample for each timestamp, whose value is
+        the position of the sample."""
+        history = SampleHistory([Field('X', 'mg', FieldType.Int16, 100, -100)],
+            10, use_numpy)
+        for (i, timestamp) in enumerate(timestamps):
+            history.append(timestamp, [i])
+        return history
+
+    def test_non_decreasing_timestamps(self):
+        block = self._create_history([100, 101, 102]).since(101)
+        self.assertEqual(list(block.get_timestamps()), [101, 102])
+        self.assertEqual(list(block.get_column(0)), [1, 2])
+
+    def test_timestamp_restart(self):
+        history = self._create_history([100, 101, 102, 0, 1, 2])
+        block = history.since(101)
+        self.assertEqual(list(block.get_timestamps()), [101, 102])
+        self.assertEqual(list(block.get_column(0)), [1, 2])
+        block = history.since(1)
+        self.assertEqual(list(block.get_timestamps()), [100, 101, 102, 1, 2])
+        self.assertEqual(list(block.get_column(0)), [0, 1, 2, 4, 5])
+
+    def test_missing_timestamps(self):
+        block = self._create_history([None, 5, None, 6]).since(0)
+        self.assertEqual(list(block.get_timestamps()), [5, 6])
+        self.assertEqual(list(block.get_column(0)), [1, 3])
+
+    def test_no_samples(self):
+        block = self._create_history([1, 2]).since(3)
+        self.assertEqual(len(block), 0)
+
+    def test_timestamp_restart_numpy(self):
+        try:
+            history = self._create_history([100, 101, 102, 0, 1, 2], True)
+        except ImportError:
+            self.skipTest('NumPy is not installed.')
+        block = history.since(101)
+        self.assertEqual(list(block.get_timestamps()), [101, 102])
+        self.assertEqual(list(block.get_column(0)), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()